@@ -1,22 +1,40 @@
 from django.contrib import admin
-from .models import Film, Yorum
+from django.contrib.admin import helpers
+from django.template.response import TemplateResponse
+from .models import Film, Yorum, TmdbDetay, SenkronDurumu, Tur
 
 
 @admin.register(Film)
 class FilmAdmin(admin.ModelAdmin):
     list_display = ("isim", "yil", "puan", "turler", "eklenme_tarihi")
-    list_filter = ("yil",)
+    list_filter = ("kategoriler", "yil")
+    filter_horizontal = ("kategoriler",)
     search_fields = ("isim", "oyuncular", "turler")
     ordering = ("-eklenme_tarihi",)
 
+    def get_search_results(self, request, queryset, search_term):
+        # FTS indeksi varsa LIKE taraması yerine onu kullan (Türkçe harf katlamalı)
+        from .services import search_service
+
+        if search_term and search_service.fts_aktif():
+            return search_service.ara(queryset, search_term, sirala=False), False
+        return super().get_search_results(request, queryset, search_term)
+
+
+@admin.register(Tur)
+class TurAdmin(admin.ModelAdmin):
+    list_display = ("isim", "tmdb_id")
+    search_fields = ("isim",)
+
 
 @admin.register(Yorum)
 class YorumAdmin(admin.ModelAdmin):
-    list_display = ("kullanici_adi", "film", "ai_karari", "ai_guveni", "get_kaynak_badge", "tarih")
-    list_filter = ("ai_karari", "tarih", "ai_kaynak")
+    list_display = ("kullanici_adi", "film", "ai_karari", "ai_guveni", "get_kaynak_badge", "ai_durum", "tarih")
+    list_filter = ("ai_durum", "ai_karari", "tarih", "ai_kaynak")
     search_fields = ("kullanici_adi", "icerik", "film__isim")
     ordering = ("-tarih",)
-    readonly_fields = ("ai_karari", "ai_guveni", "ai_kaynak")
+    readonly_fields = ("ai_karari", "ai_guveni", "ai_kaynak", "ai_deneme", "ai_kilit_zamani")
+    actions = ["tekrar_analiz_et", "moderasyonu_yeniden_uygula"]
 
     def get_kaynak_badge(self, obj):
         """AI Kaynağını renkli badge olarak gösterir."""
@@ -39,4 +57,54 @@ class YorumAdmin(admin.ModelAdmin):
             obj.ai_kaynak
         )
     get_kaynak_badge.short_description = "AI Kaynak"
-    get_kaynak_badge.admin_order_field = "ai_kaynak"
\ No newline at end of file
+    get_kaynak_badge.admin_order_field = "ai_kaynak"
+
+    @admin.action(description="Seçili yorumları tekrar analiz kuyruğuna al")
+    def tekrar_analiz_et(self, request, queryset):
+        from .services.analysis_queue import notify
+        n = queryset.update(ai_durum=Yorum.DURUM_BEKLIYOR, ai_deneme=0, ai_kilit_zamani=None)
+        notify()
+        self.message_user(request, f"{n} yorum analiz kuyruğuna alındı.")
+
+    @admin.action(description="Moderasyonu yeniden uygula (küfürlü/anlamsız yorumları sil)", permissions=["delete"])
+    def moderasyonu_yeniden_uygula(self, request, queryset):
+        from .services.moderation_service import denetle
+        yorumlar = list(queryset.only("id", "kullanici_adi", "icerik"))
+        takilan = []
+        for y in yorumlar:
+            karar = denetle(y.icerik)
+            if karar["kufur"] or karar["anlamsiz"]:
+                takilan.append(y)
+        if not takilan:
+            self.message_user(request, f"{len(yorumlar)} yorum denetlendi, silinecek yorum yok.")
+            return None
+
+        # delete_selected gibi: önce takılan yorumlar listelenir, silme onaydan sonra
+        if request.POST.get("post") == "yes":
+            # Tek tek silme sinyalleri (film sayaçları) Django'nun toplu silmesinde de çalışır
+            Yorum.objects.filter(id__in=[y.id for y in takilan]).delete()
+            self.message_user(request, f"{len(yorumlar)} yorum denetlendi, {len(takilan)} yorum silindi.")
+            return None
+
+        request.current_app = self.admin_site.name
+        return TemplateResponse(request, "admin/filmler/yorum/moderasyon_onay.html", {
+            **self.admin_site.each_context(request),
+            "title": "Emin misiniz?",
+            "opts": self.model._meta,
+            "yorumlar": takilan,
+            "denetlenen": len(yorumlar),
+            "action_checkbox_name": helpers.ACTION_CHECKBOX_NAME,
+        })
+
+
+@admin.register(TmdbDetay)
+class TmdbDetayAdmin(admin.ModelAdmin):
+    list_display = ("film", "tmdb_id", "bulundu", "sure_dk", "guncellenme_tarihi")
+    list_filter = ("bulundu",)
+    search_fields = ("film__isim", "tmdb_id")
+    raw_id_fields = ("film",)
+
+
+@admin.register(SenkronDurumu)
+class SenkronDurumuAdmin(admin.ModelAdmin):
+    list_display = ("anahtar", "deger", "guncellenme_tarihi")
@@ -11,6 +11,11 @@ class FilmlerConfig(AppConfig):
     verbose_name = "Film Yönetimi"
 
     def ready(self):
+        # Yorum sayaçları için sinyaller (her komutta aktif olmalı)
+        from . import signals  # noqa: F401
+        # SQLite bağlantı PRAGMA'ları (WAL, busy_timeout ...)
+        from sinema_sitesi import db_pragmas  # noqa: F401
+
         # Uygulama ayağa kalktığında modeli arka planda yükle (Warmup)
         # Bu sayede ilk istekte bekleme süresi azalır.
         
@@ -36,6 +41,9 @@ class FilmlerConfig(AppConfig):
                 logger.info(f"AI Warmup SKIPPED (Command: {command})")
                 return
 
+        # 1.5 Analiz kuyruğu worker'ı (yorumların duygu analizi arka planda yapılır)
+        self._start_analysis_worker()
+
         # 2. Env Var ile Kontrol (ENABLE_AI_WARMUP=False veya DISABLE_WARMUP=1 ise yapma)
         # Default: True (Production'da workers icin)
         enable_warmup = os.environ.get("ENABLE_AI_WARMUP", "True").lower() in ("true", "1", "yes")
@@ -60,3 +68,24 @@ class FilmlerConfig(AppConfig):
         # Daemon thread: Ana program kapanınca bu da kapansın
         t = threading.Thread(target=warmup, daemon=True)
         t.start()
+
+    def _start_analysis_worker(self):
+        import sys
+        import os
+        from django.conf import settings
+
+        if not getattr(settings, "AI_QUEUE_WORKER", True):
+            logger.info("Analiz kuyruğu worker'ı DISABLED (AI_QUEUE_WORKER=False).")
+            return
+
+        # manage.py ile sadece runserver'da başlat (diğer komutlar kısa ömürlü;
+        # analiz_worker zaten kendi döngüsünü çalıştırır). Gunicorn'da argv farklıdır.
+        if sys.argv and sys.argv[0].endswith("manage.py") and len(sys.argv) > 1:
+            if sys.argv[1] != "runserver":
+                return
+            # Autoreloader'ın izleyen (parent) sürecinde başlatma
+            if os.environ.get("RUN_MAIN") != "true" and "--noreload" not in sys.argv:
+                return
+
+        from filmler.services.analysis_queue import start_background_worker
+        start_background_worker()
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from filmler.services import analysis_queue
+
+
+class Command(BaseCommand):
+    help = "Bekleyen yorumların duygu analizini yapan kuyruk worker'ı (web sürecinden ayrı çalıştırmak için)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Kuyruğu bir kez boşalt ve çık.')
+        parser.add_argument('--batch-size', type=int, default=None, help='Batch başına yorum (varsayılan: AI_QUEUE_BATCH_SIZE).')
+        parser.add_argument('--poll', type=float, default=None, help='Boş kuyrukta yoklama aralığı (sn).')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            t0 = time.time()
+            n = analysis_queue.drain_once(options['batch_size'])
+            sure = time.time() - t0
+            self.stdout.write(self.style.SUCCESS(
+                f"[OK] {n} yorum analiz edildi ({sure:.2f}s). Kalan: {analysis_queue.pending_count()}"
+            ))
+            return
+
+        self.stdout.write(self.style.WARNING(">>> Analiz worker'ı çalışıyor (Ctrl+C ile durdur)..."))
+        try:
+            analysis_queue.run_worker(poll_sn=options['poll'], batch_size=options['batch_size'])
+        except KeyboardInterrupt:
+            self.stdout.write("Worker durduruldu.")
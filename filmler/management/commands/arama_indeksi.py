@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from filmler.services import search_service
+
+
+class Command(BaseCommand):
+    help = "Film arama indeksini (SQLite FTS5) Film tablosundan baştan kurar."
+
+    def handle(self, *args, **options):
+        if not search_service.fts_aktif():
+            self.stderr.write(self.style.WARNING("[ATLANDI] FTS tablosu yok (SQLite/FTS5 değil); arama icontains kullanıyor."))
+            return
+        n = search_service.yeniden_kur()
+        self.stdout.write(self.style.SUCCESS(f"[OK] {n} film indekslendi."))
@@ -1,183 +1,190 @@
+import datetime
 import logging
-import time
-import concurrent.futures
-import requests
-from django.core.management.base import BaseCommand
+
+from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
-from filmler.models import Film
+from django.db import transaction
+from django.db.models import Q
+from filmler.models import Film, SenkronDurumu, Tur
+from filmler.services import tmdb_service
+from filmler.signals import katalog_guncellendi
+from filmler.services.tmdb_ingest import TmdbClient, TokenBucket, changed_ids, content_hash, run_pipeline
 
 logger = logging.getLogger(__name__)
 
+# Upsert'te güncellenen alanlar (tmdb_ingest.parse_movie 'defaults' anahtarları + içerik özeti)
+UPSERT_FIELDS = ["konu", "yil", "puan", "oyuncular", "turler", "poster_url", "fragman_url", "icerik_hash"]
+
+# Son başarılı değişiklik taramasının tarihi (TMDB /movie/changes, UTC gün)
+WATERMARK_KEY = "tmdb_degisiklik_tarihi"
+
+
 class Command(BaseCommand):
-    help = 'TMDB API üzerinden filmleri ve türlerini çeker (Retry & Normalization support).'
+    help = 'TMDB API üzerinden filmleri ve türlerini çeker (eşzamanlı pipeline, ortak rate limit).'
 
     def add_arguments(self, parser):
-        parser.add_argument('sayfa', type=int, help='Kaç sayfa veri çekilsin? (her sayfa ~20 film)')
+        parser.add_argument('sayfa', type=int, nargs='?', default=0, help='Kaç sayfa veri çekilsin? (her sayfa ~20 film)')
+        parser.add_argument('--degisiklik', action='store_true',
+                            help='Artımlı mod: son senkrondan beri TMDB\'de değişen katalog filmlerini günceller.')
+        parser.add_argument('--since', type=datetime.date.fromisoformat, default=None,
+                            help='Artımlı mod başlangıç günü (YYYY-MM-DD); varsayılan kayıtlı watermark.')
+        parser.add_argument('--workers', type=int, default=8, help='Eşzamanlı TMDB isteği (sayfa + detay).')
+        parser.add_argument('--rate', type=float, default=None, help='İstek/sn üst sınırı (varsayılan: TMDB_RATE_PER_SN).')
+        parser.add_argument('--queue-size', type=int, default=100, help='DB yazıcıya giden kuyruğun boyu.')
+        parser.add_argument('--base-url', default=None, help='TMDB API kökü (yerel taklit sunucu için, örn. http://127.0.0.1:8765/3).')
 
     def handle(self, *args, **kwargs):
         sayfa_sayisi = kwargs['sayfa']
+        artimli = kwargs['degisiklik']
         self.api_key = getattr(settings, "TMDB_API_KEY", "")
 
         if not self.api_key:
             self.stderr.write(self.style.ERROR("[HATA] TMDB_API_KEY ayarlanmamış! .env dosyasını kontrol edin."))
             return
-
-        # 1. Tür Listesini (Genre Map) Çek
-        genre_map = {}
-        try:
-            g_data = self.fetch_tmdb("https://api.themoviedb.org/3/genre/movie/list", {"language": "tr-TR"})
-            if g_data:
-                for g in g_data.get("genres", []):
-                    genre_map[g["id"]] = g["name"]
-        except Exception as e:
-             self.stderr.write(self.style.ERROR(f"Tür listesi çekilemedi: {e}"))
-             return
-
-        base_url = "https://api.themoviedb.org/3/movie/popular"
-        self.stdout.write(self.style.WARNING(f">>> {sayfa_sayisi} sayfa taranıyor... Retry & Rate Limit aktif."))
-
-        # İşlem fonksiyonu (Closure olarak genre_map'e erişir)
-        def process_movie_wrapper(movie_data):
-            return self.process_movie(movie_data, genre_map)
-
-        # Ana Döngü
-        count = 0
-        existing_count = 0
-        
-        for sayfa in range(1, sayfa_sayisi + 1):
-            self.stdout.write(f"--- Sayfa {sayfa}/{sayfa_sayisi} çekiliyor ---")
-            
-            data = self.fetch_tmdb(base_url, {"language": "tr-TR", "page": sayfa})
-            if not data:
-                self.stderr.write(self.style.ERROR(f"Sayfa {sayfa} alınamadı, atlanıyor."))
-                continue
-
-            movies = data.get("results", [])
-            
-            # Threading ile işlem
-            with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-                results = list(executor.map(process_movie_wrapper, movies))
-
-            # DB Kayıt (Main Thread)
-            for item in results:
-                if not item:
-                    continue
-                
-                title = item['isim']
-                defaults = item['defaults']
-                
-                # Normalizasyon ve Duplicate Kontrolü (Case-insensitive)
-                # Önce var mı diye bak (iexact). Varsa güncelle, yoksa oluştur.
-                # update_or_create iexact ile çalışmaz (get yapar, dönerse update eder).
-                # Ama biz isme göre update etmek istiyoruz.
-                
-                # Normalize Title (strip)
-                title = title.strip()
-                
-                obj, created = Film.objects.update_or_create(
-                    isim__iexact=title,
-                    defaults={'isim': title, **defaults} # İsmi de düzgün haliyle kaydet/güncelle
-                )
-                
-                if created:
-                    count += 1
-                else:
-                    existing_count += 1
-
-            # Sayfa arası bekleme (nezaket)
-            time.sleep(0.5)
+        if not sayfa_sayisi and not artimli:
+            raise CommandError("Sayfa sayısı veya --degisiklik verilmeli.")
+
+        rate = kwargs['rate'] or getattr(settings, "TMDB_RATE_PER_SN", 20)
+        client = TmdbClient(self.api_key, base_url=kwargs['base_url'], limiter=TokenBucket(rate))
+        bugun = datetime.datetime.now(datetime.timezone.utc).date()
+
+        movie_ids = set()
+        if artimli:
+            since = kwargs['since'] or SenkronDurumu.oku(WATERMARK_KEY)
+            if not since:
+                raise CommandError("Kayıtlı senkron tarihi yok: önce tam çekim yapın ya da --since verin.")
+            if isinstance(since, str):
+                since = datetime.date.fromisoformat(since)
+
+            degisen = changed_ids(client, since, bugun)
+            if degisen is None:
+                self.stderr.write(self.style.ERROR("[HATA] TMDB değişiklik listesi alınamadı, senkron tarihi korunuyor."))
+                return
+            # Sadece katalogdaki filmler (TMDB günde binlerce filmi değiştirir)
+            katalog = set(Film.objects.exclude(tmdb_id=None).values_list("tmdb_id", flat=True))
+            movie_ids = degisen & katalog
+            self.stdout.write(self.style.WARNING(
+                f">>> {since} - {bugun}: TMDB'de {len(degisen)} değişiklik, katalogda {len(movie_ids)} film."
+            ))
+
+        self.stdout.write(self.style.WARNING(
+            f">>> {sayfa_sayisi} sayfa + {len(movie_ids)} film taranıyor... "
+            f"({kwargs['workers']} worker, {rate:g} istek/sn, {client.base_url})"
+        ))
+
+        self.count = 0
+        self.existing_count = 0
+        self.unchanged_count = 0
+        # TMDB genre id -> Tur.id (az sayıda; bir kez okunur, yeni türler yazılırken eklenir)
+        self.tur_idleri = dict(Tur.objects.exclude(tmdb_id=None).values_list("tmdb_id", "id"))
+        stats = run_pipeline(
+            client,
+            range(1, sayfa_sayisi + 1),
+            self.write_batch,
+            workers=kwargs['workers'],
+            queue_size=kwargs['queue_size'],
+            movie_ids=movie_ids,
+        )
+
+        if stats["pages_failed"]:
+            self.stderr.write(self.style.ERROR(f"{stats['pages_failed']} sayfa alınamadı."))
+        if stats["movies_failed"]:
+            self.stderr.write(self.style.WARNING(f"{stats['movies_failed']} film detayı alınamadı."))
+
+        # Watermark: artımlı modda sadece eksiksiz turdan sonra ilerler; tam çekim ilk değeri verir
+        if artimli and not stats["pages_failed"] and not stats["movies_failed"]:
+            SenkronDurumu.yaz(WATERMARK_KEY, bugun.isoformat())
+        elif not artimli and not stats["pages_failed"] and SenkronDurumu.oku(WATERMARK_KEY) is None:
+            SenkronDurumu.yaz(WATERMARK_KEY, bugun.isoformat())
 
         self.stdout.write(self.style.SUCCESS(f"\n[TAMAM] İşlem Bitti!"))
-        self.stdout.write(self.style.SUCCESS(f"Eklenen: {count}, Güncellenen: {existing_count}"))
-
-    def fetch_tmdb(self, url, params=None):
+        self.stdout.write(self.style.SUCCESS(
+            f"Eklenen: {self.count}, Güncellenen: {self.existing_count}, Değişmeyen: {self.unchanged_count}"
+        ))
+        sure = stats["elapsed_sn"] or 1e-9
+        self.stdout.write(
+            f"{stats['requests']} istek, {stats['elapsed_sn']}s "
+            f"({stats['written'] / sure:.1f} film/sn, rate-limit beklemesi {stats['rate_wait_sn']}s, 429: {stats['throttled']})"
+        )
+
+    def write_batch(self, items):
         """
-        TMDB API isteği atar. Retry, Backoff ve Rate Limit loglama içerir.
+        Pipeline'dan gelen bir sayfayı tek transaction'da yazar (ana thread):
+        tmdb_id üzerinden tek bulk upsert (INSERT ... ON CONFLICT(tmdb_id) DO UPDATE).
+        icerik_hash'i aynı kalan filmler atlanır.
         """
-        if params is None:
-            params = {}
-        params['api_key'] = self.api_key
-        
-        max_retries = 3
-        retry_delay = 1 # saniye
-        
-        for attempt in range(max_retries + 1):
-            try:
-                response = requests.get(url, params=params, timeout=10)
-                
-                # Rate Limit Loglama (Header kontrolü)
-                remaining = response.headers.get('X-RateLimit-Remaining')
-                if remaining and int(remaining) < 5:
-                    self.stdout.write(self.style.WARNING(f"UYARI: Rate Limit azalıyor! Kalan: {remaining}"))
-                
-                if response.status_code == 429:
-                    # Too Many Requests
-                    wait = int(response.headers.get('Retry-After', 5)) + 1
-                    logger.warning(f"Rate Limit aşıldı (429). {wait}s bekleniyor...")
-                    time.sleep(wait)
-                    continue
-                
-                response.raise_for_status()
-                return response.json()
-                
-            except requests.RequestException as e:
-                if attempt < max_retries:
-                    wait = retry_delay * (2 ** attempt) # Exponential backoff: 1, 2, 4...
-                    logger.warning(f"API Hatası: {e}. {wait}s sonra tekrar deneniyor ({attempt+1}/{max_retries})...")
-                    time.sleep(wait)
-                else:
-                    logger.error(f"API isteği başarısız oldu: {url} | Hata: {e}")
-                    return None
-        return None
-
-    def process_movie(self, film_data, genre_map):
-        """Tek bir filmi işleyip sözlük döner."""
-        try:
-            film_id = film_data["id"]
-            title = film_data["title"]
-
-            # Türleri Bul
-            genre_ids = film_data.get("genre_ids", [])
-            film_turleri = ", ".join([genre_map.get(gid, "") for gid in genre_ids if gid in genre_map])
-
-            # Oyuncular
-            cast_str = "Bilgi yok"
-            c_data = self.fetch_tmdb(f"https://api.themoviedb.org/3/movie/{film_id}/credits")
-            if c_data:
-                cast_names = [p["name"] for p in c_data.get("cast", [])[:5]]
-                if cast_names:
-                    cast_str = ", ".join(cast_names)
-
-            # Fragman
-            fragman_link = ""
-            # Önce TR
-            v_data = self.fetch_tmdb(f"https://api.themoviedb.org/3/movie/{film_id}/videos", {"language": "tr-TR"})
-            videos = v_data.get("results", []) if v_data else []
-            
-            if not videos:
-                # Sonra EN
-                v_data = self.fetch_tmdb(f"https://api.themoviedb.org/3/movie/{film_id}/videos", {"language": "en-US"})
-                videos = v_data.get("results", []) if v_data else []
-            
-            for v in videos:
-                if v["site"] == "YouTube" and v["type"] == "Trailer":
-                    fragman_link = f"https://www.youtube.com/embed/{v['key']}"
-                    break
-
-            poster_path = film_data.get("poster_path")
-            
-            return {
-                'isim': title,
-                'defaults': {
-                    'konu': film_data.get("overview", "Özet yok."),
-                    'yil': film_data.get("release_date", "2024").split("-")[0],
-                    'puan': round(film_data.get("vote_average", 0), 1),
-                    'oyuncular': cast_str,
-                    'turler': film_turleri,
-                    'poster_url': f"https://image.tmdb.org/t/p/w500{poster_path}" if poster_path else "",
-                    'fragman_url': fragman_link,
-                },
-            }
-        except Exception as e:
-            logger.error(f"Film işleme hatası ({film_data.get('title')}): {e}")
-            return None
\ No newline at end of file
+        # Aynı batch'te tekrar eden id: sonuncusu kazanır
+        by_id = {item['tmdb']['id']: item for item in items if item['isim']}
+        if not by_id:
+            return 0
+
+        # İçeriği değişmeyen filmler hiç yazılmaz
+        hashler = {tid: content_hash(item) for tid, item in by_id.items()}
+        eski_hash = dict(Film.objects.filter(tmdb_id__in=list(by_id)).values_list("tmdb_id", "icerik_hash"))
+        ids = [tid for tid in by_id if eski_hash.get(tid) != hashler[tid]]
+        self.unchanged_count += len(by_id) - len(ids)
+        if not ids:
+            return 0
+
+        with transaction.atomic():
+            mevcut = {tid for tid in ids if tid in eski_hash}
+
+            # tmdb_id'siz eski kayıtlar (isimle eklenmiş): aynı isimliyse (büyük/küçük harf farkı
+            # gözetmeden, eski iexact eşleşmesi gibi) id'yi sahiplen, kopya oluşmasın
+            isimden = {by_id[tid]['isim'].casefold(): tid for tid in ids if tid not in mevcut}
+            if isimden:
+                kosul = Q()
+                for tid in isimden.values():
+                    kosul |= Q(isim__iexact=by_id[tid]['isim'])
+                sahiplenilen = []
+                for film in Film.objects.filter(kosul, tmdb_id__isnull=True):
+                    tid = isimden.pop(film.isim.casefold(), None)
+                    if tid is not None:
+                        film.tmdb_id = tid
+                        sahiplenilen.append(film)
+                Film.objects.bulk_update(sahiplenilen, ["tmdb_id"])
+                mevcut.update(f.tmdb_id for f in sahiplenilen)
+
+            Film.objects.bulk_create(
+                [Film(tmdb_id=tid, isim=by_id[tid]['isim'], icerik_hash=hashler[tid], **by_id[tid]['defaults']) for tid in ids],
+                update_conflicts=True,
+                unique_fields=["tmdb_id"],
+                update_fields=["isim", *UPSERT_FIELDS],
+            )
+
+            # Aynı yanıt detay önbelleğine de yazılır (detay sayfası için ek istek gerekmez)
+            filmler = Film.objects.in_bulk(ids, field_name="tmdb_id")
+            tmdb_service.store_details_bulk([(filmler[tid], by_id[tid]['tmdb']) for tid in ids if tid in filmler])
+            self.write_genres({filmler[tid].id: by_id[tid]['tmdb'].get("genres", []) for tid in ids if tid in filmler})
+
+            # bulk_create post_save göndermez: arama indeksi vb. için toplu bildirim
+            katalog_guncellendi.send(sender=Film, film_ids=[f.id for f in filmler.values()])
+
+        self.count += len(ids) - len(mevcut)
+        self.existing_count += len(mevcut)
+        return len(ids)
+
+    def write_genres(self, film_turleri):
+        """{film.id: TMDB genres [{id, name}]} -> Tur kayıtları + Film.kategoriler (toplu)."""
+        yeni = {
+            g["id"]: g["name"][:50]
+            for turler in film_turleri.values() for g in turler
+            if g.get("id") and g.get("name") and g["id"] not in self.tur_idleri
+        }
+        if yeni:
+            # Migration'ın metinden oluşturduğu (tmdb_id'siz) türler isimle sahiplenilir
+            isimden = {isim: gid for gid, isim in yeni.items()}
+            eski = list(Tur.objects.filter(tmdb_id__isnull=True, isim__in=list(isimden)))
+            for tur in eski:
+                tur.tmdb_id = isimden[tur.isim]
+            Tur.objects.bulk_update(eski, ["tmdb_id"])
+            Tur.objects.bulk_create([Tur(tmdb_id=gid, isim=isim) for gid, isim in yeni.items()], ignore_conflicts=True)
+            self.tur_idleri.update(Tur.objects.filter(tmdb_id__in=list(yeni)).values_list("tmdb_id", "id"))
+
+        Baglanti = Film.kategoriler.through
+        Baglanti.objects.filter(film_id__in=list(film_turleri)).delete()
+        Baglanti.objects.bulk_create([
+            Baglanti(film_id=film_id, tur_id=self.tur_idleri[g["id"]])
+            for film_id, turler in film_turleri.items() for g in turler
+            if g.get("id") in self.tur_idleri
+        ], ignore_conflicts=True)
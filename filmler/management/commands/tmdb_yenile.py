@@ -0,0 +1,44 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from filmler.models import Film
+from filmler.services import tmdb_service
+
+
+class Command(BaseCommand):
+    help = "TMDB detay önbelleğini (TmdbDetay) tazeler. Varsayılan: hiç çekilmemiş veya TTL'i dolmuş filmler."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hepsi', action='store_true', help='TTL\'e bakmadan tüm filmleri tazele.')
+        parser.add_argument('--limit', type=int, default=None, help='En fazla bu kadar film tazele.')
+        parser.add_argument('--bekleme', type=float, default=0.25, help='İstekler arası bekleme (sn, rate limit için).')
+
+    def handle(self, *args, **options):
+        if not tmdb_service.TMDB_API_KEY:
+            self.stderr.write(self.style.ERROR("[HATA] TMDB_API_KEY ayarlanmamış! .env dosyasını kontrol edin."))
+            return
+
+        filmler = Film.objects.order_by("id")
+        if not options['hepsi']:
+            sinir = timezone.now() - timedelta(seconds=getattr(settings, "TMDB_CACHE_TTL", 7 * 24 * 3600))
+            filmler = filmler.filter(Q(tmdb_detay__isnull=True) | Q(tmdb_detay__guncellenme_tarihi__lt=sinir))
+        if options['limit']:
+            filmler = filmler[:options['limit']]
+
+        toplam = bulunan = 0
+        t0 = time.time()
+        for film in filmler.iterator(chunk_size=200):
+            detay = tmdb_service.refresh_details(film)
+            toplam += 1
+            if detay is not None and detay.bulundu:
+                bulunan += 1
+            time.sleep(options['bekleme'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"[TAMAM] {toplam} film tazelendi ({bulunan} TMDB'de bulundu) - {time.time() - t0:.1f}s"
+        ))
@@ -0,0 +1,210 @@
+import datetime
+import hashlib
+import itertools
+import json
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models import Q
+
+from filmler.models import SenkronDurumu, Yorum
+from filmler.services import sentiment_service, stats_service
+
+# Son yazılan yorum id'si (--devam buradan sürdürür). Filtreli çalıştırmalar kendi anahtarını
+# kullanır (_watermark_anahtari): farklı filtreyle --devam başka bir işin yerinden sürmesin
+WATERMARK_KEY = "yeniden_analiz_son_id"
+
+# Bu kaynaklarla dönen sonuçlar yazılmaz (yorumun eski kararı korunur)
+HATA_KAYNAKLARI = {"error", "api_error", "api_busy", "exception", "invalid_input", "circuit_open"}
+
+GUNCELLENEN_ALANLAR = ["ai_karari", "ai_guveni", "ai_kaynak", "ai_durum"]
+
+
+def _watermark_anahtari(options):
+    filtreler = {
+        "film": sorted(options['film_ids'] or []),
+        "baslangic": options['baslangic'].isoformat() if options['baslangic'] else None,
+        "bitis": options['bitis'].isoformat() if options['bitis'] else None,
+        "kaynak": sorted(options['kaynaklar'] or []),
+    }
+    if not any(filtreler.values()):
+        return WATERMARK_KEY
+    ozet = hashlib.sha1(json.dumps(filtreler, sort_keys=True).encode()).hexdigest()[:12]
+    return f"{WATERMARK_KEY}:{ozet}"
+
+
+def _analiz_et(metinler):
+    """Process pool worker'ı: sadece metin alır/döner (ORM ve DB bağlantısı ana süreçte)."""
+    return sentiment_service.analyze_comments_batch(metinler)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mevcut yorumların duygu analizini yeniden yapar (yeni model / eşik değişikliği sonrası). "
+        "Yorumlar id sırasıyla akıtılır, batch halinde analiz edilip bulk_update ile yazılır."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--film', type=int, action='append', dest='film_ids', help='Sadece bu film(ler) (tekrarlanabilir).')
+        parser.add_argument('--baslangic', type=datetime.date.fromisoformat, default=None, help='Bu günden (YYYY-MM-DD) itibaren yazılan yorumlar.')
+        parser.add_argument('--bitis', type=datetime.date.fromisoformat, default=None, help='Bu güne (YYYY-MM-DD) kadar yazılan yorumlar.')
+        parser.add_argument('--kaynak', action='append', dest='kaynaklar',
+                            help='Sadece ai_kaynak bu önekle başlayanlar (örn. local::TFIDF, api_error; tekrarlanabilir).')
+        parser.add_argument('--batch-size', type=int, default=256, help='Analiz batch\'i (ensemble_batch / toplu API çağrısı başına yorum).')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='DB\'den okuma parçası (iterator chunk_size).')
+        parser.add_argument('--isci', type=int, default=0, help='Process pool boyutu (0: ana süreçte analiz).')
+        parser.add_argument('--limit', type=int, default=None, help='En fazla bu kadar yorum.')
+        parser.add_argument('--devam', action='store_true', help='Kayıtlı son id\'den (watermark) devam et.')
+        parser.add_argument('--dry-run', action='store_true', help='Sadece kaç kararın değişeceğini raporla, yazma.')
+
+    def handle(self, *args, **options):
+        qs = Yorum.objects.filter(ai_durum__in=[Yorum.DURUM_TAMAM, Yorum.DURUM_HATA])
+        if options['film_ids']:
+            qs = qs.filter(film_id__in=options['film_ids'])
+        if options['baslangic']:
+            qs = qs.filter(tarih__date__gte=options['baslangic'])
+        if options['bitis']:
+            qs = qs.filter(tarih__date__lte=options['bitis'])
+        if options['kaynaklar']:
+            kaynak_q = Q()
+            for kaynak in options['kaynaklar']:
+                kaynak_q |= Q(ai_kaynak__startswith=kaynak)
+            qs = qs.filter(kaynak_q)
+
+        self.watermark_key = _watermark_anahtari(options)
+        son_id = 0
+        if options['devam']:
+            son_id = int(SenkronDurumu.oku(self.watermark_key, 0))
+            if not son_id:
+                raise CommandError("Bu filtrelerle kayıtlı watermark yok; --devam olmadan (aynı filtrelerle) başlatın.")
+            qs = qs.filter(id__gt=son_id)
+
+        self.dry_run = options['dry_run']
+        self.sayac = {"islenen": 0, "degisen": 0, "karar_degisen": 0, "hata": 0, "atlanan": 0}
+        batch_size = max(1, options['batch_size'])
+
+        toplam = qs.count()
+        if options['limit']:
+            toplam = min(toplam, options['limit'])
+        self.stdout.write(self.style.WARNING(
+            f">>> {toplam} yorum yeniden analiz edilecek (batch {batch_size}, "
+            f"{options['isci'] or 'tek'} süreç{', son id ' + str(son_id) if son_id else ''}"
+            f"{', DRY-RUN' if self.dry_run else ''})"
+        ))
+        if not toplam:
+            return
+
+        # SQLite: iterator chunk'lar halinde okur; yazılan alanlar id sırasını etkilemez
+        yorumlar = (
+            qs.order_by("id")
+            .only("id", "film_id", "icerik", *GUNCELLENEN_ALANLAR)
+            .iterator(chunk_size=options['chunk_size'])
+        )
+        batches = _batches(itertools.islice(yorumlar, toplam), batch_size)
+
+        self.t0 = time.monotonic()
+        if options['isci'] > 0:
+            self._pool_ile(batches, options['isci'])
+        else:
+            for batch in batches:
+                self._yaz(batch, _analiz_et([y.icerik for y in batch]))
+
+        sure = time.monotonic() - self.t0
+        s = self.sayac
+        self.stdout.write(self.style.SUCCESS(
+            f"\n[TAMAM] {s['islenen']} yorum, {sure:.1f}s ({s['islenen'] / max(sure, 1e-9):.1f} yorum/sn). "
+            f"Değişen: {s['degisen']} (karar: {s['karar_degisen']}), hata: {s['hata']}"
+        ))
+        if s['atlanan']:
+            self.stdout.write(self.style.WARNING(
+                f"{s['atlanan']} yorum analiz sırasında değiştiği (kuyruğa alındı/silindi) için yazılmadı."
+            ))
+        if s['hata']:
+            self.stderr.write(self.style.WARNING(
+                f"{s['hata']} yorum analiz edilemedi, eski kararları korundu (--kaynak ile tekrar denenebilir)."
+            ))
+
+    def _pool_ile(self, batches, isci):
+        # Worker'lar DB okuması başlamadan fork'lanır: açık SQLite bağlantısı çocuk sürece geçmesin
+        connections.close_all()
+        bekleyen = deque()
+        with ProcessPoolExecutor(max_workers=isci) as pool:
+            pool.submit(int).result()
+            for batch in batches:
+                bekleyen.append((batch, pool.submit(_analiz_et, [y.icerik for y in batch])))
+                # Uçuşta en fazla 2 x isci batch; sonuçlar gönderim sırasıyla yazılır (watermark monoton)
+                while len(bekleyen) >= 2 * isci:
+                    self._yaz_future(*bekleyen.popleft())
+            while bekleyen:
+                self._yaz_future(*bekleyen.popleft())
+
+    def _yaz_future(self, batch, future):
+        self._yaz(batch, future.result())
+
+    def _yaz(self, batch, sonuclar):
+        adaylar = []
+        for yorum, sonuc in zip(batch, sonuclar):
+            if sonuc["source"] in HATA_KAYNAKLARI:
+                self.sayac["hata"] += 1
+                continue
+            yeni = (sonuc["decision"], round(float(sonuc["confidence"]), 6), sonuc["source"])
+            if (yorum.ai_karari, round(yorum.ai_guveni, 6), yorum.ai_kaynak) == yeni and yorum.ai_durum == Yorum.DURUM_TAMAM:
+                continue
+            adaylar.append((yorum, yeni))
+
+        if self.dry_run:
+            degisen, kararlar = adaylar, _karar_farklari(adaylar)
+        else:
+            with transaction.atomic():
+                degisen = _okundugu_gibi(adaylar)
+                kararlar = _karar_farklari(degisen)
+                for yorum, yeni in degisen:
+                    yorum.ai_karari, yorum.ai_guveni, yorum.ai_kaynak = yeni
+                    yorum.ai_durum = Yorum.DURUM_TAMAM
+                if degisen:
+                    Yorum.objects.bulk_update([y for y, _ in degisen], GUNCELLENEN_ALANLAR)
+                    stats_service.kararlar_degisti(kararlar)
+                SenkronDurumu.yaz(self.watermark_key, batch[-1].id)
+
+        s = self.sayac
+        s["islenen"] += len(batch)
+        s["degisen"] += len(degisen)
+        s["karar_degisen"] += len(kararlar)
+        s["atlanan"] += len(adaylar) - len(degisen)
+        sure = time.monotonic() - self.t0
+        self.stdout.write(
+            f"  {s['islenen']} yorum (son id {batch[-1].id}) | {s['islenen'] / max(sure, 1e-9):.1f} yorum/sn | "
+            f"değişen {s['degisen']}, hata {s['hata']}"
+        )
+
+
+def _okundugu_gibi(adaylar):
+    """
+    Analiz sürerken durumu/kararı değişen (kuyruğa alınan, yeniden analiz edilen) ya da silinen
+    yorumlar ayıklanır; transaction içinde tekrar okunur (SQLite IMMEDIATE / select_for_update kilidi).
+    """
+    if not adaylar:
+        return []
+    mevcut = {
+        yorum_id: (durum, karar)
+        for yorum_id, durum, karar in Yorum.objects.select_for_update()
+        .filter(id__in=[y.id for y, _ in adaylar])
+        .values_list("id", "ai_durum", "ai_karari")
+    }
+    return [(y, yeni) for y, yeni in adaylar if mevcut.get(y.id) == (y.ai_durum, y.ai_karari)]
+
+
+def _karar_farklari(degisen):
+    return [(y.film_id, y.ai_karari, yeni[0]) for y, yeni in degisen if y.ai_karari != yeni[0]]
+
+
+def _batches(iterable, boyut):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, boyut))
+        if not batch:
+            return
+        yield batch
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from filmler.services import stats_service
+
+
+class Command(BaseCommand):
+    help = "Film yorum sayaçlarını (toplam/olumlu/olumsuz/nötr) Yorum tablosundan yeniden kurar."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--film', type=int, action='append', dest='film_ids', help='Sadece bu film(ler) (tekrarlanabilir).')
+        parser.add_argument('--dry-run', action='store_true', help='Sadece sapmaları raporla, yazma.')
+
+    def handle(self, *args, **options):
+        sapmalar = stats_service.yeniden_kur(options['film_ids'], dry_run=options['dry_run'])
+
+        for film_id, fark in sapmalar[:20]:
+            detay = ", ".join(f"{alan}: {eski} -> {yeni}" for alan, (eski, yeni) in fark.items())
+            self.stdout.write(f"Film {film_id}: {detay}")
+        if len(sapmalar) > 20:
+            self.stdout.write(f"... ve {len(sapmalar) - 20} film daha")
+
+        if not sapmalar:
+            self.stdout.write(self.style.SUCCESS("[OK] Tüm sayaçlar tutarlı."))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"[DRY-RUN] {len(sapmalar)} filmde sapma var, değişiklik yapılmadı."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"[OK] {len(sapmalar)} filmin sayaçları düzeltildi."))
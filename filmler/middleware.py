@@ -1,13 +1,30 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+
 class SecurityHeadersMiddleware:
     """
     YouTube embed'ler ve genel güvenlik için HTTP header'ları ekler.
+    Sync ve async zincirde çalışır (ASGI_MODE'da async view'lar thread'e düşmez).
     """
 
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        response = self.get_response(request)
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self._headerlar(self.get_response(request))
+
+    async def __acall__(self, request):
+        return self._headerlar(await self.get_response(request))
+
+    @staticmethod
+    def _headerlar(response):
         response["Referrer-Policy"] = "strict-origin-when-cross-origin"
         response["X-Content-Type-Options"] = "nosniff"
         return response
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:07
+
+from django.db import migrations, models
+
+
+def mevcut_yorumlari_tamamla(apps, schema_editor):
+    # Eski yorumlar senkron analiz edilmişti; sadece kararı olmayanlar kuyruğa girsin
+    Yorum = apps.get_model("filmler", "Yorum")
+    Yorum.objects.exclude(ai_karari="").update(ai_durum="tamam")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filmler', '0005_yorum_ai_kaynak'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='yorum',
+            name='ai_deneme',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Analiz Denemesi'),
+        ),
+        migrations.AddField(
+            model_name='yorum',
+            name='ai_durum',
+            field=models.CharField(choices=[('bekliyor', 'Analiz Bekliyor'), ('isleniyor', 'Analiz Ediliyor'), ('tamam', 'Analiz Edildi'), ('hata', 'Analiz Başarısız')], db_index=True, default='bekliyor', max_length=10, verbose_name='AI Durumu'),
+        ),
+        migrations.AddField(
+            model_name='yorum',
+            name='ai_kilit_zamani',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Worker Kilit Zamanı'),
+        ),
+        migrations.RunPython(mevcut_yorumlari_tamamla, migrations.RunPython.noop),
+    ]
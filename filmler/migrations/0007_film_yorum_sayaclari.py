@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:09
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def sayaclari_doldur(apps, schema_editor):
+    Film = apps.get_model("filmler", "Film")
+    Yorum = apps.get_model("filmler", "Yorum")
+    rows = Yorum.objects.values("film_id").annotate(
+        toplam=Count("id"),
+        olumlu=Count("id", filter=Q(ai_karari="OLUMLU")),
+        olumsuz=Count("id", filter=Q(ai_karari="OLUMSUZ")),
+        notr=Count("id", filter=Q(ai_karari="NÖTR")),
+    )
+    for r in rows:
+        Film.objects.filter(id=r["film_id"]).update(
+            yorum_sayisi=r["toplam"],
+            olumlu_sayisi=r["olumlu"],
+            olumsuz_sayisi=r["olumsuz"],
+            notr_sayisi=r["notr"],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filmler', '0006_yorum_ai_durum'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='film',
+            name='notr_sayisi',
+            field=models.PositiveIntegerField(default=0, verbose_name='Nötr Yorum'),
+        ),
+        migrations.AddField(
+            model_name='film',
+            name='olumlu_sayisi',
+            field=models.PositiveIntegerField(default=0, verbose_name='Olumlu Yorum'),
+        ),
+        migrations.AddField(
+            model_name='film',
+            name='olumsuz_sayisi',
+            field=models.PositiveIntegerField(default=0, verbose_name='Olumsuz Yorum'),
+        ),
+        migrations.AddField(
+            model_name='film',
+            name='yorum_sayisi',
+            field=models.PositiveIntegerField(default=0, verbose_name='Yorum Sayısı'),
+        ),
+        migrations.RunPython(sayaclari_doldur, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filmler', '0007_film_yorum_sayaclari'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TmdbDetay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tmdb_id', models.PositiveIntegerField(blank=True, null=True, unique=True, verbose_name='TMDB ID')),
+                ('bulundu', models.BooleanField(default=True, verbose_name="TMDB'de Bulundu")),
+                ('sure_dk', models.PositiveIntegerField(blank=True, null=True, verbose_name='Süre (dk)')),
+                ('turler', models.CharField(blank=True, default='', max_length=250, verbose_name='Türler')),
+                ('backdrop_url', models.CharField(blank=True, default='', max_length=500, verbose_name='Backdrop URL')),
+                ('oyuncu_listesi', models.JSONField(blank=True, default=list, verbose_name='Oyuncular')),
+                ('fragman_url', models.CharField(blank=True, default='', max_length=500, verbose_name='Fragman Embed URL')),
+                ('guncellenme_tarihi', models.DateTimeField(verbose_name='Son Tazeleme')),
+                ('film', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tmdb_detay', to='filmler.film')),
+            ],
+            options={
+                'verbose_name': 'TMDB Detay',
+                'verbose_name_plural': 'TMDB Detayları',
+            },
+        ),
+    ]
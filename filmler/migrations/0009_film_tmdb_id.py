@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:15
+
+from django.db import migrations, models
+
+
+def tmdb_id_doldur(apps, schema_editor):
+    # En iyi çaba: TMDB detay önbelleğinde (0008) eşleşmesi olan filmlere id'yi taşı.
+    # 0008 ile aynı anda uygulanan kurulumlarda tablo boştur ve hiçbir şey doldurulmaz;
+    # tmdb_id'siz filmler film_cek'in ilk çalışmasında isimle (büyük/küçük harf duyarsız) sahiplenilir.
+    Film = apps.get_model("filmler", "Film")
+    TmdbDetay = apps.get_model("filmler", "TmdbDetay")
+    eslesmeler = (
+        TmdbDetay.objects.filter(film__isnull=False, tmdb_id__isnull=False)
+        .values_list("film_id", "tmdb_id")
+    )
+    filmler = [Film(id=film_id, tmdb_id=tmdb_id) for film_id, tmdb_id in eslesmeler]
+    Film.objects.bulk_update(filmler, ["tmdb_id"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filmler', '0008_tmdbdetay'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='film',
+            name='tmdb_id',
+            field=models.PositiveIntegerField(blank=True, null=True, unique=True, verbose_name='TMDB ID'),
+        ),
+        migrations.RunPython(tmdb_id_doldur, migrations.RunPython.noop),
+    ]
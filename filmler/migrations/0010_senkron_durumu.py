@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filmler', '0009_film_tmdb_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SenkronDurumu',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('anahtar', models.CharField(max_length=50, unique=True)),
+                ('deger', models.CharField(blank=True, default='', max_length=100)),
+                ('guncellenme_tarihi', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Senkron Durumu',
+                'verbose_name_plural': 'Senkron Durumları',
+            },
+        ),
+        migrations.AddField(
+            model_name='film',
+            name='icerik_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=40),
+        ),
+    ]
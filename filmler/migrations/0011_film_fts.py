@@ -0,0 +1,59 @@
+from django.db import migrations, transaction
+from django.db.utils import OperationalError
+
+# Migration kendi içinde sabit: search_service sonradan değişse de aynı şekilde tekrar oynar
+FTS_TABLE = "filmler_film_fts"
+FTS_COLUMNS = ("isim", "oyuncular", "turler", "konu")
+_KATLAMA = str.maketrans({"ı": "i", "ş": "s", "ğ": "g", "ü": "u", "ö": "o", "ç": "c", "â": "a", "î": "i", "û": "u"})
+
+
+def turkce_katla(metin):
+    if not metin:
+        return ""
+    metin = metin.replace("İ", "i").replace("I", "ı").lower()
+    return metin.replace("\u0307", "").translate(_KATLAMA)
+
+
+def fts_olustur(apps, schema_editor):
+    # Sadece SQLite (FTS5); diğer veritabanlarında arama icontains'e düşer
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                f"{', '.join(FTS_COLUMNS)}, "
+                "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            )
+    except OperationalError:
+        # SQLite FTS5 olmadan derlenmiş: indeks yok, arama yine çalışır
+        return
+
+    Film = apps.get_model("filmler", "Film")
+    satirlar = [
+        [f["id"], *(turkce_katla(f[alan]) for alan in FTS_COLUMNS)]
+        for f in Film.objects.values("id", *FTS_COLUMNS)
+    ]
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE}(rowid, {', '.join(FTS_COLUMNS)}) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            satirlar,
+        )
+
+
+def fts_kaldir(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filmler', '0010_senkron_durumu'),
+    ]
+
+    operations = [
+        migrations.RunPython(fts_olustur, fts_kaldir),
+    ]
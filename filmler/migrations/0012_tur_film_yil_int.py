@@ -0,0 +1,83 @@
+import re
+
+from django.db import migrations, models
+
+
+def verileri_donustur(apps, schema_editor):
+    # yil (metin) -> yil_sayi (int), turler ("Aksiyon, Dram") -> Tur + M2M
+    Film = apps.get_model("filmler", "Film")
+    Tur = apps.get_model("filmler", "Tur")
+    Baglanti = Film.kategoriler.through
+
+    turler = {}
+    baglantilar = []
+    filmler = []
+    for film in Film.objects.only("id", "yil", "turler").iterator(chunk_size=1000):
+        m = re.search(r"\d{4}", film.yil or "")
+        film.yil_sayi = int(m.group()) if m else None
+        filmler.append(film)
+        for isim in {t.strip() for t in (film.turler or "").split(",") if t.strip()}:
+            tur = turler.get(isim)
+            if tur is None:
+                tur, _ = Tur.objects.get_or_create(isim=isim[:50])
+                turler[isim] = tur
+            baglantilar.append(Baglanti(film_id=film.id, tur_id=tur.id))
+
+    Film.objects.bulk_update(filmler, ["yil_sayi"], batch_size=500)
+    Baglanti.objects.bulk_create(baglantilar, batch_size=500, ignore_conflicts=True)
+
+
+def verileri_geri_al(apps, schema_editor):
+    Film = apps.get_model("filmler", "Film")
+    filmler = list(Film.objects.only("id", "yil_sayi"))
+    for film in filmler:
+        film.yil = str(film.yil_sayi) if film.yil_sayi else None
+    Film.objects.bulk_update(filmler, ["yil"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filmler', '0011_film_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tur',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tmdb_id', models.PositiveIntegerField(blank=True, null=True, unique=True, verbose_name='TMDB ID')),
+                ('isim', models.CharField(max_length=50, unique=True, verbose_name='Tür')),
+            ],
+            options={
+                'verbose_name': 'Tür',
+                'verbose_name_plural': 'Türler',
+                'ordering': ['isim'],
+            },
+        ),
+        migrations.AddField(
+            model_name='film',
+            name='kategoriler',
+            field=models.ManyToManyField(blank=True, related_name='filmler', to='filmler.tur', verbose_name='Türler'),
+        ),
+        migrations.AddField(
+            model_name='film',
+            name='yil_sayi',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(verileri_donustur, verileri_geri_al),
+        migrations.RemoveField(
+            model_name='film',
+            name='yil',
+        ),
+        migrations.RenameField(
+            model_name='film',
+            old_name='yil_sayi',
+            new_name='yil',
+        ),
+        migrations.AlterField(
+            model_name='film',
+            name='yil',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, null=True, verbose_name='Yapım Yılı'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filmler', '0012_tur_film_yil_int'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='film',
+            index=models.Index(models.OrderBy(models.F('puan'), descending=True), models.F('id'), name='film_puan_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='film',
+            index=models.Index(models.OrderBy(models.F('yil'), descending=True), models.OrderBy(models.F('id'), descending=True), name='film_yil_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='yorum',
+            index=models.Index(models.F('film'), models.OrderBy(models.F('tarih'), descending=True), models.F('id'), name='yorum_film_tarih_idx'),
+        ),
+    ]
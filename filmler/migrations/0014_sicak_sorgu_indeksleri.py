@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('filmler', '0013_keyset_indeksleri'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='film',
+            index=models.Index(models.OrderBy(models.F('eklenme_tarihi'), descending=True), name='film_eklenme_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='film',
+            index=models.Index(condition=models.Q(('fragman_url__gt', '')), fields=['puan'], name='film_hero_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='yorum',
+            index=models.Index(fields=['film', 'ai_karari'], name='yorum_film_karar_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='yorum',
+            index=models.Index(models.OrderBy(models.F('tarih'), descending=True), name='yorum_tarih_idx'),
+        ),
+    ]
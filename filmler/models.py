@@ -1,15 +1,34 @@
 from django.db import models
+from django.db.models import F, Q
+
+
+class Tur(models.Model):
+    """Film türü (TMDB genre). Film.kategoriler üzerinden indeksli filtreleme için."""
+
+    tmdb_id = models.PositiveIntegerField(unique=True, blank=True, null=True, verbose_name="TMDB ID")
+    isim = models.CharField(max_length=50, unique=True, verbose_name="Tür")
+
+    class Meta:
+        verbose_name = "Tür"
+        verbose_name_plural = "Türler"
+        ordering = ["isim"]
+
+    def __str__(self):
+        return self.isim
 
 
 class Film(models.Model):
     """Veritabanındaki film kayıtları."""
 
+    tmdb_id = models.PositiveIntegerField(unique=True, blank=True, null=True, verbose_name="TMDB ID")
     isim = models.CharField(max_length=200, verbose_name="Film Adı")
     konu = models.TextField(verbose_name="Özet / Konu", blank=True, null=True)
-    yil = models.CharField(max_length=10, blank=True, null=True, verbose_name="Yapım Yılı")
+    yil = models.PositiveSmallIntegerField(blank=True, null=True, db_index=True, verbose_name="Yapım Yılı")
     puan = models.FloatField(default=0.0, verbose_name="IMDb Puanı")
     oyuncular = models.CharField(max_length=500, blank=True, default="Bilgi Yok", verbose_name="Oyuncular")
+    # Gösterim/arama için virgüllü metin; filtreleme kategoriler (M2M) üzerinden
     turler = models.CharField(max_length=250, blank=True, default="", verbose_name="Kategoriler")
+    kategoriler = models.ManyToManyField(Tur, related_name="filmler", blank=True, verbose_name="Türler")
     poster_url = models.CharField(
         max_length=500, blank=True, null=True,
         default="https://via.placeholder.com/300x450",
@@ -17,11 +36,28 @@ class Film(models.Model):
     )
     fragman_url = models.CharField(max_length=500, blank=True, null=True, verbose_name="Fragman URL")
     eklenme_tarihi = models.DateTimeField(auto_now_add=True)
+    # film_cek: son yazılan TMDB içeriğinin özeti; aynıysa kayıt yeniden yazılmaz
+    icerik_hash = models.CharField(max_length=40, blank=True, default="", editable=False)
+
+    # --- YORUM SAYAÇLARI (stats_service F() ile günceller, yorum_sayaclari komutu yeniden kurar) ---
+    yorum_sayisi = models.PositiveIntegerField(default=0, verbose_name="Yorum Sayısı")
+    olumlu_sayisi = models.PositiveIntegerField(default=0, verbose_name="Olumlu Yorum")
+    olumsuz_sayisi = models.PositiveIntegerField(default=0, verbose_name="Olumsuz Yorum")
+    notr_sayisi = models.PositiveIntegerField(default=0, verbose_name="Nötr Yorum")
 
     class Meta:
         verbose_name = "Film"
         verbose_name_plural = "Filmler"
         ordering = ["-eklenme_tarihi"]
+        indexes = [
+            # Grid keyset sayfalaması: (-puan, id) ve (-yil, -id)
+            models.Index(F("puan").desc(), "id", name="film_puan_id_idx"),
+            models.Index(F("yil").desc(), F("id").desc(), name="film_yil_id_idx"),
+            # Varsayılan sıralama (admin listesi, Film.objects)
+            models.Index(F("eklenme_tarihi").desc(), name="film_eklenme_idx"),
+            # Dashboard hero havuzu: fragmanlı filmler, puana göre (kısmi indeks)
+            models.Index(fields=["puan"], condition=Q(fragman_url__gt=""), name="film_hero_idx"),
+        ]
 
     def __str__(self):
         return self.isim
@@ -40,10 +76,37 @@ class Yorum(models.Model):
     ai_guveni = models.FloatField(default=0.0, verbose_name="Güven Skoru")
     ai_kaynak = models.CharField(max_length=30, blank=True, null=True, verbose_name="AI Kaynak Model")
 
+    # --- ANALİZ KUYRUĞU ---
+    # Yorum hemen kaydedilir; duygu analizini arka plan worker'ı (analysis_queue) yapar.
+    DURUM_BEKLIYOR = "bekliyor"
+    DURUM_ISLENIYOR = "isleniyor"
+    DURUM_TAMAM = "tamam"
+    DURUM_HATA = "hata"
+    DURUM_SECENEKLERI = [
+        (DURUM_BEKLIYOR, "Analiz Bekliyor"),
+        (DURUM_ISLENIYOR, "Analiz Ediliyor"),
+        (DURUM_TAMAM, "Analiz Edildi"),
+        (DURUM_HATA, "Analiz Başarısız"),
+    ]
+    ai_durum = models.CharField(
+        max_length=10, choices=DURUM_SECENEKLERI, default=DURUM_BEKLIYOR,
+        db_index=True, verbose_name="AI Durumu",
+    )
+    ai_deneme = models.PositiveSmallIntegerField(default=0, verbose_name="Analiz Denemesi")
+    ai_kilit_zamani = models.DateTimeField(blank=True, null=True, verbose_name="Worker Kilit Zamanı")
+
     class Meta:
         verbose_name = "Yorum"
         verbose_name_plural = "Yorumlar"
         ordering = ["-tarih"]
+        indexes = [
+            # Detay sayfası yorum listesi: film + (-tarih, id) keyset
+            models.Index("film", F("tarih").desc(), "id", name="yorum_film_tarih_idx"),
+            # Sayaç yeniden kurulumu (film başına karar dağılımı) ve admin filtresi
+            models.Index(fields=["film", "ai_karari"], name="yorum_film_karar_idx"),
+            # Admin listesi / varsayılan sıralama
+            models.Index(F("tarih").desc(), name="yorum_tarih_idx"),
+        ]
 
     def __str__(self):
         return f"{self.kullanici_adi} - {self.film.isim}"
@@ -52,4 +115,58 @@ class Yorum(models.Model):
     def sent_key(self):
         """Template'teki filtreleme için kısa duygu anahtarı döndürür."""
         mapping = {"OLUMLU": "pos", "OLUMSUZ": "neg", "NÖTR": "neu"}
-        return mapping.get(self.ai_karari, "neu")
\ No newline at end of file
+        return mapping.get(self.ai_karari, "neu")
+
+    @property
+    def analiz_bekliyor(self):
+        """Sonuç henüz yazılmadıysa True (template'te 'Analiz ediliyor' rozeti için)."""
+        return self.ai_durum in (self.DURUM_BEKLIYOR, self.DURUM_ISLENIYOR)
+
+class TmdbDetay(models.Model):
+    """
+    TMDB detay önbelleği (süre, türler, backdrop, oyuncular, fragman).
+    Detay sayfası bu tablodan okur; tazeleme tmdb_service tarafından arka planda yapılır.
+    """
+
+    tmdb_id = models.PositiveIntegerField(unique=True, blank=True, null=True, verbose_name="TMDB ID")
+    film = models.OneToOneField(
+        Film, on_delete=models.CASCADE, related_name="tmdb_detay", blank=True, null=True,
+    )
+    bulundu = models.BooleanField(default=True, verbose_name="TMDB'de Bulundu")
+    sure_dk = models.PositiveIntegerField(blank=True, null=True, verbose_name="Süre (dk)")
+    turler = models.CharField(max_length=250, blank=True, default="", verbose_name="Türler")
+    backdrop_url = models.CharField(max_length=500, blank=True, default="", verbose_name="Backdrop URL")
+    oyuncu_listesi = models.JSONField(default=list, blank=True, verbose_name="Oyuncular")
+    fragman_url = models.CharField(max_length=500, blank=True, default="", verbose_name="Fragman Embed URL")
+    guncellenme_tarihi = models.DateTimeField(verbose_name="Son Tazeleme")
+
+    class Meta:
+        verbose_name = "TMDB Detay"
+        verbose_name_plural = "TMDB Detayları"
+
+    def __str__(self):
+        return f"TMDB {self.tmdb_id} ({self.film})"
+
+
+class SenkronDurumu(models.Model):
+    """Senkronizasyon işlerinin kalıcı durumu (örn. TMDB değişiklik akışının son tarihi)."""
+
+    anahtar = models.CharField(max_length=50, unique=True)
+    deger = models.CharField(max_length=100, blank=True, default="")
+    guncellenme_tarihi = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Senkron Durumu"
+        verbose_name_plural = "Senkron Durumları"
+
+    def __str__(self):
+        return f"{self.anahtar}={self.deger}"
+
+    @classmethod
+    def oku(cls, anahtar, varsayilan=None):
+        deger = cls.objects.filter(anahtar=anahtar).values_list("deger", flat=True).first()
+        return deger if deger is not None else varsayilan
+
+    @classmethod
+    def yaz(cls, anahtar, deger):
+        cls.objects.update_or_create(anahtar=anahtar, defaults={"deger": str(deger)})
@@ -0,0 +1,205 @@
+"""
+Yorum duygu analizi için veritabanı tabanlı iş kuyruğu.
+
+- View yorumu 'bekliyor' durumunda kaydeder ve notify() ile worker'ı uyandırır.
+- Worker (web süreci içindeki daemon thread veya `manage.py analiz_worker`)
+  kuyruğu batch halinde sahiplenir (koşullu UPDATE) ve analyze_comments_batch ile
+  tek seferde analiz eder.
+- Sahiplenme 'isleniyor' + ai_kilit_zamani ile yapılır; süre (lease) dolan işler
+  worker çökmüş sayılıp tekrar alınır. Birden fazla worker aynı anda güvenle çalışabilir.
+"""
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from filmler.models import Yorum
+from .sentiment_service import analyze_comments_batch
+from . import stats_service
+
+logger = logging.getLogger(__name__)
+
+# Bu kaynaklarla dönen sonuçlar geçici hata sayılır (servis kapalı/meşgul); iş tekrar denenir
+RETRY_SOURCES = {"api_error", "api_busy", "exception"}
+# Devre açıkken kurallar karar veremedi: servise hiç gidilmedi, deneme hakkı harcanmadan ertelenir
+DEFER_SOURCES = {"circuit_open"}
+
+_wakeup = threading.Event()
+_worker_thread = None
+_worker_lock = threading.Lock()
+
+
+def notify():
+    """Worker'ı uyandırır (transaction commit olduktan sonra)."""
+    transaction.on_commit(_wakeup.set)
+
+
+def _claimable_q(now):
+    lease = timedelta(seconds=getattr(settings, "AI_QUEUE_LEASE_SN", 300))
+    return Q(ai_durum=Yorum.DURUM_BEKLIYOR) | Q(
+        ai_durum=Yorum.DURUM_ISLENIYOR, ai_kilit_zamani__lt=now - lease
+    )
+
+
+def claim_batch(limit, exclude_ids=()):
+    """
+    En eski `limit` işi sahiplenir. Her satır koşullu UPDATE ile alınır:
+    başka bir worker araya girdiyse update 0 döner ve satır atlanır.
+    """
+    now = timezone.now()
+    aday_ids = list(
+        Yorum.objects.filter(_claimable_q(now))
+        .exclude(id__in=exclude_ids)
+        .order_by("id")
+        .values_list("id", flat=True)[:limit]
+    )
+    claimed = []
+    for yorum_id in aday_ids:
+        updated = Yorum.objects.filter(_claimable_q(now), id=yorum_id).update(
+            ai_durum=Yorum.DURUM_ISLENIYOR,
+            ai_kilit_zamani=now,
+            ai_deneme=F("ai_deneme") + 1,
+        )
+        if updated:
+            claimed.append(yorum_id)
+    if not claimed:
+        return []
+    return list(Yorum.objects.filter(id__in=claimed).order_by("id"))
+
+
+def _sahipli(yorum):
+    """
+    Satırı yalnızca bu worker'ın kirası hâlâ geçerliyse seçer. Kira dolup başka worker
+    sahiplendiyse, yorum kuyruğa geri alındıysa ya da silindiyse update 0 döner.
+    """
+    return Yorum.objects.filter(
+        id=yorum.id, ai_durum=Yorum.DURUM_ISLENIYOR, ai_kilit_zamani=yorum.ai_kilit_zamani,
+    )
+
+
+def _finish(yorum, sonuc):
+    """Sonucu yazar; sayaçlar yalnızca satır gerçekten güncellendiyse değişir. Dönüş: yazıldı mı."""
+    with transaction.atomic():
+        yazildi = _sahipli(yorum).update(
+            ai_karari=sonuc["decision"],
+            ai_guveni=sonuc["confidence"],
+            ai_kaynak=sonuc["source"],
+            ai_durum=Yorum.DURUM_TAMAM,
+            ai_kilit_zamani=None,
+        )
+        if yazildi:
+            stats_service.karar_degisti(yorum.film_id, yorum.ai_karari, sonuc["decision"])
+    if not yazildi:
+        logger.warning("Yorum %s sonucu yazılmadı: kira kaybedildi veya yorum silindi", yorum.id)
+    return bool(yazildi)
+
+
+def _fail(yorum, reason):
+    """Deneme hakkı kaldıysa kuyruğa geri koyar, yoksa NÖTR + 'hata' olarak kapatır."""
+    max_deneme = getattr(settings, "AI_QUEUE_MAX_ATTEMPTS", 3)
+    if yorum.ai_deneme >= max_deneme:
+        logger.error("Yorum %s analizi %d denemede başarısız: %s", yorum.id, yorum.ai_deneme, reason)
+        with transaction.atomic():
+            yazildi = _sahipli(yorum).update(
+                ai_durum=Yorum.DURUM_HATA,
+                ai_karari="NÖTR",
+                ai_guveni=0.0,
+                ai_kaynak=reason[:30],
+                ai_kilit_zamani=None,
+            )
+            if yazildi:
+                stats_service.karar_degisti(yorum.film_id, yorum.ai_karari, "NÖTR")
+    else:
+        _sahipli(yorum).update(ai_durum=Yorum.DURUM_BEKLIYOR, ai_kilit_zamani=None)
+
+
+def _defer(yorum):
+    """Deneme sayılmadan kuyruğa geri koyar (claim_batch'in artırdığı deneme geri alınır)."""
+    _sahipli(yorum).update(
+        ai_durum=Yorum.DURUM_BEKLIYOR, ai_kilit_zamani=None, ai_deneme=F("ai_deneme") - 1,
+    )
+
+
+def _sonucu_yaz(yorum, sonuc):
+    if sonuc["source"] in DEFER_SOURCES:
+        _defer(yorum)
+    elif sonuc["source"] in RETRY_SOURCES:
+        _fail(yorum, sonuc["source"])
+    else:
+        return _finish(yorum, sonuc)
+    return False
+
+
+def process_batch(yorumlar):
+    """
+    Sahiplenilmiş yorumları tek batch'te analiz eder ve sonuçları yazar.
+    Yazma satır satır korunur: bir satırdaki hata batch'in kalanını düşürmez
+    (o satırın kirası dolunca tekrar alınır).
+    """
+    try:
+        sonuclar = analyze_comments_batch([y.icerik for y in yorumlar])
+    except Exception as e:
+        logger.exception("Batch analiz hatası: %s", e)
+        sonuclar = [{"source": "exception"}] * len(yorumlar)
+
+    done = 0
+    for y, sonuc in zip(yorumlar, sonuclar):
+        try:
+            done += _sonucu_yaz(y, sonuc)
+        except Exception as e:
+            logger.exception("Yorum %s sonucu yazılamadı: %s", y.id, e)
+    return done
+
+
+def drain_once(batch_size=None):
+    """
+    Kuyruk boşalana kadar batch'ler işler. Dönüş: tamamlanan yorum sayısı.
+    Bu turda başarısız olup kuyruğa dönen yorumlar aynı turda tekrar alınmaz
+    (servis kapalıyken deneme hakları hemen tükenmesin; sonraki poll'da denenir).
+    """
+    batch_size = batch_size or getattr(settings, "AI_QUEUE_BATCH_SIZE", 16)
+    total = 0
+    denenen = set()
+    while True:
+        yorumlar = claim_batch(batch_size, exclude_ids=denenen)
+        if not yorumlar:
+            return total
+        denenen.update(y.id for y in yorumlar)
+        total += process_batch(yorumlar)
+
+
+def pending_count():
+    return Yorum.objects.filter(_claimable_q(timezone.now())).count()
+
+
+def run_worker(stop_event=None, poll_sn=None, batch_size=None):
+    """Worker döngüsü: kuyruğu boşalt, sonra uyandırılana (veya poll süresine) kadar bekle."""
+    poll_sn = poll_sn if poll_sn is not None else getattr(settings, "AI_QUEUE_POLL_SN", 5.0)
+    stop_event = stop_event or threading.Event()
+    logger.info("Analiz kuyruğu worker'ı başladı (poll=%.1fs)", poll_sn)
+    while not stop_event.is_set():
+        _wakeup.clear()
+        try:
+            n = drain_once(batch_size)
+            if n:
+                logger.info("Analiz kuyruğu: %d yorum işlendi", n)
+        except Exception as e:
+            logger.exception("Analiz kuyruğu worker hatası: %s", e)
+        finally:
+            close_old_connections()
+        _wakeup.wait(poll_sn)
+
+
+def start_background_worker():
+    """Web süreci içinde tek bir daemon worker thread başlatır (idempotent)."""
+    global _worker_thread
+    with _worker_lock:
+        if _worker_thread is not None and _worker_thread.is_alive():
+            return _worker_thread
+        _worker_thread = threading.Thread(target=run_worker, name="analiz-kuyrugu", daemon=True)
+        _worker_thread.start()
+        return _worker_thread
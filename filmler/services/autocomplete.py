@@ -0,0 +1,213 @@
+"""
+Navbar canlı araması (live_search) için süreç içi otomatik tamamlama indeksi.
+
+- Anahtarlar: Türkçe katlanmış film adının her kelimeden başlayan son ekleri
+  ("the matrix" -> "the matrix", "matrix"), sıralı dizi + bisect ile önek araması.
+- Yazım hatası toleransı: önekle yeterli sonuç yoksa terimin 1 düzenleme
+  uzaklığındaki varyantları (silme/değiştirme/ekleme/yer değiştirme) denenir.
+- Sıralama: tam önek eşleşmeleri önce, her grup kendi içinde puana göre.
+  1-2 harflik önekler kurulumda hazırlanır, diğer sorgular indeks başına hafızaya alınır.
+- Tazeleme: Film değişiklikleri ortak cache'teki sürümü artırır ve değişen id'leri
+  sürüm günlüğüne yazar. Her worker istekte sürümü karşılaştırır; günlük
+  tamsa sadece değişen filmleri yeniden okur, değilse indeksi baştan kurar.
+"""
+import heapq
+import logging
+import random
+import threading
+from bisect import bisect_left
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from .search_service import _KELIME, turkce_katla
+
+logger = logging.getLogger(__name__)
+
+SURUM_KEY = "autocomplete:surum"
+GUNLUK_KEY = "autocomplete:gunluk:{}"
+GUNLUK_TTL = 3600
+# Bu kadar sürüm gerideyse günlük yerine baştan kur
+MAX_GUNLUK_ADIMI = 50
+# Kısa öneklerde puan sıralaması için taranacak en fazla anahtar
+MAX_TARAMA = 2000
+MIN_FUZZY_UZUNLUK = 4
+# Bu uzunluğa kadar önekler için sonuçlar indeks kurulurken hazırlanır
+KISA_ONEK = 2
+MAX_LIMIT = 20
+MEMO_BOYUTU = 10000
+
+_lock = threading.Lock()
+_index = None
+
+
+def _anahtarlar(isim):
+    kelimeler = _KELIME.findall(turkce_katla(isim))
+    return {" ".join(kelimeler[i:]) for i in range(len(kelimeler))}
+
+
+def _normalize(term):
+    return " ".join(_KELIME.findall(turkce_katla(term)))
+
+
+def _payload(film):
+    return {
+        "id": film["id"],
+        "isim": film["isim"],
+        "poster": film["poster_url"],
+        "yil": film["yil"],
+        "puan": film["puan"],
+    }
+
+
+class _Index:
+    """Değişmez indeks; güncelleme yeni nesne kurup referansı değiştirir."""
+
+    __slots__ = ("filmler", "keys", "ids", "alfabe", "kisa", "memo", "surum")
+
+    def __init__(self, filmler, surum):
+        self.filmler = filmler
+        pairs = sorted((key, fid) for fid, f in filmler.items() for key in _anahtarlar(f["isim"]))
+        self.keys = [k for k, _ in pairs]
+        self.ids = [i for _, i in pairs]
+        self.alfabe = sorted({c for k in self.keys for c in k})
+        self.surum = surum
+        # Kısa önekler (en çok eşleşme bunlarda) için hazır puan sıralı listeler
+        kisa = {}
+        for key, fid in pairs:
+            for n in range(1, KISA_ONEK + 1):
+                if len(key) >= n:
+                    kisa.setdefault(key[:n], set()).add(fid)
+        self.kisa = {p: heapq.nlargest(MAX_LIMIT, ids, key=self._puan) for p, ids in kisa.items()}
+        # Sorgu sonucu hafızası (aynı tuşlamalar tekrar tekrar gelir)
+        self.memo = {}
+
+    def _puan(self, fid):
+        return self.filmler[fid]["puan"] or 0
+
+    def _onek(self, p):
+        keys = self.keys
+        lo = bisect_left(keys, p)
+        if lo == len(keys) or not keys[lo].startswith(p):
+            return ()
+        hi = bisect_left(keys, p + "\uffff", lo)
+        return self.ids[lo:min(hi, lo + MAX_TARAMA)]
+
+    def _varyantlar(self, p):
+        # Sona ekleme ve son harfi değiştirme, son harfi silmenin (p[:-1]) alt kümesi: atlanır
+        out = {p[:-1]}
+        for i in range(len(p) - 1):
+            out.add(p[:i] + p[i + 1:])
+            out.add(p[:i] + p[i + 1] + p[i] + p[i + 2:])
+            for c in self.alfabe:
+                out.add(p[:i] + c + p[i:])
+                out.add(p[:i] + c + p[i + 1:])
+        out.discard(p)
+        out.discard("")
+        return out
+
+    def _ara(self, p, limit):
+        if len(p) <= KISA_ONEK:
+            return self.kisa.get(p, [])[:limit]
+        tam = set(self._onek(p))
+        sonuc = heapq.nlargest(limit, tam, key=self._puan)
+        if len(sonuc) < limit and len(p) >= MIN_FUZZY_UZUNLUK:
+            yakin = set()
+            for v in self._varyantlar(p):
+                yakin.update(self._onek(v))
+            sonuc += heapq.nlargest(limit - len(sonuc), yakin - tam, key=self._puan)
+        return sonuc
+
+    def ara(self, term, limit):
+        p = _normalize(term)
+        if not p:
+            return []
+        anahtar = (p, limit)
+        sonuc = self.memo.get(anahtar)
+        if sonuc is None:
+            sonuc = [self.filmler[fid] for fid in self._ara(p, min(limit, MAX_LIMIT))]
+            if len(self.memo) >= MEMO_BOYUTU:
+                self.memo.clear()
+            self.memo[anahtar] = sonuc
+        return sonuc
+
+
+def _filmleri_oku(ids=None):
+    from filmler.models import Film
+
+    qs = Film.objects.all() if ids is None else Film.objects.filter(id__in=ids)
+    return {f["id"]: _payload(f) for f in qs.values("id", "isim", "poster_url", "yil", "puan")}
+
+
+def mevcut_surum():
+    """Ortak (cache) indeks sürümü; HTTP ETag için de kullanılır."""
+    surum = cache.get(SURUM_KEY)
+    if surum is None:
+        # Cache boşaldıysa rastgele başla: eski sürümdeki worker'lar baştan kurar
+        cache.add(SURUM_KEY, random.randint(1, 2 ** 31), None)
+        surum = cache.get(SURUM_KEY)
+    return surum
+
+
+def _guncel_indeks():
+    global _index
+    surum = mevcut_surum()
+    index = _index
+    if index is not None and index.surum == surum:
+        return index
+
+    with _lock:
+        index = _index
+        if index is not None and index.surum == surum:
+            return index
+
+        degisen = None
+        if index is not None and 0 < surum - index.surum <= MAX_GUNLUK_ADIMI:
+            gunlukler = cache.get_many([GUNLUK_KEY.format(s) for s in range(index.surum + 1, surum + 1)])
+            if len(gunlukler) == surum - index.surum:
+                degisen = {fid for ids in gunlukler.values() for fid in ids}
+
+        if degisen is None:
+            index = _Index(_filmleri_oku(), surum)
+            logger.debug("Autocomplete indeksi kuruldu: %d film (sürüm %s)", len(index.filmler), surum)
+        else:
+            filmler = {fid: f for fid, f in index.filmler.items() if fid not in degisen}
+            filmler.update(_filmleri_oku(degisen))
+            index = _Index(filmler, surum)
+        _index = index
+        return index
+
+
+def ara(term, limit=10):
+    """Terim için en fazla `limit` film (live_search JSON şeması)."""
+    return _guncel_indeks().ara(term, limit)
+
+
+def _surum_artir(film_ids):
+    try:
+        yeni = cache.incr(SURUM_KEY)
+    except ValueError:
+        mevcut_surum()
+        yeni = cache.incr(SURUM_KEY)
+    cache.set(GUNLUK_KEY.format(yeni), list(film_ids), GUNLUK_TTL)
+
+
+def degisti(film_ids):
+    """
+    Film ekleme/güncelleme/silme bildirimi (signals.py).
+    Sürüm hemen ve commit sonrası tekrar artar: commit'ten önce indeksi kuran
+    worker, commit'le birlikte değişikliği yeniden okur.
+    """
+    film_ids = [i for i in film_ids if i is not None]
+    if not film_ids:
+        return
+    _surum_artir(film_ids)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _surum_artir(film_ids))
+
+
+def sifirla():
+    """Süreç içi indeksi bırakır (testler için); sonraki istekte baştan kurulur."""
+    global _index
+    with _lock:
+        _index = None
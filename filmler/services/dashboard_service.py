@@ -0,0 +1,84 @@
+"""
+Ana sayfa (dashboard modu) bölümleri.
+
+Bölümler (hero havuzu, popüler, yeni eklenenler, tür satırları) tek seferde
+hesaplanıp cache'e yazılır; sadece kartların kullandığı alanlar tutulur.
+İstek başına iş: cache okuma + hero havuzundan rastgele 5 id + bu 5 filmin PK ile okunması.
+
+Geçersiz kılma: Film kaydı/silinmesi, tür (M2M) değişikliği ve toplu yazımlar
+(katalog_guncellendi) cache'i siler (filmler/signals.py). Silme yalnızca ortak cache'te
+(REDIS_URL) diğer süreçlere ulaşır: LocMem'de ayrı süreçte çalışan film_cek / tmdb_yenile
+web sürecinin kopyasını silemez, o süreç DASHBOARD_CACHE_TTL dolana kadar eski bölümleri gösterir.
+"""
+import random
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Q
+
+CACHE_KEY = "dashboard:bolumler"
+KART_ALANLARI = ("id", "isim", "poster_url", "puan", "yil", "turler")
+HERO_ALANLARI = KART_ALANLARI + ("konu",)
+# Post_save'de bu alanlardan biri değiştiyse dashboard bayatlar
+ILGILI_ALANLAR = {"isim", "poster_url", "puan", "yil", "turler", "konu", "fragman_url"}
+HERO_SAYISI = 5
+
+# (context anahtarı, Tur.isim)
+TUR_SATIRLARI = (("action", "Aksiyon"), ("comedy", "Komedi"), ("horror", "Korku"))
+
+
+def _hero_filtresi():
+    # Fragman var VE Puan > 6.5 (fragman_url > '' NULL'u da eler; film_hero_idx kısmi indeksinin koşulu)
+    return Q(fragman_url__gt="") & Q(puan__gt=6.5)
+
+
+def _hesapla():
+    from filmler.models import Film
+
+    kartlar = Film.objects.values(*KART_ALANLARI)
+    bolumler = {
+        # order_by(): Meta sıralaması olmadan kısmi indeks (film_hero_idx) kullanılır
+        "hero_ids": list(Film.objects.filter(_hero_filtresi()).order_by().values_list("id", flat=True)),
+        "popular": list(kartlar.order_by("-puan")[:15]),
+        "newest": list(kartlar.order_by("-id")[:15]),
+    }
+    for anahtar, tur in TUR_SATIRLARI:
+        bolumler[anahtar] = list(kartlar.filter(kategoriler__isim=tur)[:10])
+    return bolumler
+
+
+def bolumler():
+    """Cache'teki dashboard bölümleri (yoksa hesaplanır)."""
+    veri = cache.get(CACHE_KEY)
+    if veri is None:
+        veri = _hesapla()
+        cache.set(CACHE_KEY, veri, getattr(settings, "DASHBOARD_CACHE_TTL", 600))
+    return veri
+
+
+def hero_filmleri(hero_ids, adet=HERO_SAYISI):
+    """Havuzdan rastgele `adet` film (PK ile tek sorgu), HD poster URL'i eklenmiş."""
+    from filmler.models import Film
+
+    secilen = random.sample(hero_ids, min(len(hero_ids), adet))
+    if not secilen:
+        return []
+    filmler = {f["id"]: f for f in Film.objects.filter(id__in=secilen).values(*HERO_ALANLARI)}
+    sonuc = []
+    for film_id in secilen:
+        film = filmler.get(film_id)
+        if film is None:
+            continue
+        # HD Poster URL: /w500/, /w300/, etc. -> /original/
+        film["poster_url_hd"] = re.sub(r'/w\d+/', '/original/', film["poster_url"]) if film["poster_url"] else ""
+        sonuc.append(film)
+    return sonuc
+
+
+def gecersiz_kil():
+    """Dashboard cache'ini siler; transaction içindeyse commit sonrası tekrar siler."""
+    cache.delete(CACHE_KEY)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: cache.delete(CACHE_KEY))
@@ -1,3 +1,14 @@
+"""
+Yorum moderasyonu: küfür ve anlamsız metin (spam) tespiti.
+
+Motor (denetle) tek geçişte çalışır; tüm regex'ler import anında derlenir:
+- Metin bir kez küçük harfe çevrilir ve tek regex taramasıyla harf / boşluk /
+  diğer parçalarına ayrılır. Küfür kelimeleri ve anlamsızlık kuralları
+  için temizlenmiş metin aynı parçalardan çıkarılır.
+- Anlamsızlık kuralları (tekrar eden parça, ünsüz yığını, ünlüsüz kelime) tek
+  derlenmiş alternasyonla aranır; hangi kuralın tuttuğu grup adından okunur.
+kufur_kontrol / anlamsiz_mi eski imzalarıyla motorun üzerinde çalışır.
+"""
 import re
 
 # =============================================
@@ -17,11 +28,7 @@ KUFUR_LISTESI = {
 
 def kufur_kontrol(text: str) -> bool:
     """Metin küfür/argo içeriyorsa True döner."""
-    words = re.findall(r"[a-zA-ZçğıöşüÇĞİÖŞÜ]+", text.lower())
-    for word in words:
-        if word in KUFUR_LISTESI:
-            return True
-    return False
+    return not KUFUR_LISTESI.isdisjoint(_KELIME.findall(text.lower()))
 
 
 # Yaygın Türkçe kelimeler — gibberish tespiti için (sadece tek kelimelik yorumlarda kullanılır)
@@ -148,63 +155,95 @@ def anlamsiz_mi(text: str) -> bool:
     4. Rule B: >3 Harf ve HİÇ ÜNLÜ YOKSA -> SPAM
     5. Rule C: Kelime içi noktalama -> SPAM (s.a.l.a.k)
     """
-    # Orijinal metni koru (Rule C için)
-    # Temizlik (noktalama işaretlerini kaldır, sadece harf ve boşluk bırak)
-    # Ancak önce Rule C kontrolü yapmalıyız
-    
-    # Rule C: Punctuation Abuse (Kelime içi nokta/sembol)
-    # Örn: "s.a.l.a.k", "a.mk" (Harf.Harf)
-    if re.search(r'[a-zA-ZçğıöşüÇĞİÖŞÜ]\.[a-zA-ZçğıöşüÇĞİÖŞÜ]', text):
-        return True
-
-    # Temizlik
-    clean = re.sub(r"[^a-zA-ZçğıöşüÇĞİÖŞÜ ]", "", text.lower()).strip()
-    
-    if len(clean) < 2:
-        return True 
-
-    if clean in BLACKLIST:
-        return True
-
-    # 1. Expressive Lengthening Normalization
-    norm = re.sub(r'(.)\1{2,}', r'\1\1', clean)
-
-    # 2. Repetitive Substring Check (Klavye Ezme)
-    if re.search(r'(.{2,})\1{2,}', norm):
-        return True
-
-    words = norm.split()
-    unluler = set("aeıioöuü")
-    # Rule A Regex (Turkish Consonants 4+)
-    # [bcçdfgğhjklmnprsştvyz]
-    cons_cluster_re = re.compile(r'[bcçdfgğhjklmnprsştvyz]{4,}')
-
-    for w in words:
-        # Rule A: Consonant Clusters
-        if cons_cluster_re.search(w):
-            return True
-            
-        # Rule B: Vowel Absence (>3 chars)
-        if len(w) > 3 and not any(c in unluler for c in w):
-            return True
-
-    # 3. Space/Word Count Heuristic
-    if len(words) > 1:
-        avg_len = sum(len(w) for w in words) / len(words)
-        if avg_len < 15:
-            return False 
-
-    # 4. Tek Kelime Analizi (Strict)
-    if len(words) == 1:
-        w = words[0]
-        if len(w) <= 4:
-            if w not in TURKCE_SOZLUK and w not in BLACKLIST: 
-                return True
+    return denetle(text)["anlamsiz"]
+
+
+# =============================================
+# ⚙️ DERLENMİŞ MODERASYON MOTORU
+# =============================================
+_HARF = "a-zA-ZçğıöşüÇĞİÖŞÜ"
+_KELIME = re.compile(rf"[{_HARF}]+")
+# Tek tokenizasyon: harf dizileri, boşluk dizileri ve geri kalan her şey
+_PARCA = re.compile(rf"([{_HARF}]+)|( +)|[^{_HARF} ]+")
+# Rule C: orijinal metinde harf.harf (s.a.l.a.k)
+_NOKTALAMA = re.compile(rf"[{_HARF}]\.[{_HARF}]")
+# Uzatma normalizasyonu: "süperrrr" -> "süperr"
+_UZATMA = re.compile(r"(.)\1{2,}")
+# Temiz metin (sadece küçük harf + boşluk) üzerinde kelime kuralları, tek arama:
+# 4+ ünsüz | >3 harfli ünlüsüz kelime
+_ANLAMSIZ = re.compile(
+    r"(?P<unsuz>[bcçdfgğhjklmnprsştvyz]{4,})"
+    r"|(?P<unlusuz>(?<![^ ])[^aeıioöuü ]{4,}(?![^ ]))"
+)
+
+
+def _tekrar_var(s):
+    """
+    (.{2,})\\1{2,} ile aynı sonuç: en az 2 karakterlik bir parça art arda 3+ kez.
+    Regex her başlangıç/uzunluk çiftini geri izlemeyle dener (uzun metinde yavaş);
+    burada sadece aynı ikilinin (bigram) eşit aralıklı 3 tekrarı aday olarak doğrulanır.
+    """
+    n = len(s)
+    if n < 6:
         return False
-        
+    konumlar = {}
+    for i in range(n - 1):
+        konumlar.setdefault(s[i:i + 2], []).append(i)
+    for poz in konumlar.values():
+        if len(poz) < 3:
+            continue
+        kume = set(poz)
+        for j, a in enumerate(poz):
+            for b in poz[j + 1:]:
+                p = b - a
+                if p < 2:
+                    continue
+                if b + 2 * p > n:
+                    break
+                if b + p in kume and s[a:b] == s[b:b + p] == s[b + p:b + 2 * p]:
+                    return True
     return False
 
 
+def _sonuc(kufur, sebep):
+    return {"kufur": kufur, "anlamsiz": sebep is not None, "sebep": "kufur" if kufur else sebep}
+
+
+def _anlamsiz_sebebi(text, temiz):
+    if _NOKTALAMA.search(text):
+        return "noktalama"
+    if len(temiz) < 2:
+        return "kisa"
+    if temiz in BLACKLIST:
+        return "kara_liste"
+
+    norm = _UZATMA.sub(r"\1\1", temiz)
+    m = _ANLAMSIZ.search(norm)
+    if m:
+        return m.lastgroup
+    if _tekrar_var(norm):
+        return "tekrar"
+
+    # Tek kelime: kısa ve sözlükte yoksa spam (çok kelimede ortalama uzunluk
+    # 15'ten kısaysa geçerli; uzunsa ünsüz/ünlüsüz kurallarına zaten takılır)
+    if " " not in norm and len(norm) <= 4 and norm not in TURKCE_SOZLUK and norm not in BLACKLIST:
+        return "tek_kelime"
+    return None
+
+
+def denetle(text: str) -> dict:
+    """
+    Tek geçişte moderasyon kararı:
+    {"kufur": bool, "anlamsiz": bool, "sebep": "kufur" | anlamsızlık kuralı | None}
+    """
+    # (harf, boşluk) çiftleri; diğer parçalar ("", "")
+    parcalar = _PARCA.findall(text.lower())
+    kufur = not KUFUR_LISTESI.isdisjoint([harf for harf, _ in parcalar])
+    # Harf olmayanlar atılınca bitişen harf dizileri birleşir ("a.mk" -> "amk")
+    temiz = "".join(harf or bosluk for harf, bosluk in parcalar).strip(" ")
+    return _sonuc(kufur, _anlamsiz_sebebi(text, temiz))
+
+
 # --- TÜRKÇE KARAKTER DÜZELTİCİ ---
 def tr_lower(text):
     """Türkçe karakter sorununu (I-ı, İ-i, Ş-ş) çözen fonksiyon."""
@@ -0,0 +1,129 @@
+"""
+Keyset (imleç) sayfalama.
+
+OFFSET yerine son satırın sıralama değerlerinden devam edilir:
+    WHERE (puan < :p) OR (puan = :p AND id > :id) ORDER BY puan DESC, id ASC LIMIT n+1
+Her sayfa aynı maliyettedir (uygun bileşik indeksle), kaç sayfa ilerlendiği fark etmez.
+
+siralama: ("-puan", "id") gibi alan listesi; son alan tekil olmalı (id).
+null olabilen alanlarda NULL'lar her zaman sona dizilir.
+İmleç: son satırın değerleri, URL-güvenli base64 JSON.
+"""
+import base64
+import datetime
+import json
+
+from django.db.models import F, Q
+
+
+class GecersizImlec(ValueError):
+    pass
+
+
+def imlec_olustur(degerler):
+    ham = json.dumps(
+        [d.isoformat() if isinstance(d, (datetime.date, datetime.datetime)) else d for d in degerler],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(ham.encode()).decode().rstrip("=")
+
+
+def imlec_coz(imlec, uzunluk):
+    try:
+        ham = base64.urlsafe_b64decode(imlec + "=" * (-len(imlec) % 4))
+        degerler = json.loads(ham)
+    except (ValueError, TypeError) as e:
+        raise GecersizImlec(str(e)) from e
+    if not isinstance(degerler, list) or len(degerler) != uzunluk:
+        raise GecersizImlec("imleç uzunluğu uyuşmuyor")
+    return degerler
+
+
+def _alanlar(model, siralama):
+    out = []
+    for spec in siralama:
+        azalan = spec.startswith("-")
+        ad = spec.lstrip("-")
+        alan = model._meta.pk if ad == "pk" else model._meta.get_field(ad)
+        out.append((ad, azalan, alan.null))
+    return out
+
+
+def _esit(ad, nullable, deger):
+    if nullable and deger is None:
+        return Q(**{f"{ad}__isnull": True})
+    return Q(**{ad: deger})
+
+
+def _sonra(ad, azalan, nullable, deger):
+    if nullable and deger is None:
+        # NULL'lar en sonda: bu alanda NULL'dan sonra gelen yok
+        return None
+    kosul = Q(**{f"{ad}__lt" if azalan else f"{ad}__gt": deger})
+    if nullable:
+        kosul |= Q(**{f"{ad}__isnull": True})
+    return kosul
+
+
+def _sorgu(queryset, siralama, imlec):
+    """(sıralı/filtreli queryset, NULL kuyruğu sorgusu | None, alanlar)."""
+    alanlar = _alanlar(queryset.model, siralama)
+    order_by = [
+        (F(ad).desc(nulls_last=True) if azalan else F(ad).asc(nulls_last=True)) if nullable
+        else (f"-{ad}" if azalan else ad)
+        for ad, azalan, nullable in alanlar
+    ]
+    queryset = queryset.order_by(*order_by)
+
+    null_kuyrugu = None
+    if imlec:
+        degerler = imlec_coz(imlec, len(alanlar))
+        kosul = Q(pk__in=[])
+        for i, (ad, azalan, nullable) in enumerate(alanlar):
+            sonra = _sonra(ad, azalan, nullable, degerler[i])
+            if sonra is None:
+                continue
+            for j in range(i):
+                sonra &= _esit(alanlar[j][0], alanlar[j][2], degerler[j])
+            kosul |= sonra
+
+        ad, azalan, nullable = alanlar[0]
+        if len(alanlar) > 1 and degerler[0] is not None:
+            # İlk alan için gereksiz görünen sınır: SQLite OR'lu koşulda da indekste
+            # aralık araması (SEARCH ... (puan<?)) yapsın, baştan taramasın
+            kosul &= Q(**{f"{ad}__lte" if azalan else f"{ad}__gte": degerler[0]})
+            if nullable:
+                # "< v OR IS NULL" tek aralık değil: NULL'lar ayrı sorguyla sona eklenir
+                null_kuyrugu = queryset.filter(**{f"{ad}__isnull": True})
+        queryset = queryset.filter(kosul)
+    return queryset, null_kuyrugu, alanlar
+
+
+def _sayfa(satirlar, alanlar, boyut):
+    if len(satirlar) <= boyut:
+        return satirlar, None
+    satirlar = satirlar[:boyut]
+    son = satirlar[-1]
+    degerler = [son[ad] if isinstance(son, dict) else getattr(son, ad) for ad, _, _ in alanlar]
+    return satirlar, imlec_olustur(degerler)
+
+
+def keyset_sayfa(queryset, siralama, imlec=None, boyut=24):
+    """
+    (satırlar, sonraki_imleç) döner; son sayfada sonraki_imleç None.
+    Geçersiz imleçte GecersizImlec yükselir.
+    """
+    queryset, null_kuyrugu, alanlar = _sorgu(queryset, siralama, imlec)
+    satirlar = list(queryset[:boyut + 1])
+    if null_kuyrugu is not None and len(satirlar) <= boyut:
+        satirlar += list(null_kuyrugu[:boyut + 1 - len(satirlar)])
+    return _sayfa(satirlar, alanlar, boyut)
+
+
+async def akeyset_sayfa(queryset, siralama, imlec=None, boyut=24):
+    """keyset_sayfa'nın async ORM hali (ASGI view'ları)."""
+    queryset, null_kuyrugu, alanlar = _sorgu(queryset, siralama, imlec)
+    satirlar = [s async for s in queryset[:boyut + 1]]
+    if null_kuyrugu is not None and len(satirlar) <= boyut:
+        satirlar += [s async for s in null_kuyrugu[:boyut + 1 - len(satirlar)]]
+    return _sayfa(satirlar, alanlar, boyut)
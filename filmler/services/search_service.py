@@ -0,0 +1,155 @@
+"""
+Film arama (SQLite FTS5).
+
+- filmler_film_fts: isim, oyuncular, turler, konu üzerinde tam metin indeksi (rowid = Film.id).
+- Metin indekse ve sorguya aynı şekilde katlanarak girer: Türkçe küçük harf
+  (İ->i, I->ı) + aksan katlama (ı->i, ş->s, ğ->g, ü->u, ö->o, ç->c). "Işık", "ışık",
+  "ISIK" ve "isik" aynı terime düşer.
+- Her kelime önek sorgusudur ("matr" -> Matrix); sonuçlar bm25 ile sıralanır
+  (isim > oyuncular > türler > konu).
+- Senkron: Film post_save/post_delete sinyalleri + toplu yazımlar için
+  katalog_guncellendi sinyali (filmler/signals.py). Tam yeniden kurulum: arama_indeksi komutu.
+- FTS5 yoksa (başka veritabanı / derlenmemiş SQLite) icontains aramasına düşer.
+"""
+import logging
+import re
+
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, When
+from django.db.models.expressions import RawSQL
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "filmler_film_fts"
+FTS_COLUMNS = ("isim", "oyuncular", "turler", "konu")
+# bm25 sütun ağırlıkları (FTS_COLUMNS sırasıyla)
+FTS_WEIGHTS = (10.0, 4.0, 2.0, 1.0)
+# Alaka sıralı sonuç listesi üst sınırı (sırasız aramada sınır yok)
+MAX_SONUC = 500
+
+_KATLAMA = str.maketrans({"ı": "i", "ş": "s", "ğ": "g", "ü": "u", "ö": "o", "ç": "c", "â": "a", "î": "i", "û": "u"})
+_KELIME = re.compile(r"\w+")
+
+_fts_durum = {}
+
+
+def turkce_katla(metin):
+    """Türkçe büyük/küçük harf + aksan katlama (indeks ve sorgu için ortak)."""
+    if not metin:
+        return ""
+    metin = metin.replace("İ", "i").replace("I", "ı").lower()
+    # Ayrıştırılmış yazımdaki birleşik nokta (i + U+0307) da atılır
+    return metin.replace("\u0307", "").translate(_KATLAMA)
+
+
+def sorgu_ifadesi(q):
+    """Kullanıcı girdisi -> FTS5 MATCH ifadesi (her kelime önek, hepsi AND). Boşsa ''."""
+    kelimeler = _KELIME.findall(turkce_katla(q))
+    return " ".join(f'"{k}"*' for k in kelimeler)
+
+
+def fts_aktif():
+    """FTS tablosu bu veritabanında var mı? (bağlantı başına bir kez bakılır)"""
+    alias = connection.alias
+    if alias not in _fts_durum:
+        aktif = False
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=%s", [FTS_TABLE])
+                aktif = cursor.fetchone() is not None
+        _fts_durum[alias] = aktif
+    return _fts_durum[alias]
+
+
+def _satir(film):
+    return [film["id"], *(turkce_katla(film[alan]) for alan in FTS_COLUMNS)]
+
+
+def indeksle(film_ids):
+    """Verilen filmlerin indeks satırlarını yeniden yazar (silinmiş olanları kaldırır)."""
+    from filmler.models import Film
+
+    film_ids = [i for i in film_ids if i is not None]
+    if not film_ids or not fts_aktif():
+        return 0
+    satirlar = [_satir(f) for f in Film.objects.filter(id__in=film_ids).values("id", *FTS_COLUMNS)]
+    kolonlar = ", ".join(FTS_COLUMNS)
+    with connection.cursor() as cursor:
+        for i in range(0, len(film_ids), 500):
+            parca = film_ids[i:i + 500]
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({', '.join(['%s'] * len(parca))})", parca,
+            )
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE}(rowid, {kolonlar}) VALUES (%s, %s, %s, %s, %s)", satirlar,
+        )
+    return len(satirlar)
+
+
+def indeksten_sil(film_ids):
+    film_ids = list(film_ids)
+    if not film_ids or not fts_aktif():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({', '.join(['%s'] * len(film_ids))})", film_ids,
+        )
+
+
+def yeniden_kur():
+    """Tüm indeksi Film tablosundan baştan kurar. Yazılan satır sayısını döner."""
+    from filmler.models import Film
+
+    if not fts_aktif():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+    ids = list(Film.objects.values_list("id", flat=True))
+    toplam = 0
+    for i in range(0, len(ids), 1000):
+        toplam += indeksle(ids[i:i + 1000])
+    return toplam
+
+
+def eslesen_idler(q, limit=MAX_SONUC):
+    """Sorguya uyan film id'leri, en alakalıdan başlayarak. FTS yoksa None."""
+    ifade = sorgu_ifadesi(q)
+    if not ifade:
+        return []
+    if not fts_aktif():
+        return None
+    agirliklar = ", ".join(str(w) for w in FTS_WEIGHTS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+            f"ORDER BY bm25({FTS_TABLE}, {agirliklar}) LIMIT %s",
+            [ifade, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def ara(queryset, q, sirala=True):
+    """
+    queryset'i q'ya göre filtreler. sirala=True ise alaka sırasına dizer (en fazla MAX_SONUC),
+    False ise tüm eşleşmeler gelir ve queryset'in kendi sıralaması korunur.
+    """
+    if not fts_aktif():
+        # FTS yok: eski LIKE araması (yavaş ama doğru)
+        kosul = Q()
+        for alan in FTS_COLUMNS:
+            kosul |= Q(**{f"{alan}__icontains": q})
+        return queryset.filter(kosul)
+    if not sirala:
+        ifade = sorgu_ifadesi(q)
+        if not ifade:
+            return queryset.none()
+        # Sırasız: MATCH alt sorgusu, eşleşme sayısına sınır yok ve id listesi Python'a taşınmaz
+        return queryset.filter(
+            id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [ifade]),
+        )
+    ids = eslesen_idler(q)
+    queryset = queryset.filter(id__in=ids)
+    if ids:
+        sira = Case(*[When(id=film_id, then=i) for i, film_id in enumerate(ids)], output_field=IntegerField())
+        queryset = queryset.order_by(sira)
+    return queryset
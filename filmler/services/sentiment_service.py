@@ -4,13 +4,13 @@ from django.conf import settings
 # ✅# AI client (Django -> FastAPI)
 # Dosya yoksa oluştur: sinema_sitesi/ai_client.py
 try:
-    from sinema_sitesi.ai_client import analiz_yap
+    from sinema_sitesi.ai_client import analiz_yap, analiz_yap_async, analiz_yap_batch, analiz_yap_batch_async
 except ImportError:
-    analiz_yap = None
+    analiz_yap = analiz_yap_async = analiz_yap_batch = analiz_yap_batch_async = None
 except Exception as e:
     # ImportError dışında bir hata varsa (SyntaxError vb.) loglayalım ama servisi çökertmeyelim
     logging.getLogger(__name__).error(f"AI Client import hatası: {e}")
-    analiz_yap = None
+    analiz_yap = analiz_yap_async = analiz_yap_batch = analiz_yap_batch_async = None
 
 logger = logging.getLogger(__name__)
 
@@ -59,24 +59,72 @@ def analyze_comment(text: str):
         }
 
     # 3. Normalization
-    raw_karar = sonuc.get("karar", "NÖTR")
-    ai_karar = KARAR_NORMALIZE.get(raw_karar, "NÖTR")
-    ai_guven = float(sonuc.get("guven_skoru", 0.0))
-    ai_kaynak = sonuc.get("kaynak")
-    ai_sure = float(sonuc.get("sure_sn", 0.0))
+    sonuc = _normalize(sonuc)
+    logger.info("Sentiment Service: %s (%.4fs) [%s]", sonuc["decision"], sonuc["duration"], sonuc["source"])
+    return sonuc
 
-    # Log
-    logger.info("Sentiment Service: %s (%.4fs) [%s]", ai_karar, ai_sure, ai_kaynak)
 
-    # 4. Return
+def _normalize(sonuc):
+    """AI client sonucu ({karar, guven_skoru, kaynak, sure_sn}) -> DB formatı (decision, confidence, ...)."""
     return {
-        "decision": ai_karar,
-        "confidence": ai_guven,
-        "source": ai_kaynak,
-        "duration": ai_sure
+        "decision": KARAR_NORMALIZE.get(sonuc.get("karar", "NÖTR"), "NÖTR"),
+        "confidence": float(sonuc.get("guven_skoru", 0.0)),
+        "source": sonuc.get("kaynak"),
+        "duration": float(sonuc.get("sure_sn", 0.0)),
     }
 
 
+_GECERSIZ = {"decision": "NÖTR", "confidence": 0.0, "source": "invalid_input", "duration": 0.0}
+_API_HATASI = {"decision": "NÖTR", "confidence": 0.0, "source": "api_error", "duration": 0.0}
+
+
+def analyze_comments_batch(texts):
+    """
+    Birden çok yorumu tek seferde analiz eder (analysis_queue worker'ı, yeniden_analiz).
+    ai_client.analiz_yap_batch: direct mode'da tek ensemble_batch çağrısı, api mode'da /analiz/toplu.
+    Dönüş: analyze_comment ile aynı formatta sözlük listesi (texts ile aynı sırada).
+    Tüm batch 'error' dönerse RuntimeError (worker işleri tekrar kuyruğa alır).
+    """
+    texts = list(texts)
+    if not texts:
+        return []
+    if analiz_yap_batch is None:
+        logger.warning("AI client (analiz_yap_batch) yüklenemedi | AI_API_URL=%s", AI_API_URL)
+        return [dict(_API_HATASI) for _ in texts]
+
+    sonuclar = analiz_yap_batch(texts, oncelik="bulk")
+    if all(s.get("kaynak") == "error" for s in sonuclar):
+        raise RuntimeError("ensemble_batch tüm batch için hata döndü")
+    out = [_normalize(s) for s in sonuclar]
+    logger.info("Sentiment Service batch: %d yorum (%.4fs/yorum)", len(out), out[0]["duration"])
+    return out
+
+
+# --- ASYNC (ASGI view'ları için; normalizasyon senkron sürümlerle aynı) ---
+async def analyze_comment_async(text: str):
+    """analyze_comment'in async hali (ai_client.analiz_yap_async)."""
+    if not text or not isinstance(text, str):
+        return dict(_GECERSIZ)
+    try:
+        if analiz_yap_async is None:
+            raise RuntimeError("AI client (analiz_yap_async) yüklenemedi.")
+        sonuc = await analiz_yap_async(text)
+    except Exception as e:
+        logger.warning("AI servisine bağlanılamadı: %s | AI_API_URL=%s", e, AI_API_URL)
+        return dict(_API_HATASI)
+    return _normalize(sonuc)
+
+
+async def analyze_comments_batch_async(texts):
+    """analyze_comments_batch'in async hali; hata fırlatmaz (hatalı satırlar api_error/error kaynaklı)."""
+    texts = list(texts)
+    if not texts:
+        return []
+    if analiz_yap_batch_async is None:
+        return [dict(_API_HATASI) for _ in texts]
+    return [_normalize(s) for s in await analiz_yap_batch_async(texts)]
+
+
 def get_sentiment_badge(decision: str):
     """
     Karara (decision) göre UI badge bilgilerini döner.
@@ -86,3 +134,7 @@ def get_sentiment_badge(decision: str):
         "OLUMSUZ": {"text": "Olumsuz", "cls": "badge bg-danger text-white p-2", "sent": "neg"},
     }
     return BADGE_MAP.get(decision, {"text": "Nötr", "cls": "badge bg-secondary text-white p-2", "sent": "neu"})
+
+
+# Analiz henüz bitmediyse gösterilecek rozet
+PENDING_BADGE = {"text": "Analiz ediliyor…", "cls": "badge bg-dark border border-secondary text-secondary p-2", "sent": "pending"}
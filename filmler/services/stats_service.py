@@ -0,0 +1,140 @@
+"""
+Film başına yorum sayaçları (toplam / olumlu / olumsuz / nötr).
+
+Sayaçlar Film satırında tutulur ve her değişiklikte tek bir F() UPDATE ile güncellenir,
+böylece detay sayfası istatistikleri COUNT sorgusu olmadan (O(1)) okur.
+- Yorum eklendi / silindi: filmler.signals (post_save / post_delete)
+- Karar değişti (analiz bitti, tekrar analiz): karar_degisti() açıkça çağrılır
+  (yeniden_analiz komutu: kararlar_degisti() ile film başına tek UPDATE)
+- Sapma olursa: `manage.py yorum_sayaclari` Yorum tablosundan yeniden kurar
+"""
+import logging
+
+from django.db.models import Count, F, Q, Value
+from django.db.models.functions import Greatest
+
+from filmler.models import Film, Yorum
+
+logger = logging.getLogger(__name__)
+
+KARAR_ALANI = {
+    "OLUMLU": "olumlu_sayisi",
+    "OLUMSUZ": "olumsuz_sayisi",
+    "NÖTR": "notr_sayisi",
+}
+SAYAC_ALANLARI = ("yorum_sayisi", "olumlu_sayisi", "olumsuz_sayisi", "notr_sayisi")
+
+
+def _apply(film_id, deltas):
+    """deltas: {alan: +n/-n}. Azaltmalar 0'ın altına inmez (sayaç sapmışsa bile)."""
+    updates = {}
+    for alan, d in deltas.items():
+        if d > 0:
+            updates[alan] = F(alan) + d
+        elif d < 0:
+            updates[alan] = Greatest(F(alan) - (-d), Value(0))
+    if updates:
+        Film.objects.filter(id=film_id).update(**updates)
+
+
+def yorum_eklendi(yorum):
+    deltas = {"yorum_sayisi": 1}
+    alan = KARAR_ALANI.get(yorum.ai_karari)
+    if alan:
+        deltas[alan] = 1
+    _apply(yorum.film_id, deltas)
+
+
+def yorum_silindi(yorum):
+    deltas = {"yorum_sayisi": -1}
+    alan = KARAR_ALANI.get(yorum.ai_karari)
+    if alan:
+        deltas[alan] = -1
+    _apply(yorum.film_id, deltas)
+
+
+def karar_degisti(film_id, eski_karar, yeni_karar):
+    """Analiz sonucu yazıldığında eski kararın sayacını düşürüp yenisini artırır."""
+    eski, yeni = KARAR_ALANI.get(eski_karar), KARAR_ALANI.get(yeni_karar)
+    if eski == yeni:
+        return
+    deltas = {}
+    if eski:
+        deltas[eski] = -1
+    if yeni:
+        deltas[yeni] = 1
+    _apply(film_id, deltas)
+
+
+def kararlar_degisti(degisiklikler):
+    """
+    Toplu karar değişikliği (yeniden analiz): [(film_id, eski_karar, yeni_karar), ...].
+    Farklar film başına toplanır, her film için tek UPDATE yapılır.
+    """
+    film_deltas = {}
+    for film_id, eski_karar, yeni_karar in degisiklikler:
+        eski, yeni = KARAR_ALANI.get(eski_karar), KARAR_ALANI.get(yeni_karar)
+        if eski == yeni:
+            continue
+        deltas = film_deltas.setdefault(film_id, {})
+        if eski:
+            deltas[eski] = deltas.get(eski, 0) - 1
+        if yeni:
+            deltas[yeni] = deltas.get(yeni, 0) + 1
+    for film_id, deltas in film_deltas.items():
+        _apply(film_id, deltas)
+    return len(film_deltas)
+
+
+def film_stats(film):
+    """Template/AJAX için istatistik sözlüğü (sadece Film alanlarından)."""
+    total = film.yorum_sayisi
+    pos, neg, neu = film.olumlu_sayisi, film.olumsuz_sayisi, film.notr_sayisi
+    return {
+        "pos": pos, "neg": neg, "neu": neu, "total": total,
+        "pos_pct": round(pos / total * 100) if total else 0,
+        "neg_pct": round(neg / total * 100) if total else 0,
+        "neu_pct": round(neu / total * 100) if total else 0,
+    }
+
+
+def gercek_sayimlar(film_ids=None):
+    """Yorum tablosundan sayaçları hesaplar: {film_id: {alan: değer}}."""
+    qs = Yorum.objects.all()
+    if film_ids is not None:
+        qs = qs.filter(film_id__in=film_ids)
+    rows = qs.values("film_id").annotate(
+        yorum_sayisi=Count("id"),
+        olumlu_sayisi=Count("id", filter=Q(ai_karari="OLUMLU")),
+        olumsuz_sayisi=Count("id", filter=Q(ai_karari="OLUMSUZ")),
+        notr_sayisi=Count("id", filter=Q(ai_karari="NÖTR")),
+    )
+    return {r.pop("film_id"): r for r in rows}
+
+
+def yeniden_kur(film_ids=None, dry_run=False):
+    """
+    Sayaçları Yorum tablosuyla uzlaştırır. Dönüş: sapması olan filmlerin listesi
+    [(film_id, {alan: (kayitli, gercek)})].
+    """
+    gercek = gercek_sayimlar(film_ids)
+    films = Film.objects.only("id", *SAYAC_ALANLARI)
+    if film_ids is not None:
+        films = films.filter(id__in=film_ids)
+
+    sapmalar = []
+    for film in films.iterator(chunk_size=500):
+        hedef = gercek.get(film.id, dict.fromkeys(SAYAC_ALANLARI, 0))
+        fark = {
+            alan: (getattr(film, alan), hedef[alan])
+            for alan in SAYAC_ALANLARI
+            if getattr(film, alan) != hedef[alan]
+        }
+        if not fark:
+            continue
+        sapmalar.append((film.id, fark))
+        if not dry_run:
+            Film.objects.filter(id=film.id).update(**hedef)
+    if sapmalar:
+        logger.warning("Yorum sayaçlarında %d filmde sapma bulundu%s", len(sapmalar), " (dry-run)" if dry_run else "")
+    return sapmalar
@@ -0,0 +1,362 @@
+"""
+TMDB toplu veri çekme (film_cek) için eşzamanlı pipeline.
+
+    sayfa istekleri ──┐
+                      ├─ ortak executor (--workers) ─ TokenBucket ─ TMDB
+    detay istekleri ──┘            │
+                                   ▼
+                   sınırlı kuyruk (queue.Queue(maxsize))
+                                   │
+                                   ▼
+                 DB yazıcı (çağıran thread, batch + transaction)
+
+- Her film tek istekle gelir: /movie/{id}?append_to_response=credits,videos
+  (include_video_language=tr,en ile TR ve EN videolar aynı yanıtta).
+- TokenBucket tüm thread'ler arasında ortaktır; X-RateLimit-Remaining/Reset
+  header'ları kovayı daraltır, 429 Retry-After tüm istekleri o süre durdurur.
+- Kuyruk dolarsa fetch thread'leri bekler (backpressure), DB yazıcı geride kalmaz.
+- Artımlı mod (film_cek --degisiklik): sayfa yerine /movie/changes'ten gelen
+  id'ler çekilir; content_hash aynı kalan filmler yeniden yazılmaz.
+"""
+import datetime
+import email.utils
+import hashlib
+import json
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+
+from sinema_sitesi import http_client
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+def _retry_after_sn(value, default=5.0):
+    """Retry-After header'ı: saniye ya da HTTP-date (RFC 9110). Okunamazsa default."""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        tarih = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    if tarih.tzinfo is None:
+        tarih = tarih.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, (tarih - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. rate: saniyede token, capacity: patlama boyu.
+    Sunucu sinyalleri (rate-limit header'ları, 429) kovayı dışarıdan daraltabilir.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1, rate))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+        self.waited_sn = 0.0
+        self.throttled = 0
+
+    def _refill(self, now):
+        # Duraklama (429) süresince token birikmez; duraklama bitince patlama olmasın
+        start = max(self._last, self._paused_until)
+        if now > start:
+            self._tokens = min(self.capacity, self._tokens + (now - start) * self.rate)
+        self._last = max(self._last, now)
+
+    def acquire(self):
+        t0 = time.monotonic()
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    self.waited_sn += now - t0
+                    return
+                else:
+                    wait = (1 - self._tokens) / self.rate
+                self._cond.wait(wait)
+
+    def pause(self, seconds):
+        """Tüm istekleri en az `seconds` saniye durdurur (429 Retry-After)."""
+        with self._cond:
+            self.throttled += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0
+            self._cond.notify_all()
+
+    def observe(self, response):
+        """Yanıt header'larına göre kovayı ayarlar."""
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        if remaining is None:
+            return
+        try:
+            remaining = int(remaining)
+        except ValueError:
+            return
+        with self._cond:
+            self._refill(time.monotonic())
+            # Sunucunun kalan hakkından fazlasını harcama
+            self._tokens = min(self._tokens, remaining)
+        if remaining <= 0:
+            reset = response.headers.get("X-RateLimit-Reset")
+            try:
+                wait = max(0.0, float(reset) - time.time()) if reset else 1.0
+            except ValueError:
+                wait = 1.0
+            self.pause(min(wait, 10.0))
+
+
+class TmdbClient:
+    """Rate limit'li, retry'lı TMDB GET istemcisi (http_client 'tmdb_toplu' havuzu üzerinden)."""
+
+    def __init__(self, api_key, base_url=None, limiter=None, max_retries=3, timeout=10):
+        self.api_key = api_key
+        self.base_url = (base_url or getattr(settings, "TMDB_BASE_URL", "https://api.themoviedb.org/3")).rstrip("/")
+        self.limiter = limiter or TokenBucket(getattr(settings, "TMDB_RATE_PER_SN", 20))
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def get(self, path, params=None):
+        params = dict(params or {})
+        params["api_key"] = self.api_key
+        url = f"{self.base_url}{path}"
+
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            with self._lock:
+                self.requests += 1
+            try:
+                response = http_client.get(url, site="tmdb_toplu", params=params, timeout=self.timeout)
+                self.limiter.observe(response)
+
+                if response.status_code == 429:
+                    # Too Many Requests: tüm pipeline'ı Retry-After kadar durdur
+                    wait = _retry_after_sn(response.headers.get("Retry-After"))
+                    logger.warning("Rate Limit aşıldı (429). %.1fs bekleniyor...", wait)
+                    self.limiter.pause(wait)
+                    continue
+                if response.status_code == 404:
+                    return None
+
+                response.raise_for_status()
+                return response.json()
+
+            except requests.RequestException as e:
+                if attempt < self.max_retries:
+                    wait = 2 ** attempt  # Exponential backoff: 1, 2, 4...
+                    logger.warning("API Hatası: %s. %ss sonra tekrar deneniyor (%d/%d)...", e, wait, attempt + 1, self.max_retries)
+                    time.sleep(wait)
+                else:
+                    logger.error("API isteği başarısız oldu: %s | Hata: %s", url, e)
+                    return None
+        logger.error("API isteği rate limit yüzünden başarısız: %s", url)
+        return None
+
+    def popular_page(self, page):
+        return self.get("/movie/popular", {"language": "tr-TR", "page": page})
+
+    def movie_details(self, tmdb_id):
+        # Tek istek: krediler + TR/EN videolar
+        return self.get(f"/movie/{tmdb_id}", {
+            "language": "tr-TR",
+            "append_to_response": "credits,videos",
+            "include_video_language": "tr,en",
+        })
+
+    def changes(self, start_date, end_date, page=1):
+        return self.get("/movie/changes", {
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "page": page,
+        })
+
+
+# TMDB /movie/changes tek istekte en fazla 14 günlük aralık kabul eder
+CHANGES_MAX_GUN = 14
+
+
+def changed_ids(client, since, until):
+    """
+    since..until (date) arasında TMDB'de değişen film id'leri.
+    Bir sayfa alınamazsa None döner (watermark ilerletilmemeli).
+    """
+    ids = set()
+    start = since
+    while start <= until:
+        end = min(until, start + datetime.timedelta(days=CHANGES_MAX_GUN - 1))
+        page, total = 1, 1
+        while page <= total:
+            data = client.changes(start, end, page)
+            if data is None:
+                return None
+            ids.update(r["id"] for r in data.get("results", []) if r.get("id") and not r.get("adult"))
+            total = data.get("total_pages") or 1
+            page += 1
+        start = end + datetime.timedelta(days=1)
+    return ids
+
+
+def content_hash(item):
+    """parse_movie çıktısının (film + detay önbelleği alanları) kararlı özeti."""
+    from .tmdb_service import _detay_alanlari
+
+    detay = _detay_alanlari(item["tmdb"])
+    detay.pop("guncellenme_tarihi")
+    payload = {"isim": item["isim"], "film": item["defaults"], "detay": detay}
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+def parse_movie(detay):
+    """/movie/{id} (credits,videos) yanıtını Film alanlarına çevirir."""
+    from .tmdb_service import _pick_trailer
+
+    cast_names = [p["name"] for p in detay.get("credits", {}).get("cast", [])[:5]]
+    trailer = _pick_trailer(detay.get("videos", {}).get("results", []))
+    poster_path = detay.get("poster_path")
+    release = detay.get("release_date") or "2024"
+    yil = release.split("-")[0]
+
+    return {
+        'isim': (detay.get("title") or "").strip(),
+        'tmdb': detay,
+        'defaults': {
+            'konu': detay.get("overview") or "Özet yok.",
+            'yil': int(yil) if yil.isdigit() else None,
+            'puan': round(detay.get("vote_average", 0), 1),
+            'oyuncular': ", ".join(cast_names) if cast_names else "Bilgi yok",
+            'turler': ", ".join(g.get("name") for g in detay.get("genres", [])),
+            'poster_url': f"https://image.tmdb.org/t/p/w500{poster_path}" if poster_path else "",
+            # Film.fragman_url autoplay parametresi olmadan saklanır
+            'fragman_url': trailer.split("?")[0] if trailer else "",
+        },
+    }
+
+
+def run_pipeline(client, pages, write_batch, workers=8, queue_size=100, batch_size=20, stats=None, movie_ids=()):
+    """
+    pages: popüler liste sayfa numaraları, movie_ids: ayrıca çekilecek film id'leri (artımlı mod).
+    write_batch(list[parse_movie çıktısı]) çağıran thread'de çalışır ve yazılan film sayısını döner.
+    stats (dict) verilirse sayfa/film/hata sayıları ve süreler yazılır.
+    """
+    stats = stats if stats is not None else {}
+    stats.update({"pages": 0, "pages_failed": 0, "movies": 0, "movies_failed": 0, "written": 0})
+    out = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    lock = threading.Lock()
+    t0 = time.time()
+
+    def bump(key):
+        with lock:
+            stats[key] += 1
+
+    def put(item):
+        # Kuyruk doluysa bekler (backpressure); yazıcı hata verip durduysa bırakır
+        while not stop.is_set():
+            try:
+                out.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def fetch_movie(tmdb_id):
+        if stop.is_set():
+            return
+        try:
+            detay = client.movie_details(tmdb_id)
+            if not detay or not detay.get("title"):
+                bump("movies_failed")
+                return
+            if put(parse_movie(detay)):
+                bump("movies")
+        except Exception as e:
+            logger.error("Film işleme hatası (%s): %s", tmdb_id, e)
+            bump("movies_failed")
+
+    def finish():
+        # _DONE stop kurulu olsa da yazıcıya ulaşmalı; yazıcı hata verip çıktıysa bırakılır
+        while not writer_gone.is_set():
+            try:
+                out.put(_DONE, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def coordinator(executor):
+        pending_pages = len(pages)
+        try:
+            page_futures = [executor.submit(client.popular_page, p) for p in pages]
+            seen = set(movie_ids)
+            movie_futures = [executor.submit(fetch_movie, tmdb_id) for tmdb_id in seen]
+            for fut in page_futures:
+                data = fut.result()
+                pending_pages -= 1
+                if not data:
+                    bump("pages_failed")
+                    continue
+                bump("pages")
+                for m in data.get("results", []):
+                    if m.get("id") in seen:
+                        continue
+                    seen.add(m.get("id"))
+                    movie_futures.append(executor.submit(fetch_movie, m["id"]))
+            for fut in movie_futures:
+                fut.result()
+        except Exception as e:
+            logger.error("TMDB pipeline koordinatör hatası: %s", e)
+            # Kalan işler bırakılır; işlenemeyen sayfalar başarısız sayılır (watermark ilerlemesin)
+            stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            with lock:
+                stats["pages_failed"] += max(pending_pages, 1)
+        finally:
+            finish()
+
+    writer_gone = threading.Event()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tmdb-cek") as executor:
+        threading.Thread(target=coordinator, args=(executor,), daemon=True).start()
+
+        # DB yazıcı: çağıran thread (Django bağlantısı burada)
+        try:
+            batch = []
+            while True:
+                item = out.get()
+                if item is _DONE:
+                    break
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    stats["written"] += write_batch(batch)
+                    batch = []
+            if batch:
+                stats["written"] += write_batch(batch)
+        except BaseException:
+            writer_gone.set()
+            stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    stats["requests"] = client.requests
+    stats["throttled"] = client.limiter.throttled
+    stats["rate_wait_sn"] = round(client.limiter.waited_sn, 2)
+    stats["elapsed_sn"] = round(time.time() - t0, 2)
+    return stats
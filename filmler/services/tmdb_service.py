@@ -1,117 +1,384 @@
 import logging
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
 import requests
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+
+from sinema_sitesi import http_client
 
 logger = logging.getLogger(__name__)
 
 TMDB_API_KEY = getattr(settings, "TMDB_API_KEY", "")
+TMDB_BASE_URL = getattr(settings, "TMDB_BASE_URL", "https://api.themoviedb.org/3").rstrip("/")
+
+# Aynı film için aynı anda tek tazeleme (singleflight); kilit en fazla bu kadar tutulur
+REFRESH_LOCK_SN = 120
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _pick_trailer(videos):
+    """
+    --- FRAGMAN ÖNCELİK MANTIĞI ---
+    1. TR fragman, 2. TR herhangi bir video (teaser vb.), 3. EN fragman.
+    Bulunursa YouTube embed URL'i döner (iframe src olarak kullanılır).
+    """
+    best_video = None
+    for v in videos:
+        if v['site'] == 'YouTube' and v['iso_639_1'] == 'tr' and v['type'] == 'Trailer':
+            best_video = v
+            break
+    if not best_video:
+        for v in videos:
+            if v['site'] == 'YouTube' and v['iso_639_1'] == 'tr':
+                best_video = v
+                break
+    if not best_video:
+        for v in videos:
+            if v['site'] == 'YouTube' and v['iso_639_1'] == 'en' and v['type'] == 'Trailer':
+                best_video = v
+                break
+    if best_video:
+        return f"https://www.youtube.com/embed/{best_video['key']}?autoplay=1&rel=0"
+    return None
+
+
+def _embed_from_existing(existing_trailer_url):
+    """DB'deki fragman_url'i autoplay'li embed formatına çevirir."""
+    if not existing_trailer_url:
+        return None
+    match = re.search(r"youtube\.com/embed/([a-zA-Z0-9_-]+)", existing_trailer_url)
+    if match:
+        # ?autoplay=1 ekleyerek tıklanınca başlamasını sağlıyoruz
+        return f"https://www.youtube.com/embed/{match.group(1)}?autoplay=1&rel=0"
+    return None
+
+
+def _parse_details(detay):
+    """/movie/{id} (append_to_response=credits,images,videos) yanıtını sadeleştirir."""
+    backdrop_url = None
+    if detay.get("backdrop_path"):
+        backdrop_url = f"https://image.tmdb.org/t/p/original{detay['backdrop_path']}"
+
+    # Oyuncular (Cast) - İlk 15 kişi
+    cast_list = []
+    for person in detay.get("credits", {}).get("cast", [])[:15]:
+        profile = None
+        if person.get("profile_path"):
+            profile = f"https://image.tmdb.org/t/p/w185{person['profile_path']}"
+        cast_list.append({
+            "name": person.get("name"),
+            "character": person.get("character"),
+            "photo": profile
+        })
+
+    return {
+        "runtime": detay.get("runtime"),
+        "genres": ", ".join([g.get("name") for g in detay.get("genres", [])]),
+        "backdrop_url": backdrop_url,
+        "cast_list": cast_list,
+        "trailer_watch_url": _pick_trailer(detay.get("videos", {}).get("results", [])),
+    }
+
+
+def _search_tmdb_id(movie_name):
+    search_res = http_client.get(
+        f"{TMDB_BASE_URL}/search/movie",
+        site="tmdb",
+        params={"api_key": TMDB_API_KEY, "language": "tr-TR", "query": movie_name},
+    ).json()
+    if search_res.get("results"):
+        return search_res["results"][0]["id"]
+    return None
+
+
+def _fetch_details_by_id(tmdb_id):
+    # append_to_response ile krediler, resimler ve videolar
+    return http_client.get(
+        f"{TMDB_BASE_URL}/movie/{tmdb_id}",
+        site="tmdb",
+        params={
+            "api_key": TMDB_API_KEY,
+            "language": "tr-TR",
+            "append_to_response": "credits,images,videos"
+        },
+    ).json()
 
 
 def fetch_movie_details(movie_name: str, existing_trailer_url: str = None):
     """
-    TMDB'den film detaylarını çeker.
+    TMDB'den film detaylarını canlı çeker (önbelleksiz; sayfalar get_movie_details kullanır).
     Dönen sözlük:
     {
         'runtime': int | None,
         'genres': str | None,
         'backdrop_url': str | None,
         'cast_list': list,
-        'trailer_url': str | None
+        'trailer_watch_url': str | None
     }
     """
-    runtime = None
-    genres = None
-    backdrop_url = None
-    cast_list = []
-    trailer_watch_url = None
+    sonuc = {"runtime": None, "genres": None, "backdrop_url": None, "cast_list": [], "trailer_watch_url": None}
 
     if TMDB_API_KEY:
         try:
-            search_res = requests.get(
-                "https://api.themoviedb.org/3/search/movie",
-                params={"api_key": TMDB_API_KEY, "language": "tr-TR", "query": movie_name},
-                timeout=3,
-            ).json()
-
-            if search_res.get("results"):
-                tmdb_id = search_res["results"][0]["id"]
-                # append_to_response ile krediler, resimler ve videolar
-                detay = requests.get(
-                    f"https://api.themoviedb.org/3/movie/{tmdb_id}",
-                    params={
-                        "api_key": TMDB_API_KEY,
-                        "language": "tr-TR",
-                        "append_to_response": "credits,images,videos"
-                    },
-                    timeout=3,
-                ).json()
-
-                runtime = detay.get("runtime")
-                genres = ", ".join([g.get("name") for g in detay.get("genres", [])])
-
-                # Backdrop (Arka plan)
-                if detay.get("backdrop_path"):
-                    backdrop_url = f"https://image.tmdb.org/t/p/original{detay['backdrop_path']}"
-
-                # Oyuncular (Cast) - İlk 15 kişi
-                credits = detay.get("credits", {})
-                for person in credits.get("cast", [])[:15]:
-                    profile = None
-                    if person.get("profile_path"):
-                        profile = f"https://image.tmdb.org/t/p/w185{person['profile_path']}"
-                    
-                    cast_list.append({
-                        "name": person.get("name"),
-                        "character": person.get("character"),
-                        "photo": profile
-                    })
-                
-                # --- FRAGMAN ÖNCELİK MANTIĞI ---
-                videos = detay.get("videos", {}).get("results", [])
-                best_video = None
-                
-                # 1. TR Dublaj / Fragman
-                for v in videos:
-                    if v['site'] == 'YouTube' and v['iso_639_1'] == 'tr' and v['type'] == 'Trailer':
-                        best_video = v
-                        break
-                
-                # 2. TR Herhangi Bir Video (Teaser vb.)
-                if not best_video:
-                    for v in videos:
-                        if v['site'] == 'YouTube' and v['iso_639_1'] == 'tr':
-                            best_video = v
-                            break
-                            
-                # 3. EN Fragman (Yabancı dilde orijinal fragman)
-                if not best_video:
-                    for v in videos:
-                        if v['site'] == 'YouTube' and v['iso_639_1'] == 'en' and v['type'] == 'Trailer':
-                            best_video = v
-                            break
-
-                # Eğer TMDB'den bulduysak, onu kullan. Yoksa DB fragman_url kalır.
-                if best_video:
-                    # YouTube Embed URL formatı (otomatik oynatma ve kontrol parametreleri eklenebilir)
-                    # Ancak burada sadece embed URL'i hazırlıyoruz.
-                    # Frontend'de iframe src olarak kullanılacak.
-                    trailer_watch_url = f"https://www.youtube.com/embed/{best_video['key']}?autoplay=1&rel=0"
-
+            tmdb_id = _search_tmdb_id(movie_name)
+            if tmdb_id:
+                sonuc = _parse_details(_fetch_details_by_id(tmdb_id))
         except requests.RequestException as e:
             logger.warning("TMDB API hatası: %s", e)
 
     # Eğer TMDB'den gelmediyse ve DB'de varsa, DB'dekini embed formatına çevir
-    if not trailer_watch_url and existing_trailer_url:
-        match = re.search(r"youtube\.com/embed/([a-zA-Z0-9_-]+)", existing_trailer_url)
-        if match:
-            # ?autoplay=1 ekleyerek tıklanınca başlamasını sağlıyoruz
-            trailer_watch_url = f"https://www.youtube.com/embed/{match.group(1)}?autoplay=1&rel=0"
+    if not sonuc["trailer_watch_url"]:
+        sonuc["trailer_watch_url"] = _embed_from_existing(existing_trailer_url)
+    return sonuc
 
+
+# --------------------------------------------------------
+# YEREL ÖNBELLEK (TmdbDetay) - stale-while-revalidate
+# --------------------------------------------------------
+def _is_stale(detay):
+    ttl = getattr(settings, "TMDB_CACHE_TTL", 7 * 24 * 3600)
+    return detay.guncellenme_tarihi < timezone.now() - timedelta(seconds=ttl)
+
+
+def refresh_details(film):
+    """
+    Film için TMDB detaylarını çekip TmdbDetay'a yazar (senkron, HTTP yapar).
+    Hata olursa mevcut (bayat) kayıt olduğu gibi kalır. Dönüş: TmdbDetay | None
+    """
+    from filmler.models import TmdbDetay
+
+    if not TMDB_API_KEY:
+        return None
+
+    mevcut = TmdbDetay.objects.filter(film=film).first()
+    try:
+        tmdb_id = film.tmdb_id or (mevcut.tmdb_id if mevcut else None) or _search_tmdb_id(film.isim)
+        if tmdb_id is None:
+            # Bulunamadı: negatif kayıt, TTL dolana kadar tekrar aranmaz
+            detay, _ = TmdbDetay.objects.update_or_create(
+                film=film, defaults={"tmdb_id": None, "bulundu": False, "guncellenme_tarihi": timezone.now()},
+            )
+            return detay
+        detay_json = _fetch_details_by_id(tmdb_id)
+    except requests.RequestException as e:
+        logger.warning("TMDB tazeleme hatası (film=%s): %s", film.id, e)
+        return mevcut
+
+    return store_details(film, tmdb_id, detay_json) or mevcut
+
+
+def _detay_alanlari(detay_json):
+    veri = _parse_details(detay_json)
     return {
-        "runtime": runtime,
-        "genres": genres,
-        "backdrop_url": backdrop_url,
-        "cast_list": cast_list,
-        "trailer_watch_url": trailer_watch_url
+        "bulundu": True,
+        "sure_dk": veri["runtime"],
+        "turler": veri["genres"] or "",
+        "backdrop_url": veri["backdrop_url"] or "",
+        "oyuncu_listesi": veri["cast_list"],
+        "fragman_url": veri["trailer_watch_url"] or "",
+        "guncellenme_tarihi": timezone.now(),
+    }
+
+
+def store_details_bulk(pairs):
+    """
+    [(film, detay_json)] -> TmdbDetay'a tek bulk upsert (film_cek sayfa yazımı için).
+    film.tmdb_id dolu olmalı. Aynı tmdb_id başka filme bağlı eski kayıtlar önce silinir.
+    """
+    from filmler.models import TmdbDetay
+
+    if not pairs:
+        return 0
+    objs = [TmdbDetay(film=film, tmdb_id=film.tmdb_id, **_detay_alanlari(js)) for film, js in pairs]
+    film_ids = [film.id for film, _ in pairs]
+    TmdbDetay.objects.filter(tmdb_id__in=[o.tmdb_id for o in objs]).exclude(film_id__in=film_ids).delete()
+    TmdbDetay.objects.bulk_create(
+        objs,
+        update_conflicts=True,
+        unique_fields=["film"],
+        update_fields=["tmdb_id", "bulundu", "sure_dk", "turler", "backdrop_url",
+                       "oyuncu_listesi", "fragman_url", "guncellenme_tarihi"],
+    )
+    return len(objs)
+
+
+def store_details(film, tmdb_id, detay_json):
+    """
+    /movie/{id} yanıtını (credits + videos içeren) önbelleğe yazar.
+    film_cek de aynı yanıtı buraya yazar, böylece yeni eklenen filmlerin detay sayfası ilk açılışta sıcak olur.
+    """
+    from filmler.models import TmdbDetay
+
+    try:
+        with transaction.atomic():
+            detay, _ = TmdbDetay.objects.update_or_create(
+                film=film, defaults={"tmdb_id": tmdb_id, **_detay_alanlari(detay_json)},
+            )
+            if film.tmdb_id is None:
+                # Aramayla bulunan id'yi filme de işle (başka filmde varsa IntegrityError)
+                type(film).objects.filter(id=film.id, tmdb_id__isnull=True).update(tmdb_id=tmdb_id)
+    except IntegrityError:
+        # Aynı TMDB id başka bir filme bağlı (isim eşleşmesi çakıştı)
+        logger.warning("TMDB id %s zaten başka filme bağlı (film=%s)", tmdb_id, film.id)
+        return None
+    return detay
+
+
+def _lock_key(film_id):
+    return f"tmdb:yenile:{film_id}"
+
+
+def _refresh_task(film_id, lock_key):
+    from filmler.models import Film
+
+    close_old_connections()
+    try:
+        film = Film.objects.filter(id=film_id).first()
+        if film is not None:
+            refresh_details(film)
+    except Exception as e:
+        logger.exception("TMDB arka plan tazeleme hatası (film=%s): %s", film_id, e)
+    finally:
+        cache.delete(lock_key)
+        close_old_connections()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="tmdb-yenile")
+        return _executor
+
+
+def schedule_refresh(film):
+    """
+    Tazelemeyi arka planda başlatır. Aynı film için zaten süren bir tazeleme varsa
+    (cache.add kilidi) hiçbir şey yapmaz. Dönüş: tazeleme başlatıldıysa True.
+    """
+    if not TMDB_API_KEY:
+        return False
+    lock_key = _lock_key(film.id)
+    if not cache.add(lock_key, 1, timeout=REFRESH_LOCK_SN):
+        return False
+    if getattr(settings, "TMDB_REFRESH_ASYNC", True):
+        _get_executor().submit(_refresh_task, film.id, lock_key)
+    else:
+        try:
+            refresh_details(film)
+        finally:
+            cache.delete(lock_key)
+    return True
+
+
+def _detay_sozlugu(film, detay):
+    """TmdbDetay (veya None) -> fetch_movie_details anahtarlarıyla sözlük."""
+    if detay is None or not detay.bulundu:
+        return {
+            "runtime": None,
+            "genres": None,
+            "backdrop_url": None,
+            "cast_list": [],
+            "trailer_watch_url": _embed_from_existing(film.fragman_url),
+        }
+    return {
+        "runtime": detay.sure_dk,
+        "genres": detay.turler or None,
+        "backdrop_url": detay.backdrop_url or None,
+        "cast_list": detay.oyuncu_listesi,
+        "trailer_watch_url": detay.fragman_url or _embed_from_existing(film.fragman_url),
     }
+
+
+def get_movie_details(film):
+    """
+    Detay sayfası için TMDB bilgileri (fetch_movie_details ile aynı anahtarlar).
+    Kayıt tazeyse dışarıya hiç istek atılmaz; bayatsa eski veri döner ve arka planda
+    tazelenir; hiç yoksa sayfa TMDB ekstraları olmadan render edilir.
+    """
+    from filmler.models import TmdbDetay
+
+    detay = TmdbDetay.objects.filter(film=film).first()
+    if detay is None or _is_stale(detay):
+        schedule_refresh(film)
+        if detay is None and not getattr(settings, "TMDB_REFRESH_ASYNC", True):
+            detay = TmdbDetay.objects.filter(film=film).first()
+    return _detay_sozlugu(film, detay)
+
+
+# --------------------------------------------------------
+# ASYNC (ASGI detay sayfası) - httpx + async ORM
+# --------------------------------------------------------
+async def _asearch_tmdb_id(movie_name):
+    r = await http_client.aget(
+        f"{TMDB_BASE_URL}/search/movie",
+        site="tmdb",
+        params={"api_key": TMDB_API_KEY, "language": "tr-TR", "query": movie_name},
+    )
+    r.raise_for_status()
+    results = r.json().get("results")
+    return results[0]["id"] if results else None
+
+
+async def _afetch_details_by_id(tmdb_id):
+    r = await http_client.aget(
+        f"{TMDB_BASE_URL}/movie/{tmdb_id}",
+        site="tmdb",
+        params={"api_key": TMDB_API_KEY, "language": "tr-TR", "append_to_response": "credits,images,videos"},
+    )
+    r.raise_for_status()
+    return r.json()
+
+
+async def arefresh_details(film):
+    """
+    refresh_details'in async hali: HTTP event loop'u bloklamaz (httpx), yazma store_details ile.
+    Aynı film için süren bir tazeleme varsa (aynı cache kilidi) beklemeden None döner.
+    """
+    import httpx
+    from filmler.models import TmdbDetay
+
+    if not TMDB_API_KEY:
+        return None
+    lock_key = _lock_key(film.id)
+    if not await cache.aadd(lock_key, 1, timeout=REFRESH_LOCK_SN):
+        return None
+    try:
+        tmdb_id = film.tmdb_id or await _asearch_tmdb_id(film.isim)
+        if tmdb_id is None:
+            detay, _ = await TmdbDetay.objects.aupdate_or_create(
+                film=film, defaults={"tmdb_id": None, "bulundu": False, "guncellenme_tarihi": timezone.now()},
+            )
+            return detay
+        detay_json = await _afetch_details_by_id(tmdb_id)
+        return await sync_to_async(store_details)(film, tmdb_id, detay_json)
+    except (httpx.HTTPError, ValueError) as e:
+        logger.warning("TMDB tazeleme hatası (film=%s): %s", film.id, e)
+        return None
+    finally:
+        await cache.adelete(lock_key)
+
+
+async def aget_movie_details(film):
+    """
+    get_movie_details'in async hali. Kayıt hiç yoksa TMDB'den beklenerek çekilir: view bunu
+    yorum sorgusuyla eşzamanlı çalıştırdığı için sayfaya en fazla TMDB süresi kadar eklenir
+    (senkron sürümdeki gibi ekstrasız ilk görüntüleme olmaz). Bayat kayıt hemen döner, arka planda tazelenir.
+    """
+    from filmler.models import TmdbDetay
+
+    detay = await TmdbDetay.objects.filter(film=film).afirst()
+    if detay is None:
+        detay = await arefresh_details(film)
+    elif _is_stale(detay):
+        await sync_to_async(schedule_refresh)(film)
+    return _detay_sozlugu(film, detay)
@@ -0,0 +1,57 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .models import Film, Yorum
+from .services import autocomplete, dashboard_service, search_service, stats_service
+
+# Sinyal atlanan toplu yazımlardan (bulk_create/update) sonra gönderilir: film_ids=[...]
+katalog_guncellendi = Signal()
+
+
+@receiver(post_save, sender=Yorum)
+def yorum_kaydedildi(sender, instance, created, raw=False, **kwargs):
+    # Karar değişiklikleri (analiz sonucu) stats_service.karar_degisti ile ayrıca işlenir
+    if created and not raw:
+        stats_service.yorum_eklendi(instance)
+
+
+@receiver(post_delete, sender=Yorum)
+def yorum_silindi(sender, instance, **kwargs):
+    stats_service.yorum_silindi(instance)
+
+
+# --- KATALOG TÜREVLERİ (FTS, live_search autocomplete, dashboard cache) ---
+AUTOCOMPLETE_ALANLARI = {"isim", "poster_url", "yil", "puan"}
+
+
+@receiver(post_save, sender=Film)
+def film_kaydedildi(sender, instance, update_fields=None, **kwargs):
+    # Sadece indekslenen alanlar değiştiyse (örn. tmdb_id kaydı indeksi etkilemez)
+    if update_fields is None or set(update_fields) & set(search_service.FTS_COLUMNS):
+        search_service.indeksle([instance.pk])
+    if update_fields is None or set(update_fields) & AUTOCOMPLETE_ALANLARI:
+        autocomplete.degisti([instance.pk])
+    if update_fields is None or set(update_fields) & dashboard_service.ILGILI_ALANLAR:
+        dashboard_service.gecersiz_kil()
+
+
+@receiver(post_delete, sender=Film)
+def film_silindi(sender, instance, **kwargs):
+    search_service.indeksten_sil([instance.pk])
+    autocomplete.degisti([instance.pk])
+    dashboard_service.gecersiz_kil()
+
+
+@receiver(m2m_changed, sender=Film.kategoriler.through)
+def film_turleri_degisti(sender, action, **kwargs):
+    # Tür satırları (Aksiyon/Komedi/Korku) M2M'den okunur
+    if action in ("post_add", "post_remove", "post_clear"):
+        dashboard_service.gecersiz_kil()
+
+
+@receiver(katalog_guncellendi)
+def katalog_indeksle(sender, film_ids, **kwargs):
+    film_ids = list(film_ids)
+    search_service.indeksle(film_ids)
+    autocomplete.degisti(film_ids)
+    dashboard_service.gecersiz_kil()
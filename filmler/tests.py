@@ -1,4 +1,8 @@
-from django.test import TestCase, Client
+import re
+
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth.models import User
 from unittest.mock import patch, MagicMock
@@ -6,6 +10,52 @@ from filmler.models import Film, Yorum
 from filmler.services.moderation_service import kufur_kontrol, anlamsiz_mi
 from filmler.services.sentiment_service import analyze_comment
 
+
+# --- ESKİ MODERASYON UYGULAMASI (denetle() eşdeğerlik referansı; scripts/bench_moderation.py de kullanır) ---
+def legacy_kufur_kontrol(text):
+    from filmler.services.moderation_service import KUFUR_LISTESI
+
+    words = re.findall(r"[a-zA-ZçğıöşüÇĞİÖŞÜ]+", text.lower())
+    for word in words:
+        if word in KUFUR_LISTESI:
+            return True
+    return False
+
+
+def legacy_anlamsiz_mi(text):
+    from filmler.services.moderation_service import BLACKLIST, TURKCE_SOZLUK
+
+    if re.search(r'[a-zA-ZçğıöşüÇĞİÖŞÜ]\.[a-zA-ZçğıöşüÇĞİÖŞÜ]', text):
+        return True
+    clean = re.sub(r"[^a-zA-ZçğıöşüÇĞİÖŞÜ ]", "", text.lower()).strip()
+    if len(clean) < 2:
+        return True
+    if clean in BLACKLIST:
+        return True
+    norm = re.sub(r'(.)\1{2,}', r'\1\1', clean)
+    if re.search(r'(.{2,})\1{2,}', norm):
+        return True
+    words = norm.split()
+    unluler = set("aeıioöuü")
+    cons_cluster_re = re.compile(r'[bcçdfgğhjklmnprsştvyz]{4,}')
+    for w in words:
+        if cons_cluster_re.search(w):
+            return True
+        if len(w) > 3 and not any(c in unluler for c in w):
+            return True
+    if len(words) > 1:
+        avg_len = sum(len(w) for w in words) / len(words)
+        if avg_len < 15:
+            return False
+    if len(words) == 1:
+        w = words[0]
+        if len(w) <= 4:
+            if w not in TURKCE_SOZLUK and w not in BLACKLIST:
+                return True
+        return False
+    return False
+
+
 class ModerationServiceTest(TestCase):
     def test_kufur_kontrol(self):
         # Pozitif (Küfürlü)
@@ -48,6 +98,48 @@ class ModerationServiceTest(TestCase):
         self.assertFalse(anlamsiz_mi("Evet"), "Kısa ama geçerli kelime geçmeli")
         self.assertFalse(anlamsiz_mi("İyi"), "Kısa Türkçe kelime geçmeli")
 
+    def test_denetle_reasons(self):
+        from filmler.services.moderation_service import denetle
+
+        self.assertEqual(denetle("Senin amk"), {"kufur": True, "anlamsiz": False, "sebep": "kufur"})
+        self.assertEqual(denetle("asdasdasd")["sebep"], "tekrar")
+        self.assertEqual(denetle("dmşkamk")["sebep"], "unsuz")
+        self.assertEqual(denetle("xqwx")["sebep"], "unlusuz")
+        self.assertEqual(denetle("s.a.l.a.k")["sebep"], "noktalama")
+        self.assertEqual(denetle("zzk")["sebep"], "tek_kelime")
+        self.assertEqual(denetle("Bu film gerçekten harikaydı."), {"kufur": False, "anlamsiz": False, "sebep": None})
+
+    def test_engine_matches_legacy_functions(self):
+        from scripts.bench_moderation import korpus
+        from filmler.services.moderation_service import denetle
+
+        for metin in korpus(3000, seed=7):
+            karar = denetle(metin)
+            self.assertEqual(
+                (karar["kufur"], karar["anlamsiz"]),
+                (legacy_kufur_kontrol(metin), legacy_anlamsiz_mi(metin)),
+                metin,
+            )
+
+    def test_admin_action_confirms_before_deleting(self):
+        User.objects.create_superuser(username="admin", password="password")
+        self.client.login(username="admin", password="password")
+        film = Film.objects.create(isim="Matrix")
+        temiz = Yorum.objects.create(film=film, kullanici_adi="a", icerik="Çok güzel bir film.")
+        kufurlu = Yorum.objects.create(film=film, kullanici_adi="b", icerik="Senin amk")
+        veri = {"action": "moderasyonu_yeniden_uygula", "_selected_action": [temiz.id, kufurlu.id]}
+
+        # İlk tıklama: sadece onay sayfası, hiçbir şey silinmez
+        response = self.client.post("/admin/filmler/yorum/", veri)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Senin amk")
+        self.assertNotContains(response, "Çok güzel bir film.")
+        self.assertEqual(Yorum.objects.count(), 2)
+
+        response = self.client.post("/admin/filmler/yorum/", {**veri, "_selected_action": [kufurlu.id], "post": "yes"})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(list(Yorum.objects.values_list("id", flat=True)), [temiz.id])
+
 
 class SentimentServiceTest(TestCase):
     @patch('filmler.services.sentiment_service.analiz_yap')
@@ -106,6 +198,999 @@ class SentimentServiceTest(TestCase):
             self.assertEqual(result["decision"], expected_db, f"Normalization failed for {api_output}")
 
 
+class AnalysisQueueTest(TestCase):
+    def setUp(self):
+        self.film = Film.objects.create(isim="Matrix", puan=8.7, yil=1999)
+
+    @override_settings(AI_QUEUE_MAX_ATTEMPTS=2)
+    @patch('filmler.services.analysis_queue.analyze_comments_batch')
+    def test_retry_then_fail(self, mock_batch):
+        """
+        Servis kapalıyken iş kuyruğa geri döner; deneme hakkı bitince NÖTR + 'hata' olur.
+        """
+        from filmler.services.analysis_queue import drain_once
+
+        mock_batch.return_value = [{"decision": "NÖTR", "confidence": 0.0, "source": "api_error", "duration": 0.0}]
+        yorum = Yorum.objects.create(film=self.film, icerik="Güzel film")
+
+        self.assertEqual(drain_once(), 0)
+        yorum.refresh_from_db()
+        self.assertEqual(yorum.ai_durum, Yorum.DURUM_BEKLIYOR)
+        self.assertEqual(yorum.ai_deneme, 1)
+
+        self.assertEqual(drain_once(), 0)
+        yorum.refresh_from_db()
+        self.assertEqual(yorum.ai_durum, Yorum.DURUM_HATA)
+        self.assertEqual(yorum.ai_karari, "NÖTR")
+        self.assertEqual(drain_once(), 0)
+        self.assertEqual(mock_batch.call_count, 2)
+
+    @patch('filmler.services.analysis_queue.analyze_comments_batch')
+    def test_batches_and_stale_lease(self, mock_batch):
+        """
+        Yorumlar batch halinde işlenir; süresi dolmuş 'isleniyor' kilitleri tekrar alınır.
+        """
+        from datetime import timedelta
+        from django.utils import timezone
+        from filmler.services.analysis_queue import drain_once
+
+        mock_batch.side_effect = lambda texts: [
+            {"decision": "OLUMLU", "confidence": 0.9, "source": "mock", "duration": 0.0} for _ in texts
+        ]
+        for i in range(5):
+            Yorum.objects.create(film=self.film, icerik=f"Yorum {i}")
+        Yorum.objects.create(
+            film=self.film, icerik="Takılı kalmış", ai_durum=Yorum.DURUM_ISLENIYOR,
+            ai_kilit_zamani=timezone.now() - timedelta(hours=1),
+        )
+        Yorum.objects.create(
+            film=self.film, icerik="Başka worker'da", ai_durum=Yorum.DURUM_ISLENIYOR,
+            ai_kilit_zamani=timezone.now(),
+        )
+
+        self.assertEqual(drain_once(batch_size=4), 6)
+        self.assertEqual([len(c.args[0]) for c in mock_batch.call_args_list], [4, 2])
+        self.assertEqual(Yorum.objects.filter(ai_durum=Yorum.DURUM_ISLENIYOR).count(), 1)
+
+    @patch('filmler.services.analysis_queue.stats_service.karar_degisti')
+    @patch('filmler.services.analysis_queue.analyze_comments_batch')
+    def test_write_back_checks_lease_and_isolates_rows(self, mock_batch, mock_karar):
+        """
+        Sonuç yalnızca kira hâlâ bu worker'daysa yazılır; silinen/tekrar sahiplenilen satır
+        sayaçlara dokunmaz, bir satırdaki yazma hatası batch'in kalanını düşürmez.
+        """
+        from datetime import timedelta
+        from django.utils import timezone
+        from filmler.services.analysis_queue import claim_batch, process_batch
+
+        silinen, kaybedilen, hatali, normal = [
+            Yorum.objects.create(film=self.film, icerik=f"Yorum {i}") for i in range(4)
+        ]
+        yorumlar = claim_batch(10)
+        baska_kira = timezone.now() + timedelta(seconds=1)
+
+        def analiz(texts):
+            # Analiz sürerken: biri silindi, biri başka worker'a geçti
+            Yorum.objects.filter(id=silinen.id).delete()
+            Yorum.objects.filter(id=kaybedilen.id).update(ai_kilit_zamani=baska_kira)
+            return [{"decision": "OLUMLU", "confidence": 0.9, "source": "mock", "duration": 0.0} for _ in texts]
+
+        mock_batch.side_effect = analiz
+        mock_karar.side_effect = [RuntimeError("sayaç yazılamadı"), None]
+
+        self.assertEqual(process_batch(yorumlar), 1)
+        self.assertEqual(mock_karar.call_count, 2)
+
+        kaybedilen.refresh_from_db()
+        self.assertEqual(kaybedilen.ai_durum, Yorum.DURUM_ISLENIYOR)
+        self.assertEqual(kaybedilen.ai_kilit_zamani, baska_kira)
+        # Sayaç hatası satırın yazımını da geri alır; kira dolunca tekrar denenir
+        hatali.refresh_from_db()
+        self.assertEqual(hatali.ai_durum, Yorum.DURUM_ISLENIYOR)
+        normal.refresh_from_db()
+        self.assertEqual(normal.ai_durum, Yorum.DURUM_TAMAM)
+
+    @override_settings(AI_MODE="direct")
+    @patch('sinema_sitesi.ai_client.get_ensemble_module')
+    def test_batch_direct_mode_uses_ensemble_batch(self, mock_get):
+        """
+        Direct mode'da batch analiz tek ensemble_batch çağrısıyla yapılır ve normalize edilir.
+        """
+        from filmler.services.sentiment_service import analyze_comments_batch
+
+        mock_get.return_value.ensemble_batch.return_value = (
+            ["OLUMLU", "GEÇERSİZ", "NÖTR"], [0.9, 0.0, 0.6], ["Ensemble", "Invalid", "Rules"]
+        )
+        out = analyze_comments_batch(["iyi", "", "fena değil"])
+        mock_get.return_value.ensemble_batch.assert_called_once()
+        self.assertEqual([o["decision"] for o in out], ["OLUMLU", "NÖTR", "NÖTR"])
+        self.assertEqual(out[0]["source"], "local::Ensemble")
+        self.assertEqual(out[1]["source"], "invalid_input")
+
+
+class FilmStatsTest(TestCase):
+    def setUp(self):
+        self.film = Film.objects.create(isim="Matrix", puan=8.7, yil=1999)
+
+    def _sayaclar(self):
+        self.film.refresh_from_db()
+        return (self.film.yorum_sayisi, self.film.olumlu_sayisi, self.film.olumsuz_sayisi, self.film.notr_sayisi)
+
+    @patch('filmler.services.analysis_queue.analyze_comments_batch')
+    def test_counters_follow_create_analyze_delete(self, mock_batch):
+        """
+        Sayaçlar ekleme, analiz sonucu ve silmede F() ile güncellenmeli.
+        """
+        from filmler.services.analysis_queue import drain_once
+
+        y1 = Yorum.objects.create(film=self.film, icerik="Harika")
+        Yorum.objects.create(film=self.film, icerik="Eski", ai_karari="NÖTR", ai_durum=Yorum.DURUM_TAMAM)
+        self.assertEqual(self._sayaclar(), (2, 0, 0, 1))
+
+        mock_batch.return_value = [{"decision": "OLUMLU", "confidence": 0.9, "source": "mock", "duration": 0.0}]
+        drain_once()
+        self.assertEqual(self._sayaclar(), (2, 1, 0, 1))
+
+        # Tekrar analiz: karar değişirse eski sayaç düşer
+        Yorum.objects.filter(id=y1.id).update(ai_durum=Yorum.DURUM_BEKLIYOR)
+        mock_batch.return_value = [{"decision": "OLUMSUZ", "confidence": 0.7, "source": "mock", "duration": 0.0}]
+        drain_once()
+        self.assertEqual(self._sayaclar(), (2, 0, 1, 1))
+
+        y1.refresh_from_db()
+        y1.delete()
+        self.assertEqual(self._sayaclar(), (1, 0, 0, 1))
+
+    def test_reconcile_command(self):
+        """
+        yorum_sayaclari komutu sapmış sayaçları Yorum tablosundan düzeltmeli.
+        """
+        from io import StringIO
+        from django.core.management import call_command
+
+        Yorum.objects.create(film=self.film, icerik="a", ai_karari="OLUMLU")
+        Yorum.objects.create(film=self.film, icerik="b", ai_karari="OLUMSUZ")
+        Film.objects.filter(id=self.film.id).update(yorum_sayisi=7, olumlu_sayisi=0)
+
+        out = StringIO()
+        call_command("yorum_sayaclari", "--dry-run", stdout=out)
+        self.assertIn("yorum_sayisi: 7 -> 2", out.getvalue())
+        self.assertEqual(self._sayaclar()[0], 7)
+
+        call_command("yorum_sayaclari", stdout=StringIO())
+        self.assertEqual(self._sayaclar(), (2, 1, 1, 0))
+
+    @patch('filmler.views.get_movie_details')
+    def test_detail_stats_without_count_queries(self, mock_tmdb):
+        """
+        Detay sayfası istatistikleri Yorum üzerinde COUNT çalıştırmadan okumalı.
+        """
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        mock_tmdb.return_value = {
+            "runtime": None, "genres": "", "backdrop_url": "", "cast_list": [], "trailer_watch_url": "",
+        }
+        User.objects.create_user(username='testuser', password='password')
+        self.client.login(username='testuser', password='password')
+        for karar in ["OLUMLU", "OLUMLU", "NÖTR"]:
+            Yorum.objects.create(film=self.film, icerik="x", ai_karari=karar)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('film_detay', args=[self.film.id]))
+        self.assertEqual(response.context["stats"]["pos"], 2)
+        self.assertEqual(response.context["stats"]["total"], 3)
+        self.assertFalse([q for q in ctx.captured_queries if "COUNT(" in q["sql"].upper()])
+
+
+class YenidenAnalizKomutuTest(TestCase):
+    def setUp(self):
+        self.film = Film.objects.create(isim="Matrix", puan=8.7, yil=1999)
+        self.diger = Film.objects.create(isim="Inception", puan=8.8, yil=2010)
+        self.yorumlar = [
+            Yorum.objects.create(
+                film=film, icerik=f"yorum {i}", ai_karari="NÖTR", ai_guveni=0.5,
+                ai_kaynak="local::Rules", ai_durum=Yorum.DURUM_TAMAM,
+            )
+            for i, film in enumerate([self.film, self.film, self.film, self.diger])
+        ]
+        # Analiz sırası bekleyen yorum yeniden analize girmez
+        Yorum.objects.create(film=self.film, icerik="kuyrukta")
+
+    def _sayaclar(self, film):
+        film.refresh_from_db()
+        return (film.yorum_sayisi, film.olumlu_sayisi, film.olumsuz_sayisi, film.notr_sayisi)
+
+    def _calistir(self, *args, **kwargs):
+        from io import StringIO
+        from django.core.management import call_command
+
+        out = StringIO()
+        call_command("yeniden_analiz", *args, stdout=out, stderr=StringIO(), **kwargs)
+        return out.getvalue()
+
+    @patch('filmler.services.sentiment_service.analyze_comments_batch')
+    def test_batches_update_counters_and_watermark(self, mock_batch):
+        """
+        Yorumlar id sırasıyla batch'lenir; değişen kararlar yazılır, sayaçlar ve watermark güncellenir.
+        """
+        from filmler.models import SenkronDurumu
+        from filmler.management.commands.yeniden_analiz import WATERMARK_KEY
+
+        sonuc = {
+            "yorum 0": {"decision": "OLUMLU", "confidence": 0.9, "source": "local::Ensemble", "duration": 0.0},
+            "yorum 1": {"decision": "NÖTR", "confidence": 0.5, "source": "local::Rules", "duration": 0.0},
+            "yorum 2": {"decision": "OLUMSUZ", "confidence": 0.8, "source": "local::Ensemble", "duration": 0.0},
+            "yorum 3": {"decision": "NÖTR", "confidence": 0.0, "source": "error", "duration": 0.0},
+        }
+        mock_batch.side_effect = lambda texts: [sonuc[t] for t in texts]
+        self.assertEqual(self._sayaclar(self.film), (4, 0, 0, 3))
+
+        out = self._calistir(batch_size=3)
+        self.assertIn("Değişen: 2 (karar: 2), hata: 1", out)
+        self.assertEqual([len(c.args[0]) for c in mock_batch.call_args_list], [3, 1])
+        self.assertEqual(self._sayaclar(self.film), (4, 1, 1, 1))
+        self.assertEqual(self._sayaclar(self.diger), (1, 0, 0, 1))
+
+        ilk = Yorum.objects.get(id=self.yorumlar[0].id)
+        self.assertEqual((ilk.ai_karari, ilk.ai_kaynak), ("OLUMLU", "local::Ensemble"))
+        # Hata dönen yorumun eski kararı korunur
+        self.assertEqual(Yorum.objects.get(id=self.yorumlar[3].id).ai_kaynak, "local::Rules")
+        self.assertEqual(int(SenkronDurumu.oku(WATERMARK_KEY)), self.yorumlar[3].id)
+
+    @patch('filmler.services.sentiment_service.analyze_comments_batch')
+    def test_filters_resume_and_dry_run(self, mock_batch):
+        """
+        --film filtresi, --dry-run (yazma yok) ve --devam (watermark'tan sonrası) çalışmalı.
+        """
+        mock_batch.side_effect = lambda texts: [
+            {"decision": "OLUMLU", "confidence": 0.9, "source": "local::Ensemble", "duration": 0.0} for _ in texts
+        ]
+        self._calistir("--dry-run", film_ids=[self.film.id])
+        self.assertEqual(mock_batch.call_args.args[0], ["yorum 0", "yorum 1", "yorum 2"])
+        self.assertEqual(self._sayaclar(self.film), (4, 0, 0, 3))
+
+        self._calistir(limit=2)
+        self.assertEqual(self._sayaclar(self.film), (4, 2, 0, 1))
+
+        mock_batch.reset_mock()
+        self._calistir("--devam")
+        self.assertEqual(mock_batch.call_args.args[0], ["yorum 2", "yorum 3"])
+        self.assertEqual(self._sayaclar(self.film), (4, 3, 0, 0))
+        self.assertEqual(self._sayaclar(self.diger), (1, 1, 0, 0))
+
+    @patch('filmler.services.sentiment_service.analyze_comments_batch')
+    def test_skips_rows_changed_during_analysis(self, mock_batch):
+        """
+        Analiz sürerken kuyruğa alınan ya da silinen yorum üzerine yazılmaz, sayaçları kaymaz.
+        """
+        kuyruga_alinan, silinen = self.yorumlar[0], self.yorumlar[1]
+
+        def analiz(texts):
+            Yorum.objects.filter(id=kuyruga_alinan.id).update(ai_durum=Yorum.DURUM_BEKLIYOR)
+            Yorum.objects.get(id=silinen.id).delete()
+            return [{"decision": "OLUMLU", "confidence": 0.9, "source": "local::Ensemble", "duration": 0.0} for _ in texts]
+
+        mock_batch.side_effect = analiz
+        out = self._calistir(film_ids=[self.film.id])
+
+        self.assertIn("Değişen: 1 (karar: 1)", out)
+        self.assertIn("2 yorum analiz sırasında değiştiği", out)
+        self.assertEqual(Yorum.objects.get(id=kuyruga_alinan.id).ai_durum, Yorum.DURUM_BEKLIYOR)
+        # Silinen düştü; kuyruğa alınanın eski NÖTR'ü korunur, sadece yorum 2 OLUMLU oldu
+        self.assertEqual(self._sayaclar(self.film), (3, 1, 0, 1))
+
+    @patch('filmler.services.sentiment_service.analyze_comments_batch')
+    def test_resume_watermark_is_scoped_to_filters(self, mock_batch):
+        """
+        Filtreli çalıştırmanın watermark'ı farklı filtreli (veya filtresiz) --devam'ı etkilemez.
+        """
+        from django.core.management.base import CommandError
+
+        mock_batch.side_effect = lambda texts: [
+            {"decision": "OLUMLU", "confidence": 0.9, "source": "local::Ensemble", "duration": 0.0} for _ in texts
+        ]
+        self._calistir(film_ids=[self.diger.id])
+        with self.assertRaisesMessage(CommandError, "watermark yok"):
+            self._calistir("--devam")
+        with self.assertRaisesMessage(CommandError, "watermark yok"):
+            self._calistir("--devam", film_ids=[self.film.id])
+
+        self._calistir(limit=1, film_ids=[self.film.id])
+        mock_batch.reset_mock()
+        self._calistir("--devam", film_ids=[self.film.id])
+        self.assertEqual(mock_batch.call_args.args[0], ["yorum 1", "yorum 2"])
+
+
+@patch('filmler.services.tmdb_service.TMDB_API_KEY', 'test-key')
+class TmdbCacheTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.film = Film.objects.create(isim="Matrix", puan=8.7, yil=1999)
+
+    def _detay(self, yas_gun):
+        from datetime import timedelta
+        from django.utils import timezone
+        from filmler.models import TmdbDetay
+        return TmdbDetay.objects.create(
+            film=self.film, tmdb_id=603, sure_dk=136, turler="Aksiyon",
+            oyuncu_listesi=[{"name": "Keanu Reeves", "character": "Neo", "photo": None}],
+            guncellenme_tarihi=timezone.now() - timedelta(days=yas_gun),
+        )
+
+    @patch('filmler.services.tmdb_service.http_client.get')
+    def test_fresh_cache_makes_no_http(self, mock_get):
+        from filmler.services.tmdb_service import get_movie_details
+        self._detay(yas_gun=0)
+        data = get_movie_details(self.film)
+        mock_get.assert_not_called()
+        self.assertEqual(data["runtime"], 136)
+        self.assertEqual(data["cast_list"][0]["name"], "Keanu Reeves")
+
+    @patch('filmler.services.tmdb_service._get_executor')
+    def test_stale_served_and_refreshed_once(self, mock_executor):
+        """
+        Bayat kayıt hemen döner; aynı film için arka planda tek bir tazeleme kuyruğa girer.
+        """
+        from filmler.services.tmdb_service import get_movie_details
+        self._detay(yas_gun=30)
+        for _ in range(3):
+            self.assertEqual(get_movie_details(self.film)["runtime"], 136)
+        self.assertEqual(mock_executor.return_value.submit.call_count, 1)
+
+    @override_settings(TMDB_REFRESH_ASYNC=False)
+    @patch('filmler.services.tmdb_service.http_client.get')
+    def test_miss_fetches_and_stores(self, mock_get):
+        from filmler.models import TmdbDetay
+        from filmler.services.tmdb_service import get_movie_details
+
+        search = MagicMock(json=lambda: {"results": [{"id": 603}]})
+        detail = MagicMock(json=lambda: {
+            "runtime": 136, "genres": [{"name": "Bilim Kurgu"}], "backdrop_path": "/b.jpg",
+            "credits": {"cast": []},
+            "videos": {"results": [{"site": "YouTube", "iso_639_1": "tr", "type": "Trailer", "key": "abc"}]},
+        })
+        mock_get.side_effect = [search, detail]
+
+        data = get_movie_details(self.film)
+        self.assertEqual(data["genres"], "Bilim Kurgu")
+        self.assertIn("embed/abc", data["trailer_watch_url"])
+        self.assertEqual(TmdbDetay.objects.get(film=self.film).tmdb_id, 603)
+
+        # İkinci görüntüleme: dışarıya istek yok
+        get_movie_details(self.film)
+        self.assertEqual(mock_get.call_count, 2)
+
+
+class HttpClientTest(TestCase):
+    """Paylaşılan HTTP istemcisi: keep-alive yeniden kullanımı ve Retry-After."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+            fail_next = []
+
+            def _reply(self):
+                if self.fail_next:
+                    self.fail_next.pop()
+                    self.send_response(503)
+                    self.send_header("Retry-After", "0")
+                else:
+                    self.send_response(200)
+                body = b'{"ok": true}'
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = _reply
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                self._reply()
+
+            def log_message(self, *args):
+                pass
+
+        cls.handler = Handler
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}/"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def tearDown(self):
+        from sinema_sitesi import http_client
+        http_client.reset()
+
+    def test_connection_reuse_metrics(self):
+        from sinema_sitesi import http_client
+        for _ in range(5):
+            self.assertEqual(http_client.get(self.url, site="tmdb").status_code, 200)
+
+        pool = http_client.metrics()["tmdb"]["pools"][f"http://127.0.0.1:{self.server.server_port}"]
+        self.assertEqual(pool["requests"], 5)
+        self.assertEqual(pool["connections_opened"], 1)
+        self.assertEqual(pool["reuse_ratio"], 0.8)
+
+    @override_settings(HTTP_RETRY_BACKOFF=0)
+    def test_retry_only_idempotent(self):
+        from sinema_sitesi import http_client
+        self.handler.fail_next[:] = [1]
+        self.assertEqual(http_client.get(self.url, site="tmdb").status_code, 200)
+
+        self.handler.fail_next[:] = [1]
+        self.assertEqual(http_client.post(self.url, site="tmdb", json={}).status_code, 503)
+        self.assertEqual(http_client.metrics()["tmdb"]["requests"], 2)
+
+
+@override_settings(TMDB_API_KEY="test-key")
+class FilmCekPipelineTest(TestCase):
+    """film_cek: yerel TMDB taklidine karşı eşzamanlı pipeline."""
+
+    def _run(self, fake, *args):
+        import threading
+        from io import StringIO
+        from django.core.management import call_command
+        from scripts.fake_tmdb_server import make_server
+
+        server = make_server(fake)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            base = f"http://127.0.0.1:{server.server_port}/3"
+            out = StringIO()
+            call_command("film_cek", *args, "--base-url", base, stdout=out, stderr=StringIO())
+            return out.getvalue()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_one_request_per_movie(self):
+        from filmler.models import TmdbDetay
+        from scripts.fake_tmdb_server import FakeTmdb
+
+        fake = FakeTmdb(pages=3, latency=0.01)
+        out = self._run(fake, "3", "--workers", "8", "--rate", "500")
+
+        self.assertIn("Eklenen: 60", out)
+        self.assertEqual(Film.objects.count(), 60)
+        self.assertEqual(fake.hits, {"popular": 3, "movie": 60})
+        film = Film.objects.get(isim="Film 7")
+        self.assertEqual(film.tmdb_id, 7)
+        self.assertEqual(film.yil, 1997)
+        self.assertEqual(film.turler, "Aksiyon")
+        self.assertEqual([t.isim for t in film.kategoriler.all()], ["Aksiyon"])
+        self.assertEqual(Film.objects.filter(kategoriler__tmdb_id=35).count(), 30)
+        self.assertEqual(film.fragman_url, "https://www.youtube.com/embed/yt7")
+        # Detay önbelleği de aynı yanıtla dolar
+        self.assertEqual(TmdbDetay.objects.get(film=film).sure_dk, 97)
+        # Toplu yazım arama indeksine de yansır
+        from filmler.services import search_service
+        self.assertIn(film.id, search_service.eslesen_idler("oyuncu 7-0"))
+
+    def test_respects_server_rate_limit(self):
+        from scripts.fake_tmdb_server import FakeTmdb
+
+        fake = FakeTmdb(pages=1, rate=15)
+        out = self._run(fake, "1", "--workers", "8", "--rate", "100")
+        self.assertIn("Eklenen: 20", out)
+        self.assertEqual(fake.hits["movie"], 20)
+
+    def test_rerun_upserts_by_tmdb_id(self):
+        from scripts.fake_tmdb_server import FakeTmdb
+
+        # İsimle eklenmiş eski kayıtlar (harf büyüklüğü farklı olsa da) tmdb_id'yi sahiplenir;
+        # aynı isimli ama tmdb_id'li ikinci film kopya sayılmaz
+        eski = Film.objects.create(isim="Film 3", yil="1990")
+        buyuk_harf = Film.objects.create(isim="FILM 4")
+        Film.objects.create(isim="Film 5", tmdb_id=99999)
+
+        out = self._run(FakeTmdb(pages=1), "1", "--rate", "500")
+        self.assertIn("Eklenen: 18, Güncellenen: 2", out)
+        eski.refresh_from_db()
+        self.assertEqual(eski.tmdb_id, 3)
+        self.assertEqual(eski.yil, 1993)
+        buyuk_harf.refresh_from_db()
+        self.assertEqual((buyuk_harf.tmdb_id, buyuk_harf.isim), (4, "Film 4"))
+        self.assertEqual(Film.objects.filter(isim="Film 5").count(), 2)
+
+        # İkinci çalıştırma: içerik değişti, yeni satır yok, sayfa tek transaction'da yazılır
+        # (tür haritası + hash okuma + upsert + detay önbelleği + türler + arama indeksi)
+        revize = FakeTmdb(pages=1, revisions={i: 1 for i in range(1, 21)})
+        with self.assertNumQueries(14):
+            out = self._run(revize, "1", "--rate", "500")
+        self.assertIn("Eklenen: 0, Güncellenen: 20, Değişmeyen: 0", out)
+        self.assertEqual(Film.objects.count(), 21)
+
+        # Üçüncü çalıştırma: içerik aynı -> tek SELECT (hash karşılaştırma) + tür haritası + watermark
+        with self.assertNumQueries(3):
+            out = self._run(revize, "1", "--rate", "500")
+        self.assertIn("Eklenen: 0, Güncellenen: 0, Değişmeyen: 20", out)
+
+    def test_incremental_sync_fetches_only_changed_catalog_movies(self):
+        from filmler.models import SenkronDurumu
+        from scripts.fake_tmdb_server import FakeTmdb
+
+        self._run(FakeTmdb(pages=2), "2", "--rate", "500")
+        self.assertIsNotNone(SenkronDurumu.oku("tmdb_degisiklik_tarihi"))
+        SenkronDurumu.yaz("tmdb_degisiklik_tarihi", "2026-01-01")
+
+        # 250 değişiklik (3 sayfa); katalogda olan 3 film, sadece 7'nin içeriği değişmiş
+        degisen = [3, 7, 15] + list(range(1000, 1247))
+        fake = FakeTmdb(pages=2, changes=degisen, revisions={7: 1})
+        out = self._run(fake, "--degisiklik", "--rate", "500")
+
+        self.assertIn("Eklenen: 0, Güncellenen: 1, Değişmeyen: 2", out)
+        # Detay isteği sadece katalogdaki değişen filmler için
+        self.assertEqual(fake.hits["movie"], 3)
+        self.assertNotIn("popular", fake.hits)
+        self.assertIn("revizyon 1", Film.objects.get(tmdb_id=7).konu)
+        self.assertNotEqual(SenkronDurumu.oku("tmdb_degisiklik_tarihi"), "2026-01-01")
+
+        # Değişiklik listesi alınamazsa watermark ilerlemez
+        SenkronDurumu.yaz("tmdb_degisiklik_tarihi", "2026-01-01")
+        with patch("filmler.management.commands.film_cek.changed_ids", return_value=None):
+            self._run(FakeTmdb(pages=1), "--degisiklik", "--rate", "500")
+        self.assertEqual(SenkronDurumu.oku("tmdb_degisiklik_tarihi"), "2026-01-01")
+
+    def test_retry_after_accepts_http_date(self):
+        import time
+        from email.utils import formatdate
+        from filmler.services.tmdb_ingest import _retry_after_sn
+
+        self.assertEqual(_retry_after_sn("2"), 2.0)
+        self.assertAlmostEqual(_retry_after_sn(formatdate(time.time() + 30, usegmt=True)), 30, delta=2)
+        self.assertEqual(_retry_after_sn(formatdate(time.time() - 30, usegmt=True)), 0.0)
+        self.assertEqual(_retry_after_sn("yarın"), 5.0)
+        self.assertEqual(_retry_after_sn(None), 5.0)
+
+    def test_coordinator_failure_stops_pipeline(self):
+        """
+        Koordinatör düşerse pipeline takılmadan biter ve alınamayan sayfalar başarısız sayılır.
+        """
+        import threading
+        import time
+        from filmler.services.tmdb_ingest import TokenBucket, run_pipeline
+
+        class Client:
+            requests = 0
+            limiter = TokenBucket(1000)
+
+            def popular_page(self, page):
+                if page == 2:
+                    raise RuntimeError("bozuk sayfa")
+                return {"results": [{"id": page * 100 + i} for i in range(20)]}
+
+            def movie_details(self, tmdb_id):
+                return {"id": tmdb_id, "title": f"Film {tmdb_id}"}
+
+        def yaz(batch):
+            time.sleep(0.01)
+            return len(batch)
+
+        sonuc = {}
+        t = threading.Thread(target=lambda: sonuc.update(run_pipeline(
+            Client(), [1, 2, 3], yaz, workers=4, queue_size=1, batch_size=1,
+        )))
+        t.start()
+        t.join(10)
+        self.assertFalse(t.is_alive(), "pipeline koordinatör hatasında takıldı")
+        self.assertEqual(sonuc["pages"], 1)
+        self.assertEqual(sonuc["pages_failed"], 2)
+
+
+class FilmSearchTest(TestCase):
+    """FTS5 arama: Türkçe katlama, önek, sıralama ve sinyal senkronu."""
+
+    def setUp(self):
+        self.isik = Film.objects.create(isim="Işıklı Sokaklar", oyuncular="Cem Yılmaz", turler="Dram", konu="Bir kasaba.")
+        self.ist = Film.objects.create(isim="İstanbul Hatırası", oyuncular="Ayşe Çelik", turler="Komedi", konu="Sokak kedileri.")
+        self.diger = Film.objects.create(isim="Kedi", oyuncular="Bilgi yok", turler="Belgesel", konu="İstanbul sokaklarında.")
+
+    def _ara(self, q):
+        from filmler.services import search_service
+        return list(search_service.ara(Film.objects.all(), q).values_list("id", flat=True))
+
+    def test_turkish_folding_and_prefix(self):
+        self.assertEqual(self._ara("isikli"), [self.isik.id])
+        self.assertEqual(self._ara("IŞIK"), [self.isik.id])
+        self.assertEqual(self._ara("yilmaz"), [self.isik.id])
+        self.assertEqual(self._ara("ist hatir"), [self.ist.id])
+        self.assertEqual(self._ara("zzz"), [])
+
+    def test_ranked_title_first(self):
+        # İsimde geçen, sadece konuda geçenden önce gelir
+        self.assertEqual(self._ara("istanbul"), [self.ist.id, self.diger.id])
+        sonuc = self._ara("sokak")
+        self.assertEqual(sonuc[0], self.isik.id)
+        self.assertEqual(set(sonuc), {self.isik.id, self.ist.id, self.diger.id})
+
+    def test_signals_keep_index_in_sync(self):
+        self.ist.isim = "Ankara Anıları"
+        self.ist.save()
+        self.assertEqual(self._ara("hatirasi"), [])
+        self.assertEqual(self._ara("anilari"), [self.ist.id])
+        self.isik.delete()
+        self.assertEqual(self._ara("yilmaz"), [])
+
+    def test_grid_and_admin_use_index(self):
+        User.objects.create_superuser(username="admin", password="password")
+        self.client.login(username="admin", password="password")
+
+        response = self.client.get(reverse("anasayfa"), {"q": "cem yilmaz"})
+        self.assertEqual([f.id for f in response.context["filmler"]], [self.isik.id])
+
+        response = self.client.get("/admin/filmler/film/", {"q": "ISTANBUL"})
+        self.assertEqual({f.id for f in response.context["cl"].result_list}, {self.ist.id, self.diger.id})
+
+
+    def test_unranked_search_is_not_capped(self):
+        from filmler.services import search_service
+        Film.objects.bulk_create(
+            [Film(isim=f"Kara Film {i}", oyuncular="", turler="", konu="") for i in range(search_service.MAX_SONUC + 20)]
+        )
+        search_service.yeniden_kur()
+
+        self.assertEqual(search_service.ara(Film.objects.all(), "kara film", sirala=False).count(),
+                         search_service.MAX_SONUC + 20)
+        self.assertEqual(search_service.ara(Film.objects.all(), "kara film").count(), search_service.MAX_SONUC)
+
+
+class AutocompleteTest(TestCase):
+    """live_search: süreç içi önek indeksi, 1 harf hata toleransı, sürümle tazeleme."""
+
+    def setUp(self):
+        from filmler.services import autocomplete
+        self.ac = autocomplete
+        self.ac.sifirla()
+        self.matrix = Film.objects.create(isim="The Matrix", puan=8.7, yil="1999")
+        self.reloaded = Film.objects.create(isim="The Matrix Reloaded", puan=7.2, yil="2003")
+        self.ilk = Film.objects.create(isim="İlk Öpücük", puan=6.0, yil="1990")
+
+    def _isimler(self, term):
+        return [f["isim"] for f in self.ac.ara(term)]
+
+    def test_prefix_typo_and_ranking(self):
+        self.assertEqual(self._isimler("matr"), ["The Matrix", "The Matrix Reloaded"])
+        self.assertEqual(self._isimler("the m"), ["The Matrix", "The Matrix Reloaded"])
+        self.assertEqual(self._isimler("ILK OP"), ["İlk Öpücük"])
+        # 1 düzenleme: yer değiştirme / eksik harf
+        self.assertEqual(self._isimler("mtarix")[:1], ["The Matrix"])
+        self.assertEqual(self._isimler("reladed"), ["The Matrix Reloaded"])
+        self.assertEqual(self._isimler("zzzz"), [])
+
+    def test_refreshes_on_version_change_without_db_per_request(self):
+        self.ac.ara("matr")
+        with self.assertNumQueries(0):
+            self.ac.ara("matr")
+
+        self.reloaded.puan = 9.5
+        self.reloaded.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(self._isimler("matr"), ["The Matrix Reloaded", "The Matrix"])
+        self.matrix.delete()
+        self.assertEqual(self._isimler("matr"), ["The Matrix Reloaded"])
+
+    def test_live_search_cache_headers(self):
+        response = self.client.get(reverse("live_search"), {"term": "matr"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("max-age=60", response["Cache-Control"])
+        etag = response["ETag"]
+
+        response = self.client.get(reverse("live_search"), {"term": "matr"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Film.objects.create(isim="Matrix Resurrections", puan=5.7)
+        response = self.client.get(reverse("live_search"), {"term": "matr"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 3)
+
+
+class KategoriFiltreTest(TestCase):
+    """Tür filtresi M2M join, yıl sıralaması tamsayı üzerinden."""
+
+    def setUp(self):
+        from filmler.models import Tur
+        User.objects.create_user(username="u", password="password")
+        self.client.login(username="u", password="password")
+        aksiyon = Tur.objects.create(isim="Aksiyon", tmdb_id=28)
+        bilim = Tur.objects.create(isim="Bilim-Kurgu", tmdb_id=878)
+        self.eski = Film.objects.create(isim="Eski", yil=999, turler="Aksiyon")
+        self.yeni = Film.objects.create(isim="Yeni", yil=2010, turler="Aksiyon, Bilim-Kurgu")
+        self.yilsiz = Film.objects.create(isim="Yılsız", turler="Bilim-Kurgu")
+        self.eski.kategoriler.add(aksiyon)
+        self.yeni.kategoriler.add(aksiyon, bilim)
+        self.yilsiz.kategoriler.add(bilim)
+
+    def test_kategori_filter_and_year_sort(self):
+        response = self.client.get(reverse("anasayfa"), {"kategori": "Bilim-Kurgu", "sirala": "yeni"})
+        self.assertEqual([f.isim for f in response.context["filmler"]], ["Yeni", "Yılsız"])
+
+        # Sayısal sıralama: 2010 > 999 (metin sıralamasında tersi olurdu)
+        response = self.client.get(reverse("anasayfa"), {"sirala": "yeni"})
+        self.assertEqual([f.isim for f in response.context["filmler"]], ["Yeni", "Eski", "Yılsız"])
+
+    def test_dashboard_rows_use_join(self):
+        from filmler.services import dashboard_service
+
+        response = self.client.get(reverse("anasayfa"))
+        self.assertEqual({f["isim"] for f in response.context["action"]}, {"Eski", "Yeni"})
+        with patch.object(dashboard_service, "cache") as mock_cache, CaptureQueriesContext(connection) as ctx:
+            mock_cache.get.return_value = None
+            dashboard_service.bolumler()
+        sql = next(q["sql"] for q in ctx.captured_queries if "Aksiyon" in q["sql"])
+        self.assertIn("filmler_film_kategoriler", sql)
+        self.assertNotIn("LIKE", sql)
+
+
+class DashboardCacheTest(TestCase):
+    """Dashboard bölümleri cache'ten; katalog değişince geçersiz olur."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        from filmler.models import Tur
+        cache.clear()
+        aksiyon = Tur.objects.create(isim="Aksiyon")
+        self.hero = Film.objects.create(isim="Hero", puan=8.0, fragman_url="https://youtu.be/x",
+                                        poster_url="https://image.tmdb.org/t/p/w500/h.jpg")
+        self.hero.kategoriler.add(aksiyon)
+        Film.objects.create(isim="Sıradan", puan=5.0)
+
+    def test_cached_sections_and_invalidation(self):
+        from filmler.services import dashboard_service
+
+        bolumler = dashboard_service.bolumler()
+        self.assertEqual(bolumler["hero_ids"], [self.hero.id])
+        self.assertEqual([f["isim"] for f in bolumler["action"]], ["Hero"])
+        self.assertNotIn("konu", bolumler["popular"][0])
+
+        # Sıcak cache: sadece hero filmleri PK ile okunur
+        with self.assertNumQueries(1):
+            bolumler = dashboard_service.bolumler()
+            hero = dashboard_service.hero_filmleri(bolumler["hero_ids"])
+        self.assertEqual(hero[0]["poster_url_hd"], "https://image.tmdb.org/t/p/original/h.jpg")
+
+        Film.objects.create(isim="Yeni Gelen", puan=9.9)
+        self.assertEqual(dashboard_service.bolumler()["newest"][0]["isim"], "Yeni Gelen")
+
+        self.hero.kategoriler.clear()
+        self.assertEqual(dashboard_service.bolumler()["action"], [])
+
+    def test_dashboard_view(self):
+        User.objects.create_user(username="u", password="password")
+        self.client.login(username="u", password="password")
+        response = self.client.get(reverse("anasayfa"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Hero")
+        self.assertEqual(len(response.context["hero_movies"]), 1)
+
+
+class KeysetPaginationTest(TestCase):
+    """Grid ve yorum listesi: imleçle sayfalama, sabit sayfa maliyeti."""
+
+    def setUp(self):
+        User.objects.create_user(username="u", password="password")
+        self.client.login(username="u", password="password")
+        # Aynı puan/yıl değerleri (eşitlik) ve yılı olmayanlar bilerek var
+        Film.objects.bulk_create([
+            Film(isim=f"Film {i}", puan=(i % 7) / 2, yil=None if i % 5 == 0 else 1990 + i % 4)
+            for i in range(60)
+        ])
+
+    def _hepsi(self, params):
+        from filmler.views import GRID_SAYFA_BOYUTU
+
+        response = self.client.get(reverse("anasayfa"), params)
+        ids = [f.id for f in response.context["filmler"]]
+        self.assertEqual(len(ids), GRID_SAYFA_BOYUTU)
+        imlec = response.context["sonraki_imlec"]
+        while imlec:
+            data = self.client.get(reverse("film_listesi"), {**params, "imlec": imlec}).json()
+            ids += [f["id"] for f in data["filmler"]]
+            imlec = data["sonraki"]
+        return ids
+
+    def test_grid_pages_match_full_ordering(self):
+        filmler = list(Film.objects.all())
+        beklenen = [f.id for f in sorted(filmler, key=lambda f: (-f.puan, f.id))]
+        self.assertEqual(self._hepsi({"sirala": "puan"}), beklenen)
+
+        beklenen = [f.id for f in sorted(filmler, key=lambda f: (f.yil is None, -(f.yil or 0), -f.id))]
+        self.assertEqual(self._hepsi({"sirala": "yeni"}), beklenen)
+
+        self.assertEqual(self._hepsi({"mode": "liste"}), sorted((f.id for f in filmler), reverse=True))
+
+    def test_page_cost_constant_and_bad_cursor(self):
+        from filmler.services import pagination
+
+        qs = Film.objects.all()
+        _, imlec = pagination.keyset_sayfa(qs, ("-puan", "id"), boyut=5)
+        for _ in range(8):
+            with self.assertNumQueries(1):
+                _, imlec = pagination.keyset_sayfa(qs, ("-puan", "id"), imlec, boyut=5)
+
+        response = self.client.get(reverse("film_listesi"), {"sirala": "puan", "imlec": "bozuk!"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_ranked_search_pages(self):
+        from filmler.services import search_service
+
+        # bulk_create sinyal göndermez
+        search_service.yeniden_kur()
+        ids = self._hepsi({"q": "film"})
+        self.assertEqual(sorted(ids), sorted(Film.objects.values_list("id", flat=True)))
+
+    def test_comment_pages(self):
+        from filmler.views import YORUM_SAYFA_BOYUTU
+
+        film = Film.objects.first()
+        yorumlar = Yorum.objects.bulk_create([
+            Yorum(film=film, kullanici_adi="u", icerik=f"yorum {i}", ai_durum=Yorum.DURUM_TAMAM, ai_karari="OLUMLU")
+            for i in range(YORUM_SAYFA_BOYUTU + 5)
+        ])
+        response = self.client.get(reverse("film_detay", args=[film.id]))
+        ilk = [y.id for y in response.context["yorumlar"]]
+        self.assertEqual(len(ilk), YORUM_SAYFA_BOYUTU)
+
+        data = self.client.get(
+            reverse("yorum_listesi", args=[film.id]), {"imlec": response.context["yorum_imleci"]},
+        ).json()
+        self.assertIsNone(data["sonraki"])
+        tum = ilk + [y["id"] for y in data["yorumlar"]]
+        self.assertEqual(sorted(tum), sorted(y.id for y in yorumlar))
+
+
+class SicakSorguPlanTest(TestCase):
+    """
+    Büyük sentetik katalogda sıcak görünümler: istek başına sorgu sayısı sabit,
+    film/yorum tablolarında tam tarama ya da ORDER BY için geçici B-tree yok.
+    """
+
+    FILM_SAYISI = 3000
+    YORUM_SAYISI = 2000
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user(username="u", password="password")
+        Film.objects.bulk_create([
+            Film(
+                isim=f"Film {i}", puan=(i * 37 % 100) / 10, yil=None if i % 11 == 0 else 1950 + i % 75,
+                fragman_url="https://www.youtube.com/watch?v=x" if i % 4 == 0 else "",
+            )
+            for i in range(cls.FILM_SAYISI)
+        ])
+        cls.film = Film.objects.order_by("id").first()
+        diger = Film.objects.order_by("id")[1]
+        Yorum.objects.bulk_create([
+            Yorum(
+                film=cls.film if i % 2 else diger, kullanici_adi="u", icerik=f"yorum {i}",
+                ai_durum=Yorum.DURUM_TAMAM, ai_karari=("OLUMLU", "OLUMSUZ", "NÖTR")[i % 3],
+            )
+            for i in range(cls.YORUM_SAYISI)
+        ])
+
+    def setUp(self):
+        self.client.login(username="u", password="password")
+
+    def _plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            return [row[-1] for row in cursor.fetchall()]
+
+    def _sicak_sorgular(self, ctx):
+        """Yakalanan sorgulardan film/yorum tablolarına gidenler: [(sql, plan)]."""
+        return [
+            (q["sql"], self._plan(q["sql"])) for q in ctx.captured_queries
+            if q["sql"].startswith("SELECT") and ('"filmler_film"' in q["sql"] or '"filmler_yorum"' in q["sql"])
+        ]
+
+    def _tarama_yok(self, ctx):
+        planlar = self._sicak_sorgular(ctx)
+        self.assertTrue(planlar)
+        for sql, plan in planlar:
+            for adim in plan:
+                self.assertNotIn("TEMP B-TREE", adim, sql)
+                # "SCAN tablo" (indekssiz): sadece PK sırasıyla LIMIT'li okuma kabul edilir
+                if adim in ("SCAN filmler_film", "SCAN filmler_yorum"):
+                    self.assertRegex(sql, r'ORDER BY "filmler_\w+"\."id" DESC LIMIT \d+$', sql)
+        return " | ".join(adim for _, plan in planlar for adim in plan)
+
+    def _iste(self, sorgu_sayisi, url, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(ctx), sorgu_sayisi, [q["sql"] for q in ctx.captured_queries])
+        return response, ctx
+
+    def test_grid_pages(self):
+        beklenen = {
+            "puan": "USING INDEX film_puan_id_idx",
+            "yeni": "USING INDEX film_yil_id_idx",
+            "": "USING INTEGER PRIMARY KEY",
+        }
+        for sirala, indeks in beklenen.items():
+            with self.subTest(sirala=sirala):
+                response, ctx = self._iste(3, reverse("anasayfa"), {"sirala": sirala, "mode": "liste"})
+                plan = self._tarama_yok(ctx)
+                if sirala:
+                    self.assertIn(indeks, plan)
+
+                # Derin sayfa: aynı sorgu sayısı, indekste aralık araması (SEARCH)
+                imlec = response.context["sonraki_imlec"]
+                for _ in range(20):
+                    imlec = self.client.get(reverse("film_listesi"), {"sirala": sirala, "imlec": imlec}).json()["sonraki"]
+                _, ctx = self._iste(3, reverse("film_listesi"), {"sirala": sirala, "imlec": imlec})
+                self.assertIn(f"SEARCH filmler_film {indeks}", self._tarama_yok(ctx))
+
+    def test_film_detay_and_comment_pages(self):
+        response, ctx = self._iste(5, reverse("film_detay", args=[self.film.id]))
+        self.assertIn("yorum_film_tarih_idx", self._tarama_yok(ctx))
+
+        _, ctx = self._iste(4, reverse("yorum_listesi", args=[self.film.id]), {"imlec": response.context["yorum_imleci"]})
+        self.assertIn("SEARCH filmler_yorum USING INDEX yorum_film_tarih_idx", self._tarama_yok(ctx))
+
+    def test_dashboard_and_admin_queries(self):
+        from filmler.services import dashboard_service, stats_service
+
+        with CaptureQueriesContext(connection) as ctx:
+            dashboard_service._hesapla()
+        (_, hero), (_, populer) = self._sicak_sorgular(ctx)[:2]
+        self.assertIn("SEARCH filmler_film USING INDEX film_hero_idx (puan>?)", hero)
+        self.assertIn("SCAN filmler_film USING INDEX film_puan_id_idx", populer)
+
+        # Varsayılan (Meta) sıralamalar: admin listeleri
+        self.assertIn("film_eklenme_idx", " ".join(self._plan(str(Film.objects.all()[:100].query))))
+        self.assertIn("yorum_tarih_idx", " ".join(self._plan(str(Yorum.objects.all()[:100].query))))
+
+        # Sayaç yeniden kurulumu: film başına karar dağılımı indeksten
+        with CaptureQueriesContext(connection) as ctx:
+            stats_service.gercek_sayimlar([self.film.id])
+        self.assertIn("yorum_film_karar_idx", self._tarama_yok(ctx))
+
+
+class SqlitePragmaTest(TestCase):
+    """connection_created: SQLITE_PRAGMAS her bağlantıda uygulanır."""
+
+    def test_connection_pragmas(self):
+        from django.conf import settings
+
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], int(settings.SQLITE_PRAGMAS["busy_timeout"]))
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute("PRAGMA cache_size")
+            self.assertEqual(cursor.fetchone()[0], int(settings.SQLITE_PRAGMAS["cache_size"]))
+
+    def test_wal_on_file_and_value_validation(self):
+        import os
+        import sqlite3
+        import tempfile
+
+        from django.core.exceptions import ImproperlyConfigured
+        from sinema_sitesi import db_pragmas
+
+        with tempfile.TemporaryDirectory() as klasor:
+            db = sqlite3.connect(os.path.join(klasor, "t.sqlite3"))
+            db_pragmas.uygula(db.cursor(), {"journal_mode": "WAL", "busy_timeout": "250", "mmap_size": ""})
+            self.assertEqual(db.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+            self.assertEqual(db.execute("PRAGMA busy_timeout").fetchone()[0], 250)
+            db.close()
+
+        with self.assertRaises(ImproperlyConfigured):
+            db_pragmas.komutlar({"journal_mode": "WAL; DROP TABLE filmler_film"})
+
+
 class ViewTest(TestCase):
     def setUp(self):
         self.client = Client()
@@ -144,33 +1229,68 @@ class ViewTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json(), [])
 
-    @patch('filmler.views.analyze_comment') # View içindeki servisi mockluyoruz
-    def test_film_detay_post_standard_flow(self, mock_analyze):
+    @patch('filmler.services.analysis_queue.analyze_comments_batch') # Worker'ın kullandığı servisi mockluyoruz
+    def test_film_detay_post_standard_flow(self, mock_batch):
         """
-        Standart POST akışı (Redirect ile)
+        Standart POST akışı (Redirect ile): yorum hemen kaydedilir, analiz kuyrukta yapılır.
         """
         self.client.login(username='testuser', password='password')
         url = reverse('film_detay', args=[self.film.id])
         
         # AI Sonucunu Mockla
-        mock_analyze.return_value = {
+        mock_batch.return_value = [{
             "decision": "OLUMLU",
             "confidence": 0.95,
             "source": "mock_ai",
             "duration": 0.1
-        }
+        }]
         
         # Valid POST
         response = self.client.post(url, {'yorum_icerigi': 'Harika bir filmdi kesinlikle izleyin.'})
         
-        # Redirect döner (302)
+        # Redirect döner (302), model request içinde çağrılmaz
         self.assertEqual(response.status_code, 302)
         self.assertEqual(Yorum.objects.count(), 1)
-        
-        # Veriyi doğrula
+        mock_batch.assert_not_called()
+
         yorum = Yorum.objects.first()
         self.assertEqual(yorum.icerik, 'Harika bir filmdi kesinlikle izleyin.')
+        self.assertEqual(yorum.ai_durum, Yorum.DURUM_BEKLIYOR)
+
+        # Worker kuyruğu boşaltır
+        from filmler.services.analysis_queue import drain_once
+        self.assertEqual(drain_once(), 1)
+
+        # Veriyi doğrula
+        yorum.refresh_from_db()
         self.assertEqual(yorum.ai_karari, 'OLUMLU')
+        self.assertEqual(yorum.ai_durum, Yorum.DURUM_TAMAM)
+
+    @patch('filmler.services.analysis_queue.analyze_comments_batch')
+    def test_yorum_durum_polling(self, mock_batch):
+        """
+        AJAX POST bekleyen rozetle döner; durum endpoint'i analiz bitince sonucu verir.
+        """
+        self.client.login(username='testuser', password='password')
+        url = reverse('film_detay', args=[self.film.id])
+        response = self.client.post(
+            url, {'yorum_icerigi': 'Oyunculuk çok başarılıydı.'}, HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        data = response.json()
+        self.assertTrue(data["ok"])
+        self.assertEqual(data["yorum"]["sent_key"], "pending")
+
+        durum_url = reverse('yorum_durum', args=[self.film.id])
+        yorum_id = data["yorum"]["id"]
+        self.assertEqual(self.client.get(durum_url, {'ids': str(yorum_id)}).json()["bekleyen"], 1)
+
+        from filmler.services.analysis_queue import drain_once
+        mock_batch.return_value = [{"decision": "OLUMSUZ", "confidence": 0.8, "source": "mock", "duration": 0.0}]
+        drain_once()
+        data = self.client.get(durum_url, {'ids': str(yorum_id)}).json()
+        self.assertEqual(data["bekleyen"], 0)
+        self.assertEqual(data["yorumlar"][0]["sent_key"], "neg")
+        self.assertEqual(data["stats"]["neg"], 1)
 
     def test_film_detay_ajax_errors(self):
         """
@@ -196,3 +1316,450 @@ class ViewTest(TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertIn("Yorum çok kısa", response.json()["error"])
 
+
+
+@patch('filmler.services.tmdb_service.TMDB_API_KEY', 'test-key')
+class FilmDetayAsyncTest(TestCase):
+    """ASGI film detay view'ı: yorum sayfası ve TMDB detayları eşzamanlı, async ORM + httpx."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='password')
+        self.film = Film.objects.create(isim="Matrix", puan=8.7, yil=1999)
+        for i in range(3):
+            Yorum.objects.create(film=self.film, kullanici_adi="ali", icerik=f"Yorum {i} güzel", ai_karari="OLUMLU")
+
+    def _get(self, film_id):
+        from asgiref.sync import async_to_sync
+        from django.test import AsyncRequestFactory
+        from filmler.views import film_detay_async
+
+        request = AsyncRequestFactory().get(f"/film/{film_id}/")
+        request.user = self.user
+
+        async def auser():
+            return self.user
+
+        request.auser = auser
+        return async_to_sync(film_detay_async)(request, film_id=film_id)
+
+    def test_renders_comments_stats_and_cached_tmdb(self):
+        from django.http import Http404
+        from django.utils import timezone
+        from filmler.models import TmdbDetay
+
+        TmdbDetay.objects.create(film=self.film, tmdb_id=603, sure_dk=136, turler="Aksiyon",
+                                 guncellenme_tarihi=timezone.now())
+        with patch('sinema_sitesi.http_client.aget') as mock_aget:
+            response = self._get(self.film.id)
+        mock_aget.assert_not_called()
+        self.assertEqual(response.status_code, 200)
+        html = response.content.decode()
+        self.assertIn("Yorum 2 güzel", html)
+        self.assertIn("136", html)
+
+        with self.assertRaises(Http404):
+            self._get(self.film.id + 100)
+
+    def test_miss_fetches_tmdb_with_httpx_and_stores(self):
+        import httpx
+        from filmler.models import TmdbDetay
+
+        istekler = []
+
+        def handler(request):
+            istekler.append(request.url.path)
+            if request.url.path.endswith("/search/movie"):
+                return httpx.Response(200, json={"results": [{"id": 603}]})
+            return httpx.Response(200, json={
+                "runtime": 136, "genres": [{"name": "Bilim Kurgu"}], "credits": {"cast": []},
+                "videos": {"results": [{"site": "YouTube", "iso_639_1": "tr", "type": "Trailer", "key": "abc"}]},
+            })
+
+        with patch('sinema_sitesi.http_client._yeni_async_istemci',
+                   side_effect=lambda site: httpx.AsyncClient(transport=httpx.MockTransport(handler))):
+            response = self._get(self.film.id)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Bilim Kurgu", response.content.decode())
+        self.assertEqual(len(istekler), 2)
+        self.assertEqual(TmdbDetay.objects.get(film=self.film).tmdb_id, 603)
+
+        # İkinci görüntüleme yerel önbellekten
+        self._get(self.film.id)
+        self.assertEqual(len(istekler), 2)
+
+    def _asgi_urls(self, asgi_mode):
+        import importlib
+        from django.urls import clear_url_caches
+        from sinema_sitesi import urls
+
+        with override_settings(ASGI_MODE=asgi_mode):
+            importlib.reload(urls)
+        clear_url_caches()
+        self.addCleanup(clear_url_caches)
+        self.addCleanup(importlib.reload, urls)
+
+    def test_asgi_mode_switches_detail_view(self):
+        from django.urls import resolve
+
+        self._asgi_urls(True)
+        self.assertEqual(resolve(reverse('film_detay', args=[self.film.id])).func.__name__, "film_detay_async")
+        self._asgi_urls(False)
+        self.assertEqual(resolve(reverse('film_detay', args=[self.film.id])).func.__name__, "film_detay")
+
+    async def test_asgi_post_saves_comment_through_async_stack(self):
+        """
+        ASGI_MODE'da yorum POST'u async view + async middleware zincirinden geçer.
+        """
+        from asgiref.sync import sync_to_async
+
+        await sync_to_async(self._asgi_urls)(True)
+        await self.async_client.aforce_login(self.user)
+        url = reverse('film_detay', args=[self.film.id])
+        ajax = {"X-Requested-With": "XMLHttpRequest"}
+
+        response = await self.async_client.post(url, {'yorum_icerigi': 'Oyunculuk çok başarılıydı.'}, headers=ajax)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["ok"])
+        self.assertEqual(response["X-Content-Type-Options"], "nosniff")
+        yorum = await Yorum.objects.order_by("-id").afirst()
+        self.assertEqual((yorum.icerik, yorum.ai_durum), ("Oyunculuk çok başarılıydı.", Yorum.DURUM_BEKLIYOR))
+
+        response = await self.async_client.post(url, {'yorum_icerigi': 'a'}, headers=ajax)
+        self.assertEqual(response.status_code, 400)
+
+        response = await self.async_client.post(reverse('film_detay', args=[self.film.id + 100]),
+                                                {'yorum_icerigi': 'Güzel film'})
+        self.assertEqual(response.status_code, 404)
+
+
+class CircuitBreakerTest(TestCase):
+    def setUp(self):
+        from sinema_sitesi.circuit_breaker import CircuitBreaker
+
+        self.simdi = 0.0
+        self.devre = CircuitBreaker(hata_esigi=2, acik_sn=30, saat=lambda: self.simdi)
+
+    def test_state_transitions(self):
+        """
+        Eşik kadar ardışık hatada açılır; süre dolunca tek probe hakkı verilir, sonuca göre kapanır/açılır.
+        """
+        from sinema_sitesi.circuit_breaker import ACIK, GEC, KAPALI, PROBE, REDDET
+
+        self.devre.basarisiz()
+        self.devre.basarili()
+        self.devre.basarisiz()
+        self.assertEqual(self.devre.izin(), GEC)
+        self.devre.basarisiz()
+        self.assertEqual(self.devre.durum(), ACIK)
+        self.assertEqual(self.devre.izin(), REDDET)
+
+        self.simdi = 31
+        self.assertEqual(self.devre.izin(), PROBE)
+        self.assertEqual(self.devre.izin(), REDDET)
+        self.devre.probe_bitti(False)
+        self.assertEqual(self.devre.izin(), REDDET)
+
+        self.simdi = 62
+        self.assertEqual(self.devre.izin(), PROBE)
+        self.devre.probe_bitti(True)
+        self.assertEqual(self.devre.durum(), KAPALI)
+
+        m = self.devre.metrics()
+        self.assertEqual(m["gecis"], {"kapali->acik": 1, "acik->yari_acik": 2, "yari_acik->acik": 1, "yari_acik->kapali": 1})
+        self.assertEqual(m["hizli_red"], 3)
+        self.assertEqual((m["probe_basarili"], m["probe_basarisiz"]), (1, 1))
+
+    @override_settings(AI_MODE="api", AI_API_TIMEOUT=10)
+    @patch('sinema_sitesi.ai_client.http_client.get')
+    @patch('sinema_sitesi.ai_client.http_client.post')
+    def test_open_circuit_fails_fast_to_rules(self, mock_post, mock_get):
+        """
+        Devre açıkken servise gidilmez: kurallar karar verirse o döner, veremezse 'circuit_open'.
+        Yarı-açıkta sağlık kontrolü başarılıysa istekler tekrar servise gider.
+        """
+        import requests
+        from sinema_sitesi import ai_client
+        from sinema_sitesi.ai_replikalari import ReplikaHavuzu
+
+        havuz = ReplikaHavuzu(["http://ai:8001"], hata_esigi=2, acik_sn=30, saat=lambda: self.simdi)
+        mock_post.side_effect = requests.Timeout("yavaş")
+        with patch('sinema_sitesi.ai_client._havuz_al', return_value=havuz):
+            for _ in range(2):
+                self.assertEqual(ai_client.analiz_yap("Salı günü sinemaya gittik")["kaynak"], "api_error")
+            self.assertEqual(mock_post.call_count, 2)
+
+            kural = ai_client.analiz_yap("Bu film berbat")
+            bos = ai_client.analiz_yap("Salı günü sinemaya gittik")
+            toplu = ai_client.analiz_toplu_api(["Ne iyi ne kötü", "Oyuncular genç"])
+            self.assertEqual(mock_post.call_count, 2)
+            self.assertEqual((kural["karar"], kural["kaynak"]), ("OLUMSUZ", "fallback::Guardrail"))
+            self.assertEqual((bos["karar"], bos["kaynak"]), ("NÖTR", "circuit_open"))
+            self.assertEqual([t["kaynak"] for t in toplu], ["fallback::Guardrail", "circuit_open"])
+
+            self.simdi = 31
+            mock_get.return_value = MagicMock(status_code=200)
+            mock_post.side_effect = None
+            mock_post.return_value = MagicMock(
+                status_code=200, json=lambda: {"karar": "NÖTR", "guven_skoru": 0.6, "kaynak": "api::Ensemble"},
+            )
+            self.assertEqual(ai_client.analiz_yap("Salı günü sinemaya gittik")["kaynak"], "api::Ensemble")
+            metrik = ai_client.devre_metrikleri()
+
+        mock_get.assert_called_once()
+        self.assertEqual(metrik["replikalar"][0]["devre"]["durum"], "kapali")
+        self.assertEqual(metrik["yedek"], {"kural": 2, "karar_yok": 2})
+
+    @patch('filmler.services.analysis_queue.analyze_comments_batch')
+    def test_queue_defers_circuit_open_without_using_attempts(self, mock_batch):
+        """
+        'circuit_open' sonucu yorumu deneme hakkı harcamadan kuyruğa geri koymalı.
+        """
+        from filmler.services.analysis_queue import drain_once
+
+        film = Film.objects.create(isim="Matrix", puan=8.7, yil=1999)
+        yorum = Yorum.objects.create(film=film, icerik="Salı günü sinemaya gittik")
+        mock_batch.return_value = [{"decision": "NÖTR", "confidence": 0.0, "source": "circuit_open", "duration": 0.0}]
+        for _ in range(5):
+            drain_once()
+        yorum.refresh_from_db()
+        self.assertEqual((yorum.ai_durum, yorum.ai_deneme), (Yorum.DURUM_BEKLIYOR, 0))
+
+
+class AIReplikaTest(TestCase):
+    URLS = ["http://ai-a:8001", "http://ai-b:8001", "http://ai-c:8001"]
+
+    def test_p2c_prefers_less_loaded_replica(self):
+        """
+        İki replikadan uçuştaki isteği az olan seçilmeli.
+        """
+        from sinema_sitesi.ai_replikalari import ReplikaHavuzu
+
+        havuz = ReplikaHavuzu(self.URLS[:2])
+        a, b = havuz.replikalar
+        with havuz.kullan(a), havuz.kullan(a), havuz.kullan(b):
+            self.assertTrue(all(havuz.sec()[0] is b for _ in range(20)))
+        self.assertEqual((a.ucusta, a.istek, b.istek), (0, 2, 1))
+
+    def test_consistent_hashing_is_sticky_and_moves_only_ejected_keys(self):
+        """
+        Aynı normalize metin hep aynı replikaya gitmeli; replika düşünce sadece onun anahtarları taşınmalı.
+        """
+        from sinema_sitesi.ai_replikalari import ReplikaHavuzu
+        from yapay_zeka_servisi.kurallar import dedup_key
+
+        havuz = ReplikaHavuzu(self.URLS, hata_esigi=1, hashing=True, anahtar_fn=dedup_key)
+        metinler = [f"film {i} güzeldi" for i in range(300)]
+        once = {m: havuz.sec(m)[0].url for m in metinler}
+        self.assertEqual(set(once.values()), set(self.URLS))
+        self.assertEqual(havuz.sec("FILM 7 güzeldi!")[0].url, once["film 7 güzeldi"])
+
+        havuz.replikalar[0].devre.basarisiz()
+        sonra = {m: havuz.sec(m)[0].url for m in metinler}
+        for m in metinler:
+            if once[m] == self.URLS[0]:
+                self.assertNotEqual(sonra[m], self.URLS[0])
+            else:
+                self.assertEqual(sonra[m], once[m])
+
+    @override_settings(AI_MODE="api", AI_API_URLS=URLS[:2], AI_CB_HATA_ESIGI=2, AI_LB_HASH=False)
+    @patch('sinema_sitesi.ai_client.http_client.post')
+    def test_failover_and_passive_ejection(self, mock_post):
+        """
+        Bağlantı kurulamayan replikadaki istek diğerine aktarılmalı; replika eşikten sonra dışarı atılmalı.
+        """
+        import requests
+        from sinema_sitesi import ai_client
+
+        def cevap(url, **kwargs):
+            if url.startswith(self.URLS[0]):
+                raise requests.ConnectionError("refused")
+            return MagicMock(status_code=200, json=lambda: {"karar": "OLUMLU", "guven_skoru": 0.8, "kaynak": "api::Ensemble"})
+
+        mock_post.side_effect = cevap
+        sonuclar = [ai_client.analiz_yap(f"yorum {i}")["kaynak"] for i in range(30)]
+        self.assertEqual(set(sonuclar), {"api::Ensemble"})
+
+        a_istekleri = [c for c in mock_post.call_args_list if c.args[0].startswith(self.URLS[0])]
+        self.assertEqual(len(a_istekleri), 2)
+        replikalar = ai_client.devre_metrikleri()["replikalar"]
+        self.assertEqual([r["devre"]["durum"] for r in replikalar], ["acik", "kapali"])
+        self.assertEqual(replikalar[1]["istek"], 30)
+
+
+class AIClientTest(TestCase):
+    @override_settings(AI_MODE="api", AI_API_TIMEOUT=10)
+    @patch('sinema_sitesi.ai_client.http_client.post')
+    def test_api_mode_sends_deadline(self, mock_post):
+        """
+        API modunda istek, servisin BERT'i atlayabilmesi için kalan bütçeyi taşımalı.
+        """
+        from sinema_sitesi.ai_client import analiz_yap
+
+        mock_post.return_value = MagicMock(
+            status_code=200,
+            json=lambda: {"karar": "OLUMLU", "guven_skoru": 0.7, "kaynak": "api::Degraded-TFIDF"},
+        )
+        result = analiz_yap("Güzel film")
+
+        _, kwargs = mock_post.call_args
+        self.assertEqual(kwargs["headers"]["X-Deadline-Ms"], "10000")
+        self.assertEqual(kwargs["timeout"], 10)
+        self.assertEqual(result["kaynak"], "api::Degraded-TFIDF")
+        self.assertEqual(kwargs["headers"]["X-Priority"], "interactive")
+
+    @override_settings(AI_MODE="api", AI_API_TIMEOUT=10)
+    @patch('sinema_sitesi.ai_client.http_client.post')
+    def test_api_mode_queue_full(self, mock_post):
+        """
+        Servis yük atınca (503) yorum nötr ve 'api_busy' kaynağıyla kaydedilmeli.
+        """
+        import requests
+        from sinema_sitesi.ai_client import analiz_yap
+
+        resp = MagicMock(status_code=503)
+        mock_post.return_value = MagicMock(
+            raise_for_status=MagicMock(side_effect=requests.HTTPError(response=resp)),
+        )
+        result = analiz_yap("Güzel film", oncelik="bulk")
+
+        _, kwargs = mock_post.call_args
+        self.assertEqual(kwargs["headers"]["X-Priority"], "bulk")
+        self.assertEqual(result["kaynak"], "api_busy")
+        self.assertEqual(result["karar"], "NÖTR")
+
+    @override_settings(AI_MODE="direct")
+    def test_direct_mode_coalesces_identical_requests(self):
+        """
+        Aynı anda gelen özdeş yorumlar tek ensemble_single çağrısını paylaşmalı.
+        """
+        import threading
+        import time
+        from sinema_sitesi import ai_client
+
+        release = threading.Event()
+        calls = []
+
+        def slow_single(text):
+            calls.append(text)
+            release.wait(5)
+            return "OLUMLU", 0.9, "Ensemble", {}
+
+        mod = MagicMock(ensemble_single=slow_single, dedup_key=lambda t: t.strip().lower())
+        results = []
+        with patch('sinema_sitesi.ai_client.get_ensemble_module', return_value=mod):
+            threads = [
+                threading.Thread(target=lambda t=t: results.append(ai_client.analiz_yap(t)))
+                for t in ["Harika film", "harika film ", "HARIKA FILM", "Harika film"]
+            ]
+            for t in threads:
+                t.start()
+            # Follower'lar leader'a bağlanana kadar bekle
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline:
+                call = ai_client._flight._calls.get("harika film")
+                if call is not None and call.waiters == 3:
+                    break
+                time.sleep(0.01)
+            release.set()
+            for t in threads:
+                t.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(r["karar"] == "OLUMLU" for r in results))
+        self.assertEqual(ai_client._flight.in_flight(), 0)
+
+    @override_settings(AI_MODE="api", AI_API_TOPLU_BOYUT=2)
+    @patch('sinema_sitesi.ai_client.http_client.post')
+    def test_api_mode_batch_uses_bulk_endpoint(self, mock_post):
+        """
+        API modunda batch analiz /analiz/toplu ucuna AI_API_TOPLU_BOYUT'luk parçalarla gitmeli.
+        """
+        from filmler.services.sentiment_service import analyze_comments_batch
+
+        def cevap(url, **kwargs):
+            return MagicMock(status_code=200, json=lambda: {"sonuclar": [
+                {"karar": "OLUMLU", "guven_skoru": 0.8, "kaynak": "api::Ensemble"} for _ in kwargs["json"]["yorumlar"]
+            ]})
+
+        mock_post.side_effect = cevap
+        out = analyze_comments_batch(["iyi", "", "güzel", "harika"])
+
+        self.assertEqual([c.kwargs["json"]["yorumlar"] for c in mock_post.call_args_list], [["iyi", "güzel"], ["harika"]])
+        self.assertTrue(mock_post.call_args.args[0].endswith("/analiz/toplu"))
+        self.assertEqual(mock_post.call_args.kwargs["headers"]["X-Priority"], "bulk")
+        self.assertEqual([o["source"] for o in out], ["api::Ensemble", "invalid_input", "api::Ensemble", "api::Ensemble"])
+        self.assertEqual(out[0]["decision"], "OLUMLU")
+
+    @override_settings(AI_MODE="api", AI_API_TOPLU_BOYUT=2)
+    def test_async_client_pools_and_normalizes(self):
+        """
+        Async istemci loop başına tek AsyncClient kullanmalı; sonuçlar senkron sürümle aynı normalize edilmeli.
+        """
+        import asyncio
+        import httpx
+        from sinema_sitesi import http_client
+        from filmler.services.sentiment_service import analyze_comment_async, analyze_comments_batch_async
+
+        istekler = []
+
+        def handler(request):
+            import json
+            istekler.append(request)
+            if request.url.path == "/analiz/toplu":
+                yorumlar = json.loads(request.content)["yorumlar"]
+                if "yogun" in yorumlar:
+                    return httpx.Response(503, headers={"Retry-After": "1"})
+                return httpx.Response(200, json={"sonuclar": [
+                    {"karar": "Olumsuz", "guven_skoru": 0.6, "kaynak": "api::Ensemble"} for _ in yorumlar
+                ]})
+            return httpx.Response(200, json={"karar": "Olumlu", "guven_skoru": 0.8, "kaynak": "api::Ensemble"})
+
+        def istemci(site):
+            return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+        async def senaryo():
+            with patch('sinema_sitesi.http_client._yeni_async_istemci', side_effect=istemci) as fabrika:
+                tek = await analyze_comment_async("Güzel film")
+                toplu = await analyze_comments_batch_async(["kötü", "", "fena", "yogun"])
+                await http_client.aclose()
+            return tek, toplu, fabrika.call_count
+
+        tek, toplu, istemci_sayisi = asyncio.run(senaryo())
+
+        self.assertEqual(istemci_sayisi, 1)
+        self.assertEqual(istekler[0].headers["X-Priority"], "interactive")
+        self.assertEqual(istekler[1].headers["X-Priority"], "bulk")
+        self.assertEqual((tek["decision"], tek["source"]), ("OLUMLU", "api::Ensemble"))
+        self.assertEqual(
+            [(o["decision"], o["source"]) for o in toplu],
+            [("OLUMSUZ", "api::Ensemble"), ("NÖTR", "invalid_input"), ("OLUMSUZ", "api::Ensemble"), ("NÖTR", "api_busy")],
+        )
+
+    @override_settings(AI_MODE="direct")
+    def test_async_direct_mode_loads_model_off_loop(self):
+        """
+        Async yolda model yüklemesi (get_ensemble_module) event loop thread'inde yapılmamalı.
+        """
+        import asyncio
+        import threading
+        from sinema_sitesi import ai_client
+
+        yukleyen = []
+
+        def yukle():
+            yukleyen.append(threading.current_thread())
+            return None  # yüklenemedi -> API yolu
+
+        async def senaryo():
+            with patch('sinema_sitesi.ai_client._ensemble_module', None), \
+                    patch('sinema_sitesi.ai_client.get_ensemble_module', side_effect=yukle):
+                return threading.current_thread(), await ai_client._direct_hazir()
+
+        loop_thread, hazir = asyncio.run(senaryo())
+        self.assertFalse(hazir)
+        self.assertEqual(len(yukleyen), 1)
+        self.assertIsNot(yukleyen[0], loop_thread)
@@ -1,21 +1,23 @@
+import asyncio
 import logging
-import random
-
 
+from asgiref.sync import sync_to_async
 from django.contrib import messages
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.http import Http404, HttpResponseNotModified, JsonResponse
+from django.utils.cache import patch_cache_control
 from django.shortcuts import render, redirect, get_object_or_404
-from django.db.models import Q
 
 from .forms import UserRegisterForm
 from .models import Film, Yorum
 
 # Services
-from .services.moderation_service import kufur_kontrol, anlamsiz_mi
-from .services.sentiment_service import analyze_comment, get_sentiment_badge
-from .services.tmdb_service import fetch_movie_details
+from .services.moderation_service import denetle
+from .services.sentiment_service import get_sentiment_badge, PENDING_BADGE
+from .services import analysis_queue, autocomplete, dashboard_service, pagination, search_service
+from .services.stats_service import film_stats, SAYAC_ALANLARI
+from .services.tmdb_service import aget_movie_details, get_movie_details
 
 
 
@@ -31,96 +33,111 @@ def live_search(request):
     term = request.GET.get("term", "").strip()
     results = []
 
-    if len(term) > 1:
-        # Performans: DB seviyesinde arama yap
-        filmler = Film.objects.filter(isim__icontains=term)[:10]
-
-        for film in filmler:
-            results.append({
-                "id": film.id,
-                "isim": film.isim,
-                "poster": film.poster_url,
-                "yil": film.yil,
-                "puan": film.puan,
-            })
+    # ETag = indeks sürümü: katalog değişmediyse tarayıcı 304 alır
+    etag = f'W/"ac-{autocomplete.mevcut_surum()}"'
+    if etag in request.headers.get("If-None-Match", ""):
+        response = HttpResponseNotModified()
+    else:
+        if len(term) > 1:
+            # Performans: DB yerine süreç içi önek indeksi (Türkçe katlamalı, 1 harf hata toleranslı)
+            results = autocomplete.ara(term, limit=10)
+        response = JsonResponse(results, safe=False)
 
-    return JsonResponse(results, safe=False)
+    response["ETag"] = etag
+    patch_cache_control(response, public=True, max_age=60)
+    return response
 
 
 # --- 2. ANA SAYFA (FİLTRELEME & SIRALAMA) ---
+GRID_SAYFA_BOYUTU = 24
+YORUM_SAYFA_BOYUTU = 20
+
+# Grid sıralamaları (keyset; son alan tekil). Bileşik indeksler: Film.Meta.indexes
+GRID_SIRALAMA = {
+    "puan": ("-puan", "id"),
+    "yeni": ("-yil", "-id"),
+    "": ("-id",),
+}
+KART_ALANLARI = ("id", "isim", "poster_url", "puan", "yil", "turler")
+# Yorumlar: yeniden eskiye, aynı anda yazılanlar id ile (Yorum.Meta.indexes)
+YORUM_SIRALAMA = ("-tarih", "id")
+
+
+def _grid_sayfasi(q, kategori, sirala, imlec=None):
+    """
+    Grid modunun bir sayfası: (filmler, sonraki_imleç).
+    Sıralama seçilmemiş aramada FTS alaka sırası kullanılır (imleç = sıra konumu),
+    diğer durumlarda keyset sayfalama.
+    """
+    filmler = Film.objects.only(*KART_ALANLARI)
+    if kategori:
+        # Tur.isim (unique) + M2M üzerinden indeksli join
+        filmler = filmler.filter(kategoriler__isim=kategori)
+
+    if q and not sirala:
+        # FTS5 (isim, oyuncular, türler, konu) alaka sırası; ids en fazla MAX_SONUC
+        ids = search_service.eslesen_idler(q)
+        if ids is not None:
+            if kategori:
+                uygun = set(filmler.filter(id__in=ids).values_list("id", flat=True))
+                ids = [i for i in ids if i in uygun]
+            bas = pagination.imlec_coz(imlec, 1)[0] if imlec else 0
+            if not isinstance(bas, int) or bas < 0:
+                raise pagination.GecersizImlec("konum")
+            sayfa_ids = ids[bas:bas + GRID_SAYFA_BOYUTU]
+            bulunan = filmler.in_bulk(sayfa_ids)
+            sonraki = bas + GRID_SAYFA_BOYUTU
+            return (
+                [bulunan[i] for i in sayfa_ids if i in bulunan],
+                pagination.imlec_olustur([sonraki]) if sonraki < len(ids) else None,
+            )
+
+    if q:
+        filmler = search_service.ara(filmler, q, sirala=False)
+    return pagination.keyset_sayfa(
+        filmler, GRID_SIRALAMA.get(sirala, GRID_SIRALAMA[""]), imlec, GRID_SAYFA_BOYUTU,
+    )
+
+
 @login_required
 def anasayfa(request):
     """
     Ana sayfa:
     - Varsayılan: Dashboard Modu (Hero, Popüler, Yeni, Kategoriler)
-    - Arama/Filtre: Grid Modu (Mevcut yapı)
+    - Arama/Filtre: Grid Modu (ilk sayfa; devamı film_listesi JSON ucundan)
     """
     q = request.GET.get("q", "").strip()
     kategori = request.GET.get("kategori", "")
     sirala = request.GET.get("sirala", "")
     mode_param = request.GET.get("mode", "")
 
-    # FİLTRELEME MODU (Eski Grid Yapısı)
+    # FİLTRELEME MODU (Grid)
     if q or kategori or sirala or mode_param == "liste":
-        filmler = Film.objects.all()
-        if kategori:
-            filmler = filmler.filter(turler__icontains=kategori)
-        if sirala == "puan":
-            filmler = filmler.order_by("-puan")
-        elif sirala == "yeni":
-            filmler = filmler.order_by("-yil")
-        else:
-            filmler = filmler.order_by("-id")
-        
-        if q:
-            filmler = filmler.filter(isim__icontains=q).distinct()
+        filmler, sonraki = _grid_sayfasi(q, kategori, sirala)
 
         return render(request, "anasayfa.html", {
             "mode": "search",
             "filmler": filmler,
+            "sonraki_imlec": sonraki,
             "q": q,
             "secili_kategori": kategori,
+            "sirala": sirala,
         })
 
     # DASHBOARD MODU (Netflix Style)
     else:
-        # 1. Hero Section: Fragmanı olan & Puanı > 6.5 olan filmler (Carousel için)
-        # Filtre: Fragman var VE Puan > 6.5
-        hero_candidates = list(Film.objects.filter(
-            Q(fragman_url__isnull=False) & ~Q(fragman_url="") & Q(puan__gt=6.5)
-        ))
-        
-        # Rastgele 5 tane seç (yoksa hepsini al)
-        hero_movies = random.sample(hero_candidates, min(len(hero_candidates), 5))
-
-        # HD Poster URL oluştur (w500 vb. -> original)
-        import re
-        for movie in hero_movies:
-            if movie.poster_url:
-                # /w500/, /w300/, etc. -> /original/
-                movie.poster_url_hd = re.sub(r'/w\d+/', '/original/', movie.poster_url)
-            else:
-                movie.poster_url_hd = ""
-
-        # 2. Popüler (IMDb Puanına Göre)
-        popular_movies = Film.objects.all().order_by("-puan")[:15]
-
-        # 3. Yeni Eklenenler (ID'ye göre)
-        new_arrivals = Film.objects.all().order_by("-id")[:15]
-
-        # 4. Kategori Bazlı Listeler
-        action_movies = Film.objects.filter(turler__icontains="Aksiyon")[:10]
-        comedy_movies = Film.objects.filter(turler__icontains="Komedi")[:10]
-        horror_movies = Film.objects.filter(turler__icontains="Korku")[:10]
+        # Bölümler cache'ten gelir (dashboard_service); katalog değişince yeniden hesaplanır
+        bolumler = dashboard_service.bolumler()
 
         return render(request, "anasayfa.html", {
             "mode": "dashboard",
-            "hero_movies": hero_movies,
-            "popular": popular_movies,
-            "newest": new_arrivals,
-            "action": action_movies,
-            "comedy": comedy_movies,
-            "horror": horror_movies,
+            # Hero: Fragmanı olan & Puanı > 6.5 olan filmlerden rastgele 5 tane
+            "hero_movies": dashboard_service.hero_filmleri(bolumler["hero_ids"]),
+            "popular": bolumler["popular"],
+            "newest": bolumler["newest"],
+            "action": bolumler["action"],
+            "comedy": bolumler["comedy"],
+            "horror": bolumler["horror"],
         })
 
 
@@ -153,120 +170,200 @@ def film_detay(request, film_id):
     """Film detay sayfası: bilgiler, fragman, AI duygu analizi."""
     film = get_object_or_404(Film, id=film_id)
 
+    # Yorum Gönderme
+    if request.method == "POST":
+        return _yorum_gonder(request, film)
+
+    # Yorumlar (ilk sayfa; devamı yorum_listesi ucundan) & İstatistikler (sayaçlardan, COUNT yok)
+    yorumlar, yorum_imleci = pagination.keyset_sayfa(film.yorumlar.all(), YORUM_SIRALAMA, boyut=YORUM_SAYFA_BOYUTU)
+
+    # TMDB Ek Bilgiler (yerel önbellekten; bayatsa arka planda tazelenir)
+    tmdb_data = get_movie_details(film)
+
+    return render(request, "detay.html", _detay_baglami(film, yorumlar, yorum_imleci, tmdb_data))
+
+
+@login_required
+async def film_detay_async(request, film_id):
+    """
+    film_detay'ın ASGI hali (settings.ASGI_MODE, uvicorn): yorum sayfası ile film + TMDB detayları
+    asyncio.gather ile eşzamanlı alınır (async ORM + httpx); sayfa süresi toplam değil en uzun bağımlılık.
+    """
+    if request.method == "POST":
+        film = await Film.objects.filter(id=film_id).afirst()
+        if film is None:
+            raise Http404
+        return await sync_to_async(_yorum_gonder)(request, film)
+
+    async def film_ve_tmdb():
+        film = await Film.objects.filter(id=film_id).afirst()
+        # TMDB önbelleği boşsa canlı çekim burada yorum sorgusuyla örtüşür
+        return film, (await aget_movie_details(film) if film is not None else None)
+
+    (yorumlar, yorum_imleci), (film, tmdb_data) = await asyncio.gather(
+        pagination.akeyset_sayfa(
+            Yorum.objects.filter(film_id=film_id), YORUM_SIRALAMA, boyut=YORUM_SAYFA_BOYUTU,
+        ),
+        film_ve_tmdb(),
+    )
+    if film is None:
+        raise Http404
+
+    # Template (context processor'lar: request.user, messages) thread'de render edilir
+    return await sync_to_async(render)(
+        request, "detay.html", _detay_baglami(film, yorumlar, yorum_imleci, tmdb_data),
+    )
+
+
+def _yorum_gonder(request, film):
+    """Detay sayfasından yorum POST'u (normal form veya AJAX)."""
     # --- AJAX mi kontrol ---
     is_ajax = request.headers.get("X-Requested-With") == "XMLHttpRequest"
 
-    # Yorum Gönderme
-    if request.method == "POST":
-        gelen_yorum = request.POST.get("yorum_icerigi", "").strip()
-
-        # 🚫 Küfür kontrolü
-        if kufur_kontrol(gelen_yorum):
-            msg = "⛔ Yorumunuz uygunsuz ifade içeriyor. Lütfen saygılı bir dil kullanın."
-            if is_ajax:
-                return JsonResponse({"ok": False, "error": msg}, status=400)
-            messages.error(request, msg)
-            return redirect("film_detay", film_id=film.id)
-
-        if len(gelen_yorum) < 2:
-            msg = "Yorum çok kısa."
-            if is_ajax:
-                return JsonResponse({"ok": False, "error": msg}, status=400)
-            messages.warning(request, msg)
-            return redirect("film_detay", film_id=film.id)
-
-        # 🚫 Anlamsız metin kontrolü
-        if anlamsiz_mi(gelen_yorum):
-            msg = "⛔ Yorumunuz anlamlı bir metin içermiyor. Lütfen gerçek bir yorum yazın."
-            if is_ajax:
-                return JsonResponse({"ok": False, "error": msg}, status=400)
-            messages.error(request, msg)
-            return redirect("film_detay", film_id=film.id)
-
-        # AI Analiz
-        sentiment_result = analyze_comment(gelen_yorum)
-        ai_karar = sentiment_result["decision"]
-        ai_guven = sentiment_result["confidence"]
-        ai_kaynak = sentiment_result["source"]
-
-        # Yorum Kaydet
-        yeni_yorum = Yorum.objects.create(
-            film=film,
-            kullanici_adi=request.user.username,
-            icerik=gelen_yorum,
-            ai_karari=ai_karar,
-            ai_guveni=ai_guven,
-            ai_kaynak=ai_kaynak,
-        )
+    gelen_yorum = request.POST.get("yorum_icerigi", "").strip()
+    # Küfür + anlamsızlık kararı tek geçişte
+    moderasyon = denetle(gelen_yorum)
 
+    # 🚫 Küfür kontrolü
+    if moderasyon["kufur"]:
+        msg = "⛔ Yorumunuz uygunsuz ifade içeriyor. Lütfen saygılı bir dil kullanın."
         if is_ajax:
-            # Badge bilgisi
-            badge = get_sentiment_badge(ai_karar)
-
-            # Güncel istatistikler
-            yorumlar_qs = film.yorumlar.all()
-            total = yorumlar_qs.count()
-            pos = yorumlar_qs.filter(ai_karari="OLUMLU").count()
-            neg = yorumlar_qs.filter(ai_karari="OLUMSUZ").count()
-            neu = yorumlar_qs.filter(ai_karari="NÖTR").count()
-
-            return JsonResponse({
-                "ok": True,
-                "yorum": {
-                    "kullanici": yeni_yorum.kullanici_adi,
-                    "tarih": yeni_yorum.tarih.strftime("%d %b %Y"),
-                    "icerik": yeni_yorum.icerik,
-                    "ai_karari": ai_karar,
-                    "badge_text": badge["text"],
-                    "badge_cls": badge["cls"],
-                    "sent_key": badge["sent"],
-                    "avatar": yeni_yorum.kullanici_adi[0].upper(),
-                },
-                "stats": {
-                    "pos": pos, "neg": neg, "neu": neu, "total": total,
-                    "pos_pct": round(pos / total * 100) if total else 0,
-                    "neg_pct": round(neg / total * 100) if total else 0,
-                    "neu_pct": round(neu / total * 100) if total else 0,
-                },
-            })
-
-        messages.success(request, "Yorumunuz kaydedildi.")
+            return JsonResponse({"ok": False, "error": msg}, status=400)
+        messages.error(request, msg)
         return redirect("film_detay", film_id=film.id)
 
-    # Yorumlar & İstatistikler
-    yorumlar = film.yorumlar.all().order_by("-tarih")
-    total = yorumlar.count()
-    pos = yorumlar.filter(ai_karari="OLUMLU").count()
-    neg = yorumlar.filter(ai_karari="OLUMSUZ").count()
-    neu = yorumlar.filter(ai_karari="NÖTR").count()
-
-    stats = {
-        "pos": pos,
-        "neg": neg,
-        "neu": neu,
-        "total": total,
-        "pos_pct": round(pos / total * 100) if total else 0,
-        "neg_pct": round(neg / total * 100) if total else 0,
-        "neu_pct": round(neu / total * 100) if total else 0,
-    }
+    if len(gelen_yorum) < 2:
+        msg = "Yorum çok kısa."
+        if is_ajax:
+            return JsonResponse({"ok": False, "error": msg}, status=400)
+        messages.warning(request, msg)
+        return redirect("film_detay", film_id=film.id)
 
-    # TMDB Ek Bilgiler
-    tmdb_data = fetch_movie_details(film.isim, existing_trailer_url=film.fragman_url)
-
-    return render(
-        request,
-        "detay.html",
-        {
-            "film": film,
-            "yorumlar": yorumlar,
-            "stats": stats,
-            "runtime_minutes": tmdb_data["runtime"],
-            "genres_text": tmdb_data["genres"],
-            "backdrop_url": tmdb_data["backdrop_url"],
-            "cast_list": tmdb_data["cast_list"],
-            "trailer_watch_url": tmdb_data["trailer_watch_url"],
-        },
+    # 🚫 Anlamsız metin kontrolü
+    if moderasyon["anlamsiz"]:
+        msg = "⛔ Yorumunuz anlamlı bir metin içermiyor. Lütfen gerçek bir yorum yazın."
+        if is_ajax:
+            return JsonResponse({"ok": False, "error": msg}, status=400)
+        messages.error(request, msg)
+        return redirect("film_detay", film_id=film.id)
+
+    # Yorum Kaydet (AI analizi arka planda: analysis_queue worker'ı)
+    yeni_yorum = Yorum.objects.create(
+        film=film,
+        kullanici_adi=request.user.username,
+        icerik=gelen_yorum,
+        ai_durum=Yorum.DURUM_BEKLIYOR,
     )
+    analysis_queue.notify()
+
+    if is_ajax:
+        # Sayaçlar F() ile güncellendi; sadece onları tazele
+        film.refresh_from_db(fields=SAYAC_ALANLARI)
+        return JsonResponse({
+            "ok": True,
+            "yorum": _yorum_json(yeni_yorum),
+            "stats": film_stats(film),
+        })
+
+    messages.success(request, "Yorumunuz kaydedildi. AI analizi birkaç saniye içinde görünecek.")
+    return redirect("film_detay", film_id=film.id)
+
+
+def _detay_baglami(film, yorumlar, yorum_imleci, tmdb_data):
+    return {
+        "film": film,
+        "yorumlar": yorumlar,
+        "yorum_imleci": yorum_imleci,
+        # İstatistikler Film sayaçlarından (ayrı sorgu yok)
+        "stats": film_stats(film),
+        "runtime_minutes": tmdb_data["runtime"],
+        "genres_text": tmdb_data["genres"],
+        "backdrop_url": tmdb_data["backdrop_url"],
+        "cast_list": tmdb_data["cast_list"],
+        "trailer_watch_url": tmdb_data["trailer_watch_url"],
+    }
+
+
+def _yorum_json(yorum):
+    """AJAX yanıtları için yorum + rozet bilgisi."""
+    badge = PENDING_BADGE if yorum.analiz_bekliyor else get_sentiment_badge(yorum.ai_karari)
+    return {
+        "id": yorum.id,
+        "durum": yorum.ai_durum,
+        "kullanici": yorum.kullanici_adi,
+        "tarih": yorum.tarih.strftime("%d %b %Y"),
+        "icerik": yorum.icerik,
+        "ai_karari": yorum.ai_karari,
+        "badge_text": badge["text"],
+        "badge_cls": badge["cls"],
+        "sent_key": badge["sent"],
+        "avatar": yorum.kullanici_adi[0].upper(),
+    }
+
+
+@login_required
+def yorum_durum(request, film_id):
+    """
+    Analizi bekleyen yorumların durumunu döner (detay sayfası polling yapar).
+    ?ids=1,2,3 -> {"yorumlar": [...], "stats": {...}, "bekleyen": n}
+    """
+    film = get_object_or_404(Film, id=film_id)
+    try:
+        ids = [int(x) for x in request.GET.get("ids", "").split(",") if x.strip()][:50]
+    except ValueError:
+        return JsonResponse({"ok": False, "error": "Geçersiz id listesi."}, status=400)
+
+    yorumlar = [_yorum_json(y) for y in film.yorumlar.filter(id__in=ids)]
+    return JsonResponse({
+        "ok": True,
+        "yorumlar": yorumlar,
+        "stats": film_stats(film),
+        "bekleyen": sum(1 for y in yorumlar if y["sent_key"] == "pending"),
+    })
+
+
+@login_required
+def film_listesi(request):
+    """
+    Grid "daha fazla yükle" ucu (anasayfa ile aynı q/kategori/sirala parametreleri).
+    ?imlec=... -> {"filmler": [...], "sonraki": imleç|null}
+    """
+    try:
+        filmler, sonraki = _grid_sayfasi(
+            request.GET.get("q", "").strip(),
+            request.GET.get("kategori", ""),
+            request.GET.get("sirala", ""),
+            request.GET.get("imlec") or None,
+        )
+    except pagination.GecersizImlec:
+        return JsonResponse({"ok": False, "error": "Geçersiz imleç."}, status=400)
+
+    return JsonResponse({
+        "ok": True,
+        "filmler": [{alan: getattr(f, alan) for alan in KART_ALANLARI} for f in filmler],
+        "sonraki": sonraki,
+    })
+
+
+@login_required
+def yorum_listesi(request, film_id):
+    """
+    Yorum listesinin devamı (yeniden eskiye).
+    ?imlec=... -> {"yorumlar": [...], "sonraki": imleç|null}
+    """
+    film = get_object_or_404(Film.objects.only("id"), id=film_id)
+    try:
+        yorumlar, sonraki = pagination.keyset_sayfa(
+            film.yorumlar.all(), YORUM_SIRALAMA, request.GET.get("imlec") or None, YORUM_SAYFA_BOYUTU,
+        )
+    except pagination.GecersizImlec:
+        return JsonResponse({"ok": False, "error": "Geçersiz imleç."}, status=400)
+
+    return JsonResponse({
+        "ok": True,
+        "yorumlar": [_yorum_json(y) for y in yorumlar],
+        "sonraki": sonraki,
+    })
 
 
 # --- 5. TOPLU FİLM EKLEME (YEDEK) ---
@@ -279,4 +376,16 @@ def toplu_film_ekle(request):
     return redirect("anasayfa")
 
 
+# --- 6. İÇ METRİKLER (Sadece Staff) ---
+@staff_member_required
+def http_metrikleri(request):
+    """Dış HTTP çağrılarının bağlantı havuzu / keep-alive metrikleri."""
+    from sinema_sitesi import http_client
+    return JsonResponse(http_client.metrics())
+
 
+@staff_member_required
+def ai_metrikleri(request):
+    """AI servisi devre kesicisi: durum, geçişler, hızlı red ve yedek yol sayaçları."""
+    from sinema_sitesi import ai_client
+    return JsonResponse(ai_client.devre_metrikleri())
@@ -0,0 +1,175 @@
+"""
+Yerelde birden çok AI servisi replikası başlatır (ai_client yük dağıtımını denemek için).
+
+    python scripts/ai_replikalari.py --adet 3 --port 8001
+        -> yapay_zeka_servisi.main_api'yi 8001..8003'te uvicorn ile başlatır, AI_API_URLS satırını
+           yazdırır ve Ctrl+C'ye kadar bekler (site: AI_MODE=api AI_API_URLS=... python manage.py runserver)
+    python scripts/ai_replikalari.py --sahte --adet 3 --yuk 300 --oldur 1
+    python scripts/ai_replikalari.py --sahte --adet 3 --yuk 300 --hash
+
+--sahte: model yüklemeyen hafif replikalar (/analiz kaynağı "api::r<N>", --gecikme kadar bekler).
+--yuk M: M analiz_yap çağrısı (--thread eşzamanlı) yapılır, replika başına dağılım ve
+devre_metrikleri() yazdırılır. --oldur k: yarı yolda k. replika öldürülür (pasif dışarı atma + failover).
+--hash: AI_LB_HASH; aynı metnin hep aynı replikaya gittiği kontrol edilir.
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+KOK = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(KOK)
+
+
+def sahte_sunucu(port, ad, gecikme):
+    import uvicorn
+    from fastapi import FastAPI
+
+    app = FastAPI()
+
+    @app.get("/")
+    def kok():
+        return {"durum": "aktif", "servis": ad}
+
+    @app.post("/analiz")
+    def analiz(veri: dict):
+        time.sleep(gecikme)
+        return {"karar": "NÖTR", "guven_skoru": 0.5, "kaynak": f"api::{ad}"}
+
+    @app.post("/analiz/toplu")
+    def analiz_toplu(veri: dict):
+        time.sleep(gecikme)
+        return {"sonuclar": [{"karar": "NÖTR", "guven_skoru": 0.5, "kaynak": f"api::{ad}"} for _ in veri["yorumlar"]]}
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def baslat(args):
+    surecler = []
+    for i in range(args.adet):
+        port = args.port + i
+        if args.sahte:
+            komut = [sys.executable, os.path.abspath(__file__), "--sahte-sunucu",
+                     "--port", str(port), "--ad", f"r{i + 1}", "--gecikme", str(args.gecikme)]
+        else:
+            komut = [sys.executable, "-m", "uvicorn", "yapay_zeka_servisi.main_api:app",
+                     "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"]
+        surecler.append(subprocess.Popen(komut, cwd=KOK))
+    return surecler
+
+
+def hazir_bekle(urls, sure):
+    bitis = time.monotonic() + sure
+    for url in urls:
+        while True:
+            try:
+                if requests.get(f"{url}/", timeout=1).status_code == 200:
+                    break
+            except requests.RequestException:
+                pass
+            if time.monotonic() > bitis:
+                raise SystemExit(f"{url} {sure:g} sn içinde ayağa kalkmadı")
+            time.sleep(0.2)
+
+
+def yuk_testi(args, urls, surecler):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "sinema_sitesi.settings")
+    os.environ.setdefault("SECRET_KEY", "yerel-replika-testi")
+    os.environ.update({
+        "AI_MODE": "api",
+        "AI_API_URLS": ",".join(urls),
+        "AI_LB_HASH": str(args.hash),
+        "AI_QUEUE_WORKER": "False",
+        "DISABLE_WARMUP": "1",
+    })
+    import logging
+
+    import django
+    django.setup()
+    from sinema_sitesi import ai_client
+
+    # İstek başına INFO satırları dağılımı boğmasın; hata/uyarılar görünür kalır
+    logging.getLogger("sinema_sitesi.ai_client").setLevel(logging.WARNING)
+
+    rnd = random.Random(42)
+    # Tekrarlı metinler: hashing'de aynı metin aynı replikaya gitmeli
+    metinler = [f"Film {rnd.randint(1, args.yuk // 3 + 1)} hakkında yorum" for _ in range(args.yuk)]
+    oldurulecek = surecler[args.oldur - 1] if args.oldur else None
+
+    def cagir(i):
+        if oldurulecek is not None and i == args.yuk // 2:
+            oldurulecek.kill()
+            print(f"-> {urls[args.oldur - 1]} öldürüldü")
+        return metinler[i], ai_client.analiz_yap(metinler[i])
+
+    t0 = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.thread) as pool:
+        sonuclar = list(pool.map(cagir, range(args.yuk)))
+    sure = time.monotonic() - t0
+
+    dagilim = Counter(s["kaynak"] for _, s in sonuclar)
+    print(f"\n{args.yuk} istek, {sure:.2f}s ({args.yuk / sure:.0f} istek/sn)")
+    for kaynak, adet in sorted(dagilim.items()):
+        print(f"  {kaynak:<24} {adet}")
+
+    if args.hash:
+        replikalar = defaultdict(set)
+        for metin, s in sonuclar[: args.yuk // 2 if oldurulecek else args.yuk]:
+            replikalar[metin].add(s["kaynak"])
+        dagilan = sum(1 for r in replikalar.values() if len(r) > 1)
+        print(f"Hashing: {len(replikalar)} farklı metin, birden çok replikaya giden: {dagilan}")
+
+    metrik = ai_client.devre_metrikleri()
+    print(f"\nStrateji: {metrik['strateji']}, yedek yol: {metrik['yedek']}")
+    for r in metrik["replikalar"]:
+        print(f"  {r['url']:<24} istek {r['istek']:<5} hata {r['hata']:<3} devre {r['devre']['durum']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--adet", type=int, default=3, help="Replika sayısı")
+    parser.add_argument("--port", type=int, default=8001, help="İlk replikanın portu (sonrakiler +1)")
+    parser.add_argument("--sahte", action="store_true", help="Model yüklemeyen hafif replikalar")
+    parser.add_argument("--gecikme", type=float, default=0.01, help="Sahte replika yanıt gecikmesi (sn)")
+    parser.add_argument("--bekle", type=float, default=120.0, help="Replikaların ayağa kalkma süresi sınırı (sn)")
+    parser.add_argument("--yuk", type=int, default=0, help="Bu kadar analiz_yap çağrısı yap ve çık")
+    parser.add_argument("--thread", type=int, default=16, help="Yük testinde eşzamanlı çağrı")
+    parser.add_argument("--hash", action="store_true", help="AI_LB_HASH (tutarlı hashing)")
+    parser.add_argument("--oldur", type=int, default=0, help="Yük testinin yarısında bu replikayı (1..adet) öldür")
+    parser.add_argument("--sahte-sunucu", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--ad", default="r1", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.sahte_sunucu:
+        sahte_sunucu(args.port, args.ad, args.gecikme)
+        return
+    if args.oldur and not 1 <= args.oldur <= args.adet:
+        parser.error("--oldur 1..adet aralığında olmalı")
+
+    urls = [f"http://127.0.0.1:{args.port + i}" for i in range(args.adet)]
+    surecler = baslat(args)
+    try:
+        hazir_bekle(urls, args.bekle)
+        print(f"AI_API_URLS={','.join(urls)}")
+        if args.yuk:
+            yuk_testi(args, urls, surecler)
+        else:
+            for p in surecler:
+                p.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for p in surecler:
+            p.terminate()
+        for p in surecler:
+            p.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Moderasyon motoru benchmark'ı: eski kufur_kontrol + anlamsiz_mi vs. denetle().
+
+- Eski fonksiyonlar (her çağrıda ayrı lower + regex geçişleri, her çağrıda
+  yeniden derlenen ünsüz regex'i) eşdeğerlik testiyle birlikte filmler/tests.py'de durur.
+- Karışık bir korpusta (gerçekçi yorumlar, küfür, spam, büyük harf, uzatma,
+  noktalama, rastgele karakterler) kararların AYNI olduğunu assert eder.
+- Yorum başına süreyi ve hızlanmayı yazdırır.
+
+Çalıştırma:
+    python scripts/bench_moderation.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from filmler.services.moderation_service import (  # noqa: E402
+    BLACKLIST,
+    KUFUR_LISTESI,
+    TURKCE_SOZLUK,
+    denetle,
+)
+
+REPEAT = 5
+
+
+# --- KORPUS ---
+CUMLELER = [
+    "Bu film gerçekten harikaydı, oyunculuk çok başarılı.",
+    "Senaryo zayıftı ama görseller muhteşem, yine de tavsiye ederim.",
+    "Hiç beğenmedim, çok sıkıcı ve uzun bir filmdi.",
+    "İyi", "Ok.", "Evet", "süperrrrr", "KESİNLİKLE İZLEYİN!!!", "ISPARTA'da izledim",
+    "asdasdasd", "qweqweqwe", "dmşkamk", "strkpl", "s.a.l.a.k", "a.mk", "??????",
+    "hahahahahah", "aaaaaaaaaa", "Senin amk", "O bir yavşak", "SIKICI", "sg", "mk",
+    "film \n güzel", "   ", "x", "Çok güzel bir film 10/10 👍", "ne ne ne ne",
+]
+ALFABE = "abcçdefgğhıijklmnoöprsştuüvyzqwxABCÇDEFGĞHIİJKLMNOÖPRSŞTUÜVYZ .,!?'\n0123456789"
+
+
+def korpus(n, seed=42):
+    rnd = random.Random(seed)
+    kelimeler = sorted(TURKCE_SOZLUK | KUFUR_LISTESI | BLACKLIST)
+    out = list(CUMLELER)
+    while len(out) < n:
+        tur = rnd.random()
+        if tur < 0.5:
+            metin = " ".join(rnd.choice(kelimeler) for _ in range(rnd.randint(1, 25)))
+        elif tur < 0.7:
+            metin = "".join(rnd.choice(ALFABE) for _ in range(rnd.randint(1, 40)))
+        elif tur < 0.85:
+            metin = rnd.choice(CUMLELER)
+            metin = metin.upper() if rnd.random() < 0.5 else metin + rnd.choice("!?.") * rnd.randint(1, 5)
+        else:
+            parca = "".join(rnd.choice("asdqwerty") for _ in range(rnd.randint(2, 4)))
+            metin = parca * rnd.randint(1, 6)
+        out.append(metin)
+    return out
+
+
+def _olc(fn, metinler):
+    en_iyi = float("inf")
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        fn(metinler)
+        en_iyi = min(en_iyi, time.perf_counter() - t0)
+    return en_iyi
+
+
+def main():
+    # Referans uygulama test modülünde (Django ayarları gerekir)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "sinema_sitesi.settings")
+    os.environ.setdefault("SECRET_KEY", "bench-moderation")
+    os.environ.update({"AI_QUEUE_WORKER": "False", "DISABLE_WARMUP": "1"})
+    import django
+    django.setup()
+    from filmler.tests import legacy_anlamsiz_mi, legacy_kufur_kontrol
+
+    def legacy_toplu(metinler):
+        return [(legacy_kufur_kontrol(t), legacy_anlamsiz_mi(t)) for t in metinler]
+
+    def yeni_toplu(metinler):
+        return [denetle(t) for t in metinler]
+
+    metinler = korpus(20000)
+
+    # 1. Eşdeğerlik
+    yeni = yeni_toplu(metinler)
+    for metin, (kufur, anlamsiz), karar in zip(metinler, legacy_toplu(metinler), yeni):
+        assert (karar["kufur"], karar["anlamsiz"]) == (kufur, anlamsiz), (metin, karar, kufur, anlamsiz)
+    print(f"Eşdeğerlik: {len(metinler)} metin, kararlar aynı.")
+
+    # 2. Hız
+    eski_sn = _olc(legacy_toplu, metinler)
+    tekli_sn = _olc(yeni_toplu, metinler)
+    n = len(metinler)
+    print(f"eski (kufur_kontrol + anlamsiz_mi): {eski_sn / n * 1e6:7.2f} µs/yorum")
+    print(f"denetle:                            {tekli_sn / n * 1e6:7.2f} µs/yorum  (x{eski_sn / tekli_sn:.2f})")
+    assert tekli_sn < eski_sn, "Motor eski fonksiyonlardan yavaş!"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Kural motoru (NeutralRule) için kötü durum (pathological input) benchmark'ı.
+
+- Eski `.*?` zincirli regex'ler ile yeni token-sequence eşleştiricinin
+  rastgele bir korpus üzerinde AYNI kararı verdiğini doğrular.
+- MAX_TEXT_LENGTH uzunluğunda tekrarlı/kurgulanmış metinlerde metin başına
+  gecikmenin LATENCY_CEILING_MS altında kaldığını assert eder.
+
+Çalıştırma:
+    python scripts/bench_rule_engine.py
+"""
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from yapay_zeka_servisi.kurallar import (  # noqa: E402
+    GOOD_BUT_SEQ,
+    MAX_TEXT_LENGTH,
+    NOT_BAD_BUT_SEQ,
+    is_neutral_like,
+    ne_generic_search,
+    rule_clean,
+    token_seq_search,
+)
+
+# Metin başına izin verilen en kötü süre (is_neutral_like, tüm kurallar dahil)
+LATENCY_CEILING_MS = 25.0
+REPEAT = 3
+
+# Karşılaştırma için eski regex tanımları (kural motorundan kaldırıldı)
+LEGACY_NE_GENERIC = re.compile(r"\bne\b.{0,80}\bne(\s+de)?\b")
+LEGACY_NOT_BAD_BUT = re.compile(
+    r"\b(kotu|fena|berbat|rezalet)\b.*?\bdegil\b.*?\b(ama|fakat|ancak|lakin|yine\s+de)\b"
+)
+LEGACY_GOOD_BUT = re.compile(
+    r"\b(iyi|guzel|harika|basarili|surukleyici|atmosfer|muzik|muzikler|gorsel\w*|oyuncu\w*|efekt\w*)\b.*?\b(ama|fakat|ancak|lakin|yine\s+de|buna\s+ragmen)\b.*?\b(zayif|eksik|sikici|uzun|yavas|kopuk|siradan|vasat|tikan\w*|imkansiz|yoksun|dusuk|dustu|zor|anlamsiz)\b"
+)
+
+VOCAB = [
+    "ne", "de", "da", "iyi", "guzel", "harika", "oyuncular", "efektler", "gorseller",
+    "ama", "fakat", "yine", "buna", "ragmen", "kotu", "fena", "berbat", "degil",
+    "zayif", "uzun", "tikanik", "zor", "film", "bir", "cok", "senaryo", "x", "muzik",
+]
+
+
+def _fit(unit: str) -> str:
+    """unit'i MAX_TEXT_LENGTH'e kadar tekrarlar."""
+    return (unit * (MAX_TEXT_LENGTH // len(unit) + 1))[:MAX_TEXT_LENGTH]
+
+
+PATHOLOGICAL = {
+    "iyi_tekrar": _fit("iyi "),
+    "iyi_ama_tekrar": _fit("iyi ama "),
+    "iyi_ama_yine_tekrar": _fit("iyi ama yine "),
+    "oyuncu_prefix": _fit("oyuncuuuu ama "),
+    "kotu_tekrar": _fit("kotu "),
+    "kotu_degil_tekrar": _fit("kotu degil "),
+    "ne_seyrek": _fit("ne " + "x " * 45),
+    "tek_token": "a" * MAX_TEXT_LENGTH,
+    "noktalama": _fit("iyi!! ama?? "),
+    "karisik": _fit("iyi ama kotu degil ne de "),
+}
+
+
+def check_equivalence(samples=20000, seed=7):
+    print("--- Eski regex ile eşdeğerlik ---")
+    rnd = random.Random(seed)
+    for _ in range(samples):
+        toks = [rnd.choice(VOCAB) for _ in range(rnd.randint(0, 25))]
+        clean = rule_clean(" ".join(toks))
+        toks = clean.split()
+        assert bool(LEGACY_NE_GENERIC.search(clean)) == ne_generic_search(toks), clean
+        assert bool(LEGACY_NOT_BAD_BUT.search(clean)) == token_seq_search(toks, NOT_BAD_BUT_SEQ), clean
+        assert bool(LEGACY_GOOD_BUT.search(clean)) == token_seq_search(toks, GOOD_BUT_SEQ), clean
+    print(f"{samples} rastgele metin: OK")
+
+
+def _best_ms(fn, arg):
+    best = float("inf")
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        fn(arg)
+        best = min(best, (time.perf_counter() - t0) * 1000)
+    return best
+
+
+def bench_pathological(with_legacy=True):
+    print(f"\n--- Kötü durum girdileri (tavan {LATENCY_CEILING_MS:.0f} ms/metin) ---")
+    worst = 0.0
+    for name, text in PATHOLOGICAL.items():
+        ms = _best_ms(is_neutral_like, text)
+        worst = max(worst, ms)
+        line = f"{name:<22} yeni: {ms:8.2f} ms"
+        if with_legacy:
+            clean = rule_clean(text)
+            legacy_ms = max(
+                _best_ms(LEGACY_NOT_BAD_BUT.search, clean),
+                _best_ms(LEGACY_GOOD_BUT.search, clean),
+            )
+            line += f" | eski regex: {legacy_ms:10.2f} ms"
+        print(line)
+        assert ms <= LATENCY_CEILING_MS, f"{name}: {ms:.2f} ms > {LATENCY_CEILING_MS} ms"
+    print(f"En kötü: {worst:.2f} ms")
+
+
+if __name__ == "__main__":
+    check_equivalence()
+    bench_pathological(with_legacy="--no-legacy" not in sys.argv)
+    print("\n[OK] Rule engine benchmark completed.")
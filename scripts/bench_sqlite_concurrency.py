@@ -0,0 +1,152 @@
+"""
+SQLite eşzamanlı okuma/yazma benchmark'ı: varsayılan ayarlar vs. settings.SQLITE_PRAGMAS profili.
+
+Sitedeki yük taklit edilir:
+- Yazarlar: yorum ekleme (film sayacını oku -> INSERT yorum -> UPDATE sayaç, tek transaction)
+- Okuyucular: detay sayfası (filmin son 20 yorumu + sayaçlar)
+
+Her profil geçici bir dosya veritabanında aynı süre koşar; işlem/sn ve
+"database is locked" hata sayıları yazdırılır.
+
+Çalıştırma:
+    python scripts/bench_sqlite_concurrency.py --sure 5 --yazar 4 --okuyucu 8
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sinema_sitesi.db_pragmas import uygula  # noqa: E402
+
+# settings.SQLITE_PRAGMAS varsayılanları
+PROFIL_PRAGMALARI = {
+    "journal_mode": "WAL",
+    "busy_timeout": "5000",
+    "synchronous": "NORMAL",
+    "mmap_size": str(256 * 1024 * 1024),
+    "cache_size": "-20000",
+}
+
+PROFILLER = {
+    # Django varsayılanı: rollback journal, sqlite3 modülünün 5 sn timeout'u, DEFERRED transaction
+    "varsayilan": {"pragmalar": {}, "begin": "BEGIN"},
+    # SQLITE_PRAGMAS + SQLITE_TRANSACTION_MODE=IMMEDIATE
+    "wal_profili": {"pragmalar": PROFIL_PRAGMALARI, "begin": "BEGIN IMMEDIATE"},
+}
+
+
+def _kur(yol, film_sayisi, yorum_sayisi):
+    db = sqlite3.connect(yol)
+    db.executescript("""
+        CREATE TABLE film (id INTEGER PRIMARY KEY, isim TEXT, yorum_sayisi INTEGER NOT NULL DEFAULT 0);
+        CREATE TABLE yorum (
+            id INTEGER PRIMARY KEY, film_id INTEGER NOT NULL, icerik TEXT, tarih REAL NOT NULL
+        );
+        CREATE INDEX yorum_film_tarih ON yorum (film_id, tarih DESC, id);
+    """)
+    db.executemany("INSERT INTO film (id, isim) VALUES (?, ?)", [(i, f"Film {i}") for i in range(1, film_sayisi + 1)])
+    db.executemany(
+        "INSERT INTO yorum (film_id, icerik, tarih) VALUES (?, ?, ?)",
+        [(random.randint(1, film_sayisi), "yorum " * 20, time.time()) for _ in range(yorum_sayisi)],
+    )
+    db.commit()
+    db.close()
+
+
+def _baglan(yol, profil):
+    # isolation_level=None: transaction'ları kendimiz açarız (Django autocommit gibi)
+    db = sqlite3.connect(yol, isolation_level=None, check_same_thread=False)
+    uygula(db.cursor(), profil["pragmalar"])
+    return db
+
+
+def _yazar(yol, profil, film_sayisi, bitis, sonuc):
+    db = _baglan(yol, profil)
+    while time.monotonic() < bitis:
+        film_id = random.randint(1, film_sayisi)
+        try:
+            db.execute(profil["begin"])
+            db.execute("SELECT yorum_sayisi FROM film WHERE id = ?", (film_id,)).fetchone()
+            db.execute(
+                "INSERT INTO yorum (film_id, icerik, tarih) VALUES (?, ?, ?)",
+                (film_id, "yeni yorum " * 10, time.time()),
+            )
+            db.execute("UPDATE film SET yorum_sayisi = yorum_sayisi + 1 WHERE id = ?", (film_id,))
+            db.execute("COMMIT")
+            sonuc["yazma"] += 1
+        except sqlite3.OperationalError:
+            sonuc["yazma_hata"] += 1
+            if db.in_transaction:
+                db.execute("ROLLBACK")
+    db.close()
+
+
+def _okuyucu(yol, profil, film_sayisi, bitis, sonuc):
+    db = _baglan(yol, profil)
+    while time.monotonic() < bitis:
+        film_id = random.randint(1, film_sayisi)
+        try:
+            db.execute("SELECT isim, yorum_sayisi FROM film WHERE id = ?", (film_id,)).fetchone()
+            db.execute(
+                "SELECT id, icerik, tarih FROM yorum WHERE film_id = ? ORDER BY tarih DESC, id LIMIT 20",
+                (film_id,),
+            ).fetchall()
+            sonuc["okuma"] += 1
+        except sqlite3.OperationalError:
+            sonuc["okuma_hata"] += 1
+    db.close()
+
+
+def kos(ad, args):
+    profil = PROFILLER[ad]
+    with tempfile.TemporaryDirectory() as klasor:
+        yol = os.path.join(klasor, "bench.sqlite3")
+        _kur(yol, args.film, args.yorum)
+
+        sayaclar = []
+        threadler = []
+        bitis = time.monotonic() + args.sure
+        for hedef, adet in ((_yazar, args.yazar), (_okuyucu, args.okuyucu)):
+            for _ in range(adet):
+                sonuc = {"yazma": 0, "yazma_hata": 0, "okuma": 0, "okuma_hata": 0}
+                sayaclar.append(sonuc)
+                threadler.append(threading.Thread(target=hedef, args=(yol, profil, args.film, bitis, sonuc)))
+        for t in threadler:
+            t.start()
+        for t in threadler:
+            t.join()
+
+    toplam = {k: sum(s[k] for s in sayaclar) for k in sayaclar[0]}
+    print(
+        f"{ad:<12} yazma {toplam['yazma'] / args.sure:8.0f}/sn  okuma {toplam['okuma'] / args.sure:8.0f}/sn  "
+        f"kilit hatası: yazma {toplam['yazma_hata']}, okuma {toplam['okuma_hata']}"
+    )
+    return toplam
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sure", type=float, default=5.0, help="Profil başına süre (sn)")
+    parser.add_argument("--yazar", type=int, default=4, help="Yazan thread sayısı")
+    parser.add_argument("--okuyucu", type=int, default=8, help="Okuyan thread sayısı")
+    parser.add_argument("--film", type=int, default=2000)
+    parser.add_argument("--yorum", type=int, default=50000)
+    args = parser.parse_args()
+
+    print(f"SQLite {sqlite3.sqlite_version}, {args.yazar} yazar + {args.okuyucu} okuyucu, {args.sure:g} sn/profil")
+    sonuclar = {ad: kos(ad, args) for ad in PROFILLER}
+
+    eski, yeni = sonuclar["varsayilan"], sonuclar["wal_profili"]
+    for alan in ("yazma", "okuma"):
+        oran = yeni[alan] / eski[alan] if eski[alan] else float("inf")
+        print(f"{alan}: x{oran:.1f}")
+
+
+if __name__ == "__main__":
+    main()
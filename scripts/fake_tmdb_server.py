@@ -0,0 +1,155 @@
+"""
+Yerel TMDB taklidi (film_cek pipeline'ını gerçek API'ye gitmeden test/benchmark etmek için).
+
+    python scripts/fake_tmdb_server.py --port 8765 --pages 50 --latency 0.05 --rate 40
+    TMDB_API_KEY=x python manage.py film_cek 50 --base-url http://127.0.0.1:8765/3
+    python scripts/fake_tmdb_server.py --pages 50 --changes 3,7,999 --revise 7
+    TMDB_API_KEY=x python manage.py film_cek --degisiklik --base-url http://127.0.0.1:8765/3
+
+Desteklenen uçlar: /3/movie/popular?page=N, /3/movie/{id}, /3/movie/changes?page=N
+(changes: verilen id'ler sayfa başına CHANGES_PER_PAGE kayıt; revise edilen filmlerin içeriği değişir)
+--rate verilirse saniyelik pencerede aşan istekler 429 + Retry-After alır ve
+her yanıtta X-RateLimit-Remaining döner.
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+PER_PAGE = 20
+CHANGES_PER_PAGE = 100
+
+
+def movie_json(tmdb_id, rev=0):
+    return {
+        "id": tmdb_id,
+        "title": f"Film {tmdb_id}",
+        "overview": f"Film {tmdb_id} özeti." + (f" (revizyon {rev})" if rev else ""),
+        "release_date": f"{1990 + tmdb_id % 35}-01-01",
+        "vote_average": round(5 + (tmdb_id % 50) / 10, 1),
+        "poster_path": f"/p{tmdb_id}.jpg",
+        "backdrop_path": f"/b{tmdb_id}.jpg",
+        "runtime": 90 + tmdb_id % 60,
+        "genres": [{"id": 28, "name": "Aksiyon"}] if tmdb_id % 2 else [{"id": 35, "name": "Komedi"}],
+        "credits": {"cast": [{"name": f"Oyuncu {tmdb_id}-{i}", "character": "X", "profile_path": None} for i in range(6)]},
+        "videos": {"results": [{"site": "YouTube", "iso_639_1": "tr", "type": "Trailer", "key": f"yt{tmdb_id}"}]},
+    }
+
+
+class FakeTmdb:
+    def __init__(self, pages=5, latency=0.0, rate=None, changes=(), revisions=None):
+        self.pages = pages
+        self.latency = latency
+        self.rate = rate
+        # /movie/changes yanıtındaki id'ler ve {id: revizyon} (içerik farkı)
+        self.changes = list(changes)
+        self.revisions = dict(revisions or {})
+        self.hits = {}
+        self._window = []
+        self._lock = threading.Lock()
+
+    def _rate_check(self):
+        """(izin_var_mı, kalan) - kayan 1 sn pencere."""
+        if not self.rate:
+            return True, None
+        now = time.monotonic()
+        with self._lock:
+            self._window = [t for t in self._window if now - t < 1.0]
+            if len(self._window) >= self.rate:
+                return False, 0
+            self._window.append(now)
+            return True, int(self.rate - len(self._window))
+
+    def handle(self, path, query):
+        """(status, headers, body) döner."""
+        ok, remaining = self._rate_check()
+        headers = {}
+        if remaining is not None:
+            headers["X-RateLimit-Remaining"] = str(remaining)
+        if not ok:
+            headers["Retry-After"] = "1"
+            return 429, headers, {"status_message": "rate limit"}
+
+        kind = "other"
+        status, body = 404, {"status_message": "not found"}
+        if path == "/3/movie/popular":
+            kind = "popular"
+            page = int(query.get("page", ["1"])[0])
+            results = []
+            if page <= self.pages:
+                start = (page - 1) * PER_PAGE + 1
+                results = [{"id": i, "title": f"Film {i}"} for i in range(start, start + PER_PAGE)]
+            status, body = 200, {"page": page, "results": results, "total_pages": self.pages}
+        elif path == "/3/movie/changes":
+            kind = "changes"
+            page = int(query.get("page", ["1"])[0])
+            chunk = self.changes[(page - 1) * CHANGES_PER_PAGE:page * CHANGES_PER_PAGE]
+            total = max(1, -(-len(self.changes) // CHANGES_PER_PAGE))
+            status, body = 200, {
+                "page": page,
+                "results": [{"id": i, "adult": False} for i in chunk],
+                "total_pages": total,
+                "total_results": len(self.changes),
+            }
+        else:
+            m = re.fullmatch(r"/3/movie/(\d+)", path)
+            if m:
+                kind = "movie"
+                tmdb_id = int(m.group(1))
+                status, body = 200, movie_json(tmdb_id, self.revisions.get(tmdb_id, 0))
+
+        with self._lock:
+            self.hits[kind] = self.hits.get(kind, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+        return status, headers, body
+
+
+def make_server(fake, host="127.0.0.1", port=0):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            u = urlparse(self.path)
+            status, headers, body = fake.handle(u.path, parse_qs(u.query))
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--pages", type=int, default=5)
+    ap.add_argument("--latency", type=float, default=0.0, help="Yanıt başına gecikme (sn)")
+    ap.add_argument("--rate", type=int, default=None, help="Saniyelik istek sınırı (aşılırsa 429)")
+    ap.add_argument("--changes", default="", help="/movie/changes'te dönecek id'ler (virgüllü)")
+    ap.add_argument("--revise", default="", help="İçeriği değişmiş sayılacak id'ler (virgüllü)")
+    args = ap.parse_args()
+
+    def _ids(raw):
+        return [int(x) for x in raw.split(",") if x.strip()]
+
+    fake = FakeTmdb(args.pages, args.latency, args.rate,
+                    changes=_ids(args.changes), revisions={i: 1 for i in _ids(args.revise)})
+    srv = make_server(fake, port=args.port)
+    print(f"Fake TMDB: http://127.0.0.1:{args.port}/3 ({args.pages} sayfa)")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -1,23 +1,39 @@
+import asyncio
 import requests
 import logging
 import time
 import threading
 from django.conf import settings
 
+from sinema_sitesi import http_client
+from sinema_sitesi.ai_replikalari import ReplikaHavuzu
+from sinema_sitesi.circuit_breaker import GEC
+from yapay_zeka_servisi.kurallar import dedup_key, kural_karari
+from yapay_zeka_servisi.singleflight import SingleFlight
+
 logger = logging.getLogger(__name__)
 
 # Direct mode için global model değişkeni (lazy load için)
 _ensemble_module = None
 _model_loading_lock = threading.Lock()
+# Son başarısız yükleme anı: AI_MODEL_TEKRAR_SN dolmadan import her istekte yeniden denenmez
+_model_hata_zamani = None
+
+# Direct mode: aynı anda gelen özdeş yorumlar tek ensemble_single çağrısını paylaşır
+_flight = SingleFlight()
 
 def load_model():
     """
     Modeli yükler (eğer henüz yüklenmemişse).
     Genelde uygulama başlangıcında (apps.py ready()) çağrılır.
     """
-    global _ensemble_module
+    global _ensemble_module, _model_hata_zamani
     if _ensemble_module is not None:
         return _ensemble_module
+    if _model_hata_zamani is not None and (
+        time.monotonic() - _model_hata_zamani < getattr(settings, "AI_MODEL_TEKRAR_SN", 60)
+    ):
+        return None
 
     with _model_loading_lock:
         if _ensemble_module is None:
@@ -29,6 +45,7 @@ def load_model():
                 logger.info("Yapay Zeka modulu basariyla yuklendi (Direct Mode).")
             except ImportError as e:
                 logger.error(f"Yapay Zeka modulu yuklenemedi: {e}")
+                _model_hata_zamani = time.monotonic()
                 return None
     return _ensemble_module
 
@@ -38,10 +55,153 @@ def get_ensemble_module():
         return load_model()
     return _ensemble_module
 
-def analiz_yap(yorum_metni: str) -> dict:
+# --- REPLİKALAR + DEVRE KESİCİ (API yolu) ---
+# İstekler AI_API_URLS replikalarına dağıtılır; art arda hata veren replika dışarı atılır.
+# Hepsi dışarıdaysa istekler AI_API_TIMEOUT beklemeden yedek yola (sadece kurallar) düşer.
+_havuz = None
+_havuz_anahtari = None
+_havuz_lock = threading.Lock()
+
+
+class _ReplikaYok(Exception):
+    """Tüm replikaların devresi açık; servise hiç gidilmedi."""
+
+
+def _havuz_al():
+    """Ayarlara göre replika havuzu (ayarlar değişirse, örn. testlerde, yeniden kurulur)."""
+    global _havuz, _havuz_anahtari
+    anahtar = (
+        tuple(getattr(settings, "AI_API_URLS", None) or [settings.AI_API_URL]),
+        getattr(settings, "AI_LB_HASH", False),
+        getattr(settings, "AI_CB_HATA_ESIGI", 5),
+        getattr(settings, "AI_CB_ACIK_SN", 30.0),
+    )
+    if _havuz is None or _havuz_anahtari != anahtar:
+        with _havuz_lock:
+            if _havuz is None or _havuz_anahtari != anahtar:
+                urls, hashing, esik, acik_sn = anahtar
+                _havuz = ReplikaHavuzu(urls, hata_esigi=esik, acik_sn=acik_sn, hashing=hashing, anahtar_fn=dedup_key)
+                _havuz_anahtari = anahtar
+    return _havuz
+
+
+def _servis_hatasi(e):
+    """Devreyi besleyen hatalar: bağlantı/timeout/bozuk yanıt ve 503 dışındaki 5xx."""
+    resp = getattr(e, "response", None)
+    return resp is None or (resp.status_code >= 500 and resp.status_code != 503)
+
+
+def _saglik_kontrolu(base_url):
+    try:
+        r = http_client.get(f"{base_url}/", site="ai", timeout=getattr(settings, "AI_CB_PROBE_TIMEOUT", 1.0))
+        return r.status_code == 200
+    except requests.RequestException:
+        return False
+
+
+class _Gonderim:
+    """
+    _gonder ve _agonder'in ortak replika seçimi: havuzdan (hashing açıksa metne göre) sıradaki
+    replika, gerekiyorsa sağlık kontrolü sonucu ve hata sonrası failover kararı.
+    """
+
+    def __init__(self, metin):
+        self.havuz = _havuz_al()
+        self.metin = metin
+        self.denenen = []
+        self.son_hata = None
+
+    def sonraki(self):
+        """(replika, probe_gerekli). Aday kalmadıysa son bağlantı hatası ya da _ReplikaYok yükselir."""
+        secim = self.havuz.sec(self.metin, haric=self.denenen)
+        if secim is None:
+            if self.son_hata is not None:
+                raise self.son_hata
+            raise _ReplikaYok()
+        replika, izin = secim
+        self.denenen.append(replika)
+        return replika, izin != GEC
+
+    def probe_bitti(self, replika, ok):
+        replika.devre.probe_bitti(ok)
+        return ok
+
+    def hata(self, replika, e, baglanti_yok):
+        """
+        Hatayı replikanın devresine işler. Bağlantı kurulamadıysa (timeout değil) bir kez başka
+        replika denenir: analiz yan etkisizdir, tekrar güvenli. Dönüş: başka replikaya geçilsin mi.
+        """
+        self.havuz.hata(replika, _servis_hatasi(e))
+        if baglanti_yok and self.son_hata is None:
+            self.son_hata = e
+            return True
+        return False
+
+
+def _gonder(istek, metin=None):
+    """
+    istek(base_url) -> sonuç; replika _Gonderim ile seçilir.
+    Hiç replika yoksa _ReplikaYok, yoksa son hata yükselir.
+    """
+    gonderim = _Gonderim(metin)
+    while True:
+        replika, probe = gonderim.sonraki()
+        if probe and not gonderim.probe_bitti(replika, _saglik_kontrolu(replika.url)):
+            continue
+        with gonderim.havuz.kullan(replika):
+            try:
+                sonuc = istek(replika.url)
+            except (requests.RequestException, ValueError, KeyError) as e:
+                baglanti_yok = isinstance(e, requests.ConnectionError) and not isinstance(e, requests.Timeout)
+                if gonderim.hata(replika, e, baglanti_yok):
+                    continue
+                raise
+        replika.devre.basarili()
+        return sonuc
+
+
+def _yedek_sonuc(metin):
+    """Devre açıkken: kurallar karar verebiliyorsa o (tam modelle aynı), yoksa tekrar denenecek 'circuit_open'."""
+    karar = kural_karari(metin)
+    if karar is None:
+        _havuz_al().yedek_kullanildi("karar_yok")
+        return {"karar": "NÖTR", "guven_skoru": 0.0, "kaynak": "circuit_open"}
+    label, conf, src = karar
+    _havuz_al().yedek_kullanildi("kural")
+    return {"karar": label, "guven_skoru": conf, "kaynak": f"fallback::{src}"}
+
+
+def devre_metrikleri():
+    """Replika başına devre durumu/istek/hata sayaçları, yedek yol sayaçları ve direct mode singleflight."""
+    return {**_havuz_al().metrics(), "singleflight": _flight.stats()}
+
+
+def _ensemble_sonucu(label, conf, src):
+    """ensemble_single/ensemble_batch satırı -> analiz_yap sonuç formatı."""
+    if label == "HATA":
+        return {"karar": "NÖTR", "guven_skoru": 0.0, "kaynak": "error"}
+    if label == "GEÇERSİZ":
+        return {"karar": "NÖTR", "guven_skoru": 0.0, "kaynak": "invalid_input"}
+    # app_ensemble "OLUMLU", "OLUMSUZ", "NÖTR" dönüyor; DB normalizasyonu sentiment_service'te
+    return {"karar": label, "guven_skoru": float(conf), "kaynak": f"local::{src}"}
+
+
+def _hata_kaynagi(e):
+    """HTTP hatası -> kaynak: servis yük atıyorsa (503) 'api_busy', diğer her durumda 'api_error'."""
+    resp = getattr(e, "response", None)
+    return "api_busy" if resp is not None and resp.status_code == 503 else "api_error"
+
+
+def _headers(timeout, oncelik):
+    # Servis kendi bütçesini bilsin: süre dolunca BERT yerine rules + TF-IDF döner
+    return {"X-Deadline-Ms": str(int(float(timeout) * 1000)), "X-Priority": oncelik}
+
+
+def analiz_yap(yorum_metni: str, oncelik: str = "interactive") -> dict:
     """
     AI servisine yorum metnini gönderir veya doğrudan analiz yapar.
     Mod: settings.AI_MODE ('direct' veya 'api')
+    oncelik: 'interactive' (kullanıcı bekliyor) veya 'bulk' (toplu / arka plan iş)
     """
     start_time = time.time()
     mode = getattr(settings, "AI_MODE", "direct")
@@ -52,23 +212,15 @@ def analiz_yap(yorum_metni: str) -> dict:
         mod = get_ensemble_module()
         if mod:
             try:
-                # ensemble_single fonksiyonunu çağır
+                # ensemble_single fonksiyonunu çağır (özdeş eşzamanlı istekler birleştirilir)
                 # Dönüş: label, conf, src, dbg
-                label, conf, src, dbg = mod.ensemble_single(yorum_metni)
+                (label, conf, src, dbg), _ = _flight.do(
+                    mod.dedup_key(yorum_metni),
+                    lambda: mod.ensemble_single(yorum_metni),
+                )
                 
-                # Hata durumu kontrolü
-                if label == "HATA":
-                    result = {"karar": "NÖTR", "guven_skoru": 0.0, "kaynak": "error", "debug": dbg}
-                else:
-                    # UI için label normalizasyonu (app_ensemble ui uyumlu dönmüyor olabilir, kontrol et)
-                    # app_ensemble "OLUMLU", "OLUMSUZ", "NÖTR" dönüyor.
-                    # Views.py zaten bunu mapliyor ama biz yine de standart yapalım.
-                    result = {
-                        "karar": label,
-                        "guven_skoru": float(conf),
-                        "kaynak": f"local::{src}",
-                        "debug": dbg
-                    }
+                result = _ensemble_sonucu(label, conf, src)
+                result["debug"] = dbg
             except Exception as e:
                 logger.exception("Direct analiz hatası: %s", e)
                 # Hata durumunda API'ye fallback yapılabilir ama şimdilik hata dönelim
@@ -80,20 +232,27 @@ def analiz_yap(yorum_metni: str) -> dict:
 
     # --- API MODE (Fallback if direct failed or mode is api) ---
     if not result:
-        base_url = settings.AI_API_URL.rstrip("/")
-        url = f"{base_url}/analiz"
         timeout = getattr(settings, "AI_API_TIMEOUT", 10)
+        headers = _headers(timeout, oncelik)
 
-        try:
-            r = requests.post(url, json={"yorum_metni": yorum_metni}, timeout=timeout)
+        def istek(base_url):
+            r = http_client.post(
+                f"{base_url}/analiz", site="ai", json={"yorum_metni": yorum_metni}, headers=headers, timeout=timeout,
+            )
             r.raise_for_status()
-            result = r.json()
+            return r.json()
+
+        try:
+            result = _gonder(istek, metin=yorum_metni)
             # API'den gelen kaynak bilgisini koru veya ekle
             if "kaynak" not in result:
                 result["kaynak"] = "api"
-        except requests.RequestException as e:
+        except _ReplikaYok:
+            result = _yedek_sonuc(yorum_metni)
+        except (requests.RequestException, ValueError) as e:
             logger.error("AI API hatası: %s", e)
-            result = {"karar": "NÖTR", "guven_skoru": 0.0, "kaynak": "api_error"}
+            # 503: servis yük atıyor (kuyruk dolu); Retry-After kadar sonra tekrar denenebilir
+            result = {"karar": "NÖTR", "guven_skoru": 0.0, "kaynak": _hata_kaynagi(e)}
 
     # Zamanlama
     duration = time.time() - start_time
@@ -108,4 +267,212 @@ def analiz_yap(yorum_metni: str) -> dict:
         duration
     )
 
-    return result
\ No newline at end of file
+    return result
+
+
+def analiz_toplu_api(metinler, oncelik: str = "bulk") -> list:
+    """
+    AI servisinin /analiz/toplu ucuna tek istek (metinler <= servisin AI_MAX_TOPLU'su).
+    Dönüş: analiz_yap ile aynı anahtarlarla sözlük listesi (metinlerle aynı sırada).
+    Bağlantı/HTTP hatasında her satır 'api_error' (503'te 'api_busy') kaynaklı NÖTR döner.
+    """
+    metinler = list(metinler)
+    if not metinler:
+        return []
+    start_time = time.time()
+    timeout = getattr(settings, "AI_API_TOPLU_TIMEOUT", 60)
+
+    def istek(base_url):
+        r = http_client.post(
+            f"{base_url}/analiz/toplu", site="ai", json={"yorumlar": metinler},
+            headers=_headers(timeout, oncelik), timeout=timeout,
+        )
+        r.raise_for_status()
+        return _toplu_yanit(r.json(), metinler)
+
+    try:
+        # Toplu istek tek replikaya gider (p2c); hashing sadece tekli /analiz için
+        sonuclar = _gonder(istek)
+    except _ReplikaYok:
+        sonuclar = [_yedek_sonuc(m) for m in metinler]
+    except (requests.RequestException, ValueError, KeyError) as e:
+        logger.error("AI API toplu analiz hatası: %s", e)
+        sonuclar = [{"karar": "NÖTR", "guven_skoru": 0.0, "kaynak": _hata_kaynagi(e)} for _ in metinler]
+
+    return _sure_ekle(sonuclar, start_time)
+
+
+def _toplu_yanit(veri, metinler):
+    sonuclar = veri["sonuclar"]
+    if len(sonuclar) != len(metinler):
+        raise ValueError(f"toplu yanıt boyu uyuşmuyor: {len(sonuclar)} != {len(metinler)}")
+    return sonuclar
+
+
+def _sure_ekle(sonuclar, start_time):
+    sure = (time.time() - start_time) / max(len(sonuclar), 1)
+    for sonuc in sonuclar:
+        sonuc["sure_sn"] = sure
+    logger.info("Toplu analiz tamamlandı | %d yorum | %.4fs/yorum", len(sonuclar), sure)
+    return sonuclar
+
+
+def _parcalar(metinler):
+    """
+    API modu için: geçersiz metinler yerelde 'invalid_input' olur, geçerliler
+    AI_API_TOPLU_BOYUT'luk parçalara bölünür. (sonuç listesi, [(indeksler, metinler), ...]) döner.
+    """
+    out = [None] * len(metinler)
+    gecerli = []
+    for i, metin in enumerate(metinler):
+        if not metin or not isinstance(metin, str):
+            out[i] = {"karar": "NÖTR", "guven_skoru": 0.0, "kaynak": "invalid_input", "sure_sn": 0.0}
+        else:
+            gecerli.append(i)
+    boyut = max(1, getattr(settings, "AI_API_TOPLU_BOYUT", 64))
+    parcalar = []
+    for bas in range(0, len(gecerli), boyut):
+        indeksler = gecerli[bas:bas + boyut]
+        parcalar.append((indeksler, [metinler[i] for i in indeksler]))
+    return out, parcalar
+
+
+def analiz_yap_batch(metinler, oncelik: str = "bulk") -> list:
+    """
+    analiz_yap'ın çok metinli hali (içe aktarma, yeniden analiz, önizleme).
+    Direct mode: tek ensemble_batch çağrısı (BERT batch'leri + in-batch dedup).
+    API mode (veya model yüklenemezse): /analiz/toplu, AI_API_TOPLU_BOYUT'luk parçalarla.
+    Dönüş: analiz_yap ile aynı formatta sözlük listesi (metinlerle aynı sırada); hata fırlatmaz.
+    """
+    metinler = list(metinler)
+    if not metinler:
+        return []
+
+    if getattr(settings, "AI_MODE", "direct") == "direct":
+        mod = get_ensemble_module()
+        if mod:
+            start_time = time.time()
+            try:
+                labels, confs, sources = mod.ensemble_batch(metinler)
+                sonuclar = [_ensemble_sonucu(*satir) for satir in zip(labels, confs, sources)]
+            except Exception as e:
+                logger.exception("Direct toplu analiz hatası: %s", e)
+                sonuclar = [{"karar": "NÖTR", "guven_skoru": 0.0, "kaynak": "exception"} for _ in metinler]
+            return _sure_ekle(sonuclar, start_time)
+        logger.warning("Direct mode seçili ama modül yüklenemedi. Toplu API deneniyor...")
+
+    out, parcalar = _parcalar(metinler)
+    for indeksler, parca in parcalar:
+        for i, sonuc in zip(indeksler, analiz_toplu_api(parca, oncelik=oncelik)):
+            out[i] = sonuc
+    return out
+
+
+# --- ASYNC (ASGI view'ları için) ---
+# İstekler http_client'ın loop başına paylaşılan "ai" istemcisiyle gider (site profili, sayaçlar).
+
+
+async def _asaglik_kontrolu(base_url):
+    import httpx
+
+    try:
+        r = await http_client.aget(f"{base_url}/", site="ai", timeout=getattr(settings, "AI_CB_PROBE_TIMEOUT", 1.0))
+        return r.status_code == 200
+    except httpx.HTTPError:
+        return False
+
+
+async def _agonder(istek, metin=None):
+    """_gonder'in async hali: await istek(base_url) -> sonuç, seçim ve failover aynı (_Gonderim)."""
+    import httpx
+
+    gonderim = _Gonderim(metin)
+    while True:
+        replika, probe = gonderim.sonraki()
+        if probe and not gonderim.probe_bitti(replika, await _asaglik_kontrolu(replika.url)):
+            continue
+        with gonderim.havuz.kullan(replika):
+            try:
+                sonuc = await istek(replika.url)
+            except (httpx.HTTPError, ValueError, KeyError) as e:
+                if gonderim.hata(replika, e, isinstance(e, httpx.ConnectError)):
+                    continue
+                raise
+        replika.devre.basarili()
+        return sonuc
+
+
+async def _apost(base_url, path, payload, timeout, oncelik):
+    r = await http_client.arequest(
+        "POST", f"{base_url}{path}", site="ai", json=payload, headers=_headers(timeout, oncelik), timeout=timeout,
+    )
+    r.raise_for_status()
+    return r.json()
+
+
+async def _direct_hazir():
+    """Direct mode ve model hazır mı. Model henüz yüklenmediyse yükleme thread'de yapılır (loop bloklanmaz)."""
+    if getattr(settings, "AI_MODE", "direct") != "direct":
+        return False
+    if _ensemble_module is not None:
+        return True
+    return await asyncio.to_thread(get_ensemble_module) is not None
+
+
+async def analiz_yap_async(yorum_metni: str, oncelik: str = "interactive") -> dict:
+    """
+    analiz_yap'ın async hali. Direct mode'da model çağrısı thread'de çalışır (event loop bloklanmaz),
+    API mode'da istek http_client'ın loop başına paylaşılan AsyncClient'ı ile gider. Dönüş formatı analiz_yap ile aynı.
+    """
+    import httpx
+
+    if await _direct_hazir():
+        return await asyncio.to_thread(analiz_yap, yorum_metni, oncelik)
+
+    start_time = time.time()
+    timeout = getattr(settings, "AI_API_TIMEOUT", 10)
+    try:
+        result = await _agonder(
+            lambda base_url: _apost(base_url, "/analiz", {"yorum_metni": yorum_metni}, timeout, oncelik),
+            metin=yorum_metni,
+        )
+        result.setdefault("kaynak", "api")
+    except _ReplikaYok:
+        result = _yedek_sonuc(yorum_metni)
+    except (httpx.HTTPError, ValueError) as e:
+        logger.error("AI API hatası (async): %s", e)
+        result = {"karar": "NÖTR", "guven_skoru": 0.0, "kaynak": _hata_kaynagi(e)}
+    result["sure_sn"] = time.time() - start_time
+    return result
+
+
+async def analiz_yap_batch_async(metinler, oncelik: str = "bulk") -> list:
+    """analiz_yap_batch'in async hali; API mode'da parçalar eşzamanlı (ve replikalara dağılarak) gönderilir."""
+    import httpx
+
+    metinler = list(metinler)
+    if not metinler:
+        return []
+    if await _direct_hazir():
+        return await asyncio.to_thread(analiz_yap_batch, metinler, oncelik)
+
+    timeout = getattr(settings, "AI_API_TOPLU_TIMEOUT", 60)
+
+    async def parca_gonder(parca):
+        start_time = time.time()
+        try:
+            veri = await _agonder(lambda base_url: _apost(base_url, "/analiz/toplu", {"yorumlar": parca}, timeout, oncelik))
+            sonuclar = _toplu_yanit(veri, parca)
+        except _ReplikaYok:
+            sonuclar = [_yedek_sonuc(m) for m in parca]
+        except (httpx.HTTPError, ValueError, KeyError) as e:
+            logger.error("AI API toplu analiz hatası (async): %s", e)
+            sonuclar = [{"karar": "NÖTR", "guven_skoru": 0.0, "kaynak": _hata_kaynagi(e)} for _ in parca]
+        return _sure_ekle(sonuclar, start_time)
+
+    out, parcalar = _parcalar(metinler)
+    sonuclar = await asyncio.gather(*(parca_gonder(parca) for _, parca in parcalar))
+    for (indeksler, _), parca_sonuclari in zip(parcalar, sonuclar):
+        for i, sonuc in zip(indeksler, parca_sonuclari):
+            out[i] = sonuc
+    return out
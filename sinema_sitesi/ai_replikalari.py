@@ -0,0 +1,130 @@
+"""
+AI servisi replikaları arasında istemci taraflı yük dağıtımı (settings.AI_API_URLS).
+
+- Yönlendirme: power-of-two-choices. Sağlıklı replikalardan rastgele ikisi seçilir,
+  uçuştaki isteği az olana gidilir (tek replika varsa doğrudan o).
+- Tutarlı hashing (AI_LB_HASH): aynı normalize metin (dedup_key) hep aynı replikaya gider,
+  o replikanın singleflight'ı özdeş istekleri birleştirir. Halkada replika başına
+  SANAL_DUGUM nokta vardır; dışarı atılan replikanın anahtarları halkadaki sonrakine kayar.
+- Pasif sağlık: her replikanın kendi CircuitBreaker'ı vardır. Art arda hata veren replika
+  dışarı atılır (devre açık), acik_sn sonra tek sağlık kontrolüyle geri alınır.
+  Tüm replikalar dışarıdaysa sec() None döner (çağıran yedek yola düşer).
+"""
+import bisect
+import hashlib
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from sinema_sitesi.circuit_breaker import GEC, PROBE, CircuitBreaker
+
+SANAL_DUGUM = 64
+
+
+def _hash(metin):
+    return int.from_bytes(hashlib.blake2b(metin.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class Replika:
+    __slots__ = ("url", "devre", "ucusta", "istek", "hata")
+
+    def __init__(self, url, devre):
+        self.url = url
+        self.devre = devre
+        self.ucusta = 0
+        self.istek = 0
+        self.hata = 0
+
+
+class ReplikaHavuzu:
+    def __init__(self, urls, hata_esigi=5, acik_sn=30.0, hashing=False, anahtar_fn=None,
+                 saat=time.monotonic, rastgele=None):
+        # Aynı URL iki kez yazıldıysa tek replika sayılır (sıra korunur)
+        self.replikalar = [
+            Replika(url.rstrip("/"), CircuitBreaker(hata_esigi, acik_sn, saat=saat))
+            for url in dict.fromkeys(u.rstrip("/") for u in urls)
+        ]
+        if not self.replikalar:
+            raise ValueError("En az bir AI servis URL'i gerekli")
+        self.hashing = bool(hashing)
+        self._anahtar_fn = anahtar_fn or (lambda metin: metin)
+        self._rnd = rastgele or random.Random()
+        self._lock = threading.Lock()
+        self._yedek = {}
+        halka = sorted(
+            (_hash(f"{r.url}#{i}"), sira)
+            for sira, r in enumerate(self.replikalar)
+            for i in range(SANAL_DUGUM)
+        )
+        self._halka_hash = [h for h, _ in halka]
+        self._halka_sira = [sira for _, sira in halka]
+
+    def sec(self, metin=None, haric=()):
+        """
+        (replika, izin) veya None (hepsi dışarıda). izin PROBE ise çağıran önce o replikaya
+        sağlık kontrolü yapar ve sonucu replika.devre.probe_bitti() ile bildirir.
+        metin yalnızca hashing açıkken kullanılır.
+        """
+        adaylar = []
+        for r in self.replikalar:
+            if r in haric:
+                continue
+            izin = r.devre.izin()
+            if izin == PROBE:
+                return r, PROBE
+            if izin == GEC:
+                adaylar.append(r)
+        if not adaylar:
+            return None
+        if self.hashing and metin:
+            return self._halkadan(self._anahtar_fn(metin), adaylar), GEC
+        if len(adaylar) == 1:
+            return adaylar[0], GEC
+        a, b = self._rnd.sample(adaylar, 2)
+        return (a if a.ucusta <= b.ucusta else b), GEC
+
+    def _halkadan(self, anahtar, adaylar):
+        adaylar = set(adaylar)
+        n = len(self._halka_hash)
+        bas = bisect.bisect(self._halka_hash, _hash(anahtar))
+        for k in range(n):
+            r = self.replikalar[self._halka_sira[(bas + k) % n]]
+            if r in adaylar:
+                return r
+        return next(iter(adaylar))
+
+    def sahip(self, metin):
+        """Hashing'de metnin (tüm replikalar sağlıklıyken) gideceği replika URL'i."""
+        return self._halkadan(self._anahtar_fn(metin), self.replikalar).url
+
+    @contextmanager
+    def kullan(self, replika):
+        with self._lock:
+            replika.ucusta += 1
+            replika.istek += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                replika.ucusta -= 1
+
+    def hata(self, replika, servis_hatasi):
+        with self._lock:
+            replika.hata += 1
+        if servis_hatasi:
+            replika.devre.basarisiz()
+
+    def yedek_kullanildi(self, tur):
+        """Tüm replikalar dışarıdayken kullanılan yedek yol sayacı (kural kararı / karar yok)."""
+        with self._lock:
+            self._yedek[tur] = self._yedek.get(tur, 0) + 1
+
+    def metrics(self):
+        with self._lock:
+            replikalar = [
+                {"url": r.url, "ucusta": r.ucusta, "istek": r.istek, "hata": r.hata, "devre": r.devre.metrics()}
+                for r in self.replikalar
+            ]
+            yedek = dict(self._yedek)
+        return {"strateji": "hash" if self.hashing else "p2c", "replikalar": replikalar, "yedek": yedek}
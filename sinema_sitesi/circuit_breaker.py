@@ -0,0 +1,109 @@
+"""
+Django -> AI servisi yolu için devre kesici (circuit breaker); ai_replikalari'nda replika başına bir tane.
+
+- KAPALI: istekler geçer. Art arda `hata_esigi` hata (bağlantı hatası, timeout, 5xx) -> AÇIK.
+- AÇIK: istek hiç gönderilmez, çağıran milisaniyeler içinde yedek yola düşer.
+  `acik_sn` dolunca ilk çağıran "probe" hakkı alır (YARI_AÇIK).
+- YARI_AÇIK: probe sahibi sağlık kontrolü yapar (kısa timeout'lu GET /); başarılıysa KAPALI,
+  değilse tekrar AÇIK. Probe sürerken diğer çağıranlar reddedilir.
+
+Sağlık kontrolünü çağıran yapar (sync: requests, async: httpx); bu sınıf sadece durumu tutar.
+503 (servis yük atıyor) hata sayılmaz: servis ayakta ve hızlı cevap veriyor.
+"""
+import threading
+import time
+
+KAPALI = "kapali"
+ACIK = "acik"
+YARI_ACIK = "yari_acik"
+
+# izin() dönüşleri
+GEC = "gec"
+PROBE = "probe"
+REDDET = "reddet"
+
+
+class CircuitBreaker:
+    def __init__(self, hata_esigi=5, acik_sn=30.0, saat=time.monotonic):
+        self.hata_esigi = max(1, int(hata_esigi))
+        self.acik_sn = float(acik_sn)
+        self._saat = saat
+        self._lock = threading.Lock()
+        self._durum = KAPALI
+        self._ardisik_hata = 0
+        self._acildi = 0.0
+        self._probe_basladi = None
+        self._m = {"gecis": {}, "hizli_red": 0, "probe_basarili": 0, "probe_basarisiz": 0}
+
+    def _gecis(self, yeni):
+        # Kilit altında çağrılır
+        if yeni == self._durum:
+            return
+        anahtar = f"{self._durum}->{yeni}"
+        self._m["gecis"][anahtar] = self._m["gecis"].get(anahtar, 0) + 1
+        self._durum = yeni
+        if yeni == ACIK:
+            self._acildi = self._saat()
+            self._probe_basladi = None
+
+    def izin(self) -> str:
+        """GEC: isteği gönder | PROBE: önce sağlık kontrolü yap, sonucu probe_bitti ile bildir | REDDET."""
+        with self._lock:
+            if self._durum == KAPALI:
+                return GEC
+            simdi = self._saat()
+            if self._durum == ACIK and simdi - self._acildi >= self.acik_sn:
+                self._gecis(YARI_ACIK)
+            # Probe sahibi sonucu bildirmeden kaybolduysa (hata/timeout) yeni probe hakkı verilir
+            if self._durum == YARI_ACIK and (
+                self._probe_basladi is None or simdi - self._probe_basladi >= self.acik_sn
+            ):
+                self._probe_basladi = simdi
+                return PROBE
+            self._m["hizli_red"] += 1
+            return REDDET
+
+    def probe_bitti(self, ok: bool):
+        with self._lock:
+            if ok:
+                self._m["probe_basarili"] += 1
+                self._ardisik_hata = 0
+                self._gecis(KAPALI)
+            else:
+                self._m["probe_basarisiz"] += 1
+                self._gecis(ACIK)
+
+    def basarili(self):
+        with self._lock:
+            self._ardisik_hata = 0
+
+    def basarisiz(self):
+        with self._lock:
+            self._ardisik_hata += 1
+            if self._durum == KAPALI and self._ardisik_hata >= self.hata_esigi:
+                self._gecis(ACIK)
+
+    def durum(self) -> str:
+        with self._lock:
+            return self._durum
+
+    def sifirla(self):
+        with self._lock:
+            self._ardisik_hata = 0
+            self._gecis(KAPALI)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            kalan = None
+            if self._durum == ACIK:
+                kalan = round(max(0.0, self.acik_sn - (self._saat() - self._acildi)), 3)
+            return {
+                "durum": self._durum,
+                "ardisik_hata": self._ardisik_hata,
+                "hata_esigi": self.hata_esigi,
+                "acik_kalan_sn": kalan,
+                "gecis": dict(self._m["gecis"]),
+                "hizli_red": self._m["hizli_red"],
+                "probe_basarili": self._m["probe_basarili"],
+                "probe_basarisiz": self._m["probe_basarisiz"],
+            }
@@ -0,0 +1,55 @@
+"""
+SQLite eşzamanlılık profili: her yeni DB bağlantısında PRAGMA'lar (connection_created).
+
+- journal_mode=WAL: okuyucular yazarı, yazar okuyucuları beklemez (tek yazar kuralı sürer).
+- busy_timeout: kilit meşgulse hemen "database is locked" yerine bu kadar ms bekle.
+- synchronous=NORMAL: WAL'da güvenli; her commit'te fsync yerine checkpoint'te.
+- mmap_size / cache_size: okumalar için bellek eşlemesi ve sayfa önbelleği (negatif = KiB).
+
+Değerler settings.SQLITE_PRAGMAS'tan (env ile ayarlanır); boş değer o PRAGMA'yı atlar.
+Sıra önemli: busy_timeout, journal_mode değişikliğinden önce uygulanır.
+"""
+import logging
+import re
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+PRAGMA_SIRASI = ("busy_timeout", "journal_mode", "synchronous", "mmap_size", "cache_size")
+_DEGER = re.compile(r"^-?\w+$")
+
+
+def komutlar(pragmalar):
+    """{isim: değer} -> ["PRAGMA isim=değer", ...] (PRAGMA_SIRASI ile)."""
+    out = []
+    for isim in PRAGMA_SIRASI:
+        deger = pragmalar.get(isim)
+        if deger is None or deger == "":
+            continue
+        # PRAGMA parametre almaz; env'den gelen değer SQL'e gömülmeden önce doğrulanır
+        if not _DEGER.match(str(deger)):
+            raise ImproperlyConfigured(f"Geçersiz SQLite PRAGMA değeri: {isim}={deger!r}")
+        out.append(f"PRAGMA {isim}={deger}")
+    return out
+
+
+def uygula(cursor, pragmalar):
+    """PRAGMA'ları verilen DB-API cursor'ında çalıştırır (benchmark da bunu kullanır)."""
+    for komut in komutlar(pragmalar):
+        cursor.execute(komut)
+
+
+@receiver(connection_created, dispatch_uid="sqlite_pragmalari")
+def baglanti_acildi(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    from django.conf import settings
+
+    pragmalar = getattr(settings, "SQLITE_PRAGMAS", None)
+    if not pragmalar:
+        return
+    with connection.cursor() as cursor:
+        uygula(cursor, pragmalar)
@@ -0,0 +1,220 @@
+"""
+Paylaşılan HTTP istemci katmanı (requests.Session + urllib3 bağlantı havuzları).
+
+- Her çağrı yeri (site) kendi Session'ını kullanır; Session host başına keep-alive
+  havuzu tutar, böylece her istekte yeni TCP/TLS el sıkışması yapılmaz.
+- Havuz boyutları ve retry ayarları settings'ten gelir (HTTP_POOL_*, HTTP_RETRY_*).
+- Retry sadece idempotent metotlarda (GET/HEAD/OPTIONS) yapılır; 429/503'te
+  Retry-After header'ına uyulur.
+- Timeout çağrı yerine göre belirlenir (SITE_PROFILES), çağıran override edebilir.
+
+Kullanım:
+    from sinema_sitesi import http_client
+    r = http_client.get(url, site="tmdb", params={...})
+    r = await http_client.aget(url, site="tmdb", params={...})   # ASGI view'ları (httpx)
+"""
+import asyncio
+import logging
+import threading
+import weakref
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Çağrı yeri profilleri: retry (idempotent metotlar için) ve varsayılan timeout (connect, read)
+SITE_PROFILES = {
+    # Detay sayfası / önbellek tazeleme: kısa timeout, birkaç retry
+    "tmdb": {"retry": True, "timeout": (3.05, 3)},
+    # film_cek: kendi retry/rate-limit döngüsü var, burada retry yok
+    "tmdb_toplu": {"retry": False, "timeout": (3.05, 10)},
+    # AI servisi: POST + deadline taşıyor; retry yok, timeout AI_API_TIMEOUT
+    "ai": {"retry": False, "timeout": None},
+}
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+_counters = {}
+
+
+class _TimeoutAdapter(HTTPAdapter):
+    """Çağıran timeout vermezse profil timeout'unu uygular."""
+
+    def __init__(self, *args, default_timeout=None, **kwargs):
+        self.default_timeout = default_timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.default_timeout
+        return super().send(request, **kwargs)
+
+
+def _profile(site):
+    profile = dict(SITE_PROFILES.get(site, {"retry": True, "timeout": None}))
+    if profile["timeout"] is None:
+        profile["timeout"] = getattr(settings, "AI_API_TIMEOUT", 10) if site == "ai" else (3.05, 10)
+    return profile
+
+
+def _build_retry(enabled):
+    if not enabled:
+        return Retry(total=0, connect=0, read=0, redirect=3, status=0, raise_on_status=False)
+    return Retry(
+        total=getattr(settings, "HTTP_RETRY_TOTAL", 3),
+        backoff_factor=getattr(settings, "HTTP_RETRY_BACKOFF", 0.5),
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=IDEMPOTENT_METHODS,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+
+def get_session(site="default"):
+    """Site için paylaşılan Session (ilk çağrıda oluşturulur)."""
+    session = _sessions.get(site)
+    if session is not None:
+        return session
+    with _sessions_lock:
+        session = _sessions.get(site)
+        if session is None:
+            profile = _profile(site)
+            adapter = _TimeoutAdapter(
+                pool_connections=getattr(settings, "HTTP_POOL_CONNECTIONS", 10),
+                pool_maxsize=getattr(settings, "HTTP_POOL_MAXSIZE", 10),
+                max_retries=_build_retry(profile["retry"]),
+                default_timeout=profile["timeout"],
+            )
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[site] = session
+            _counters[site] = {"requests": 0, "errors": 0}
+    return session
+
+
+def _count(site, name):
+    with _sessions_lock:
+        sayac = _counters.setdefault(site, {"requests": 0, "errors": 0})
+        sayac[name] += 1
+
+
+def request(method, url, site="default", **kwargs):
+    session = get_session(site)
+    _count(site, "requests")
+    try:
+        return session.request(method, url, **kwargs)
+    except requests.RequestException:
+        _count(site, "errors")
+        raise
+
+
+def get(url, site="default", **kwargs):
+    return request("GET", url, site=site, **kwargs)
+
+
+def post(url, site="default", **kwargs):
+    return request("POST", url, site=site, **kwargs)
+
+
+def metrics():
+    """
+    Site ve host bazında bağlantı yeniden kullanım metrikleri.
+    reuse_ratio = 1 - (açılan bağlantı / gönderilen istek); 1'e yakın = keep-alive çalışıyor.
+    Not: urllib3 havuzu (pool_connections) dolunca en eski host havuzunu atar; o host'un sayaçları sıfırlanır.
+    """
+    out = {}
+    with _sessions_lock:
+        items = list(_sessions.items())
+    for site, session in items:
+        adapter = session.get_adapter("https://")
+        pools = {}
+        pm = adapter.poolmanager
+        for key in list(pm.pools.keys()):
+            pool = pm.pools.get(key)
+            if pool is None:
+                continue
+            host = f"{pool.scheme}://{pool.host}:{pool.port}"
+            n_conn, n_req = pool.num_connections, pool.num_requests
+            pools[host] = {
+                "connections_opened": n_conn,
+                "requests": n_req,
+                "reuse_ratio": round(1 - n_conn / n_req, 3) if n_req else None,
+                "idle_in_pool": pool.pool.qsize() if pool.pool is not None else 0,
+                "pool_maxsize": pool.pool.maxsize if pool.pool is not None else None,
+            }
+        out[site] = {**_counters.get(site, {}), "pools": pools}
+    with _sessions_lock:
+        # Sadece async istemciyle kullanılan siteler (httpx havuz sayaçlarını dışarı açmıyor)
+        for site, sayac in _counters.items():
+            out.setdefault(site, {**sayac, "pools": {}})
+    return out
+
+
+def reset():
+    """Tüm Session'ları kapatır (testler ve fork sonrası için)."""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+        _counters.clear()
+
+
+# --------------------------------------------------------
+# ASYNC (httpx) - ASGI view'ları için
+# --------------------------------------------------------
+# httpx.AsyncClient event loop'a bağlıdır: loop ve site başına bir havuzlu istemci tutulur
+# (uvicorn'da worker başına tek loop). Timeout profil ile aynı; httpx yalnızca bağlantı
+# kurma hatalarını tekrar dener (status tabanlı retry / Retry-After yok).
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _yeni_async_istemci(site):
+    import httpx
+
+    profile = _profile(site)
+    timeout = profile["timeout"]
+    connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+    maxsize = getattr(settings, "HTTP_POOL_MAXSIZE", 10)
+    transport = httpx.AsyncHTTPTransport(
+        limits=httpx.Limits(max_connections=maxsize, max_keepalive_connections=maxsize),
+        retries=getattr(settings, "HTTP_RETRY_TOTAL", 3) if profile["retry"] else 0,
+    )
+    return httpx.AsyncClient(transport=transport, timeout=httpx.Timeout(read, connect=connect))
+
+
+def get_async_client(site="default"):
+    """Çalışan event loop'un site için paylaşılan httpx.AsyncClient'ı."""
+    istemciler = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    client = istemciler.get(site)
+    if client is None or client.is_closed:
+        client = istemciler[site] = _yeni_async_istemci(site)
+    return client
+
+
+async def arequest(method, url, site="default", **kwargs):
+    import httpx
+
+    client = get_async_client(site)
+    _count(site, "requests")
+    try:
+        return await client.request(method, url, **kwargs)
+    except httpx.HTTPError:
+        _count(site, "errors")
+        raise
+
+
+async def aget(url, site="default", **kwargs):
+    return await arequest("GET", url, site=site, **kwargs)
+
+
+async def aclose():
+    """Bu loop'un istemcilerini kapatır (testler / kapanış)."""
+    for client in _async_clients.pop(asyncio.get_running_loop(), {}).values():
+        await client.aclose()
@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 
 import os
 from pathlib import Path
+
+import django
 from decouple import config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -83,6 +85,9 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "sinema_sitesi.wsgi.application"
+ASGI_APPLICATION = "sinema_sitesi.asgi.application"
+# True: site uvicorn (ASGI) ile sunulur (start.sh), film detay sayfası async view'a geçer
+ASGI_MODE = config("ASGI_MODE", default=False, cast=bool)
 
 # --------------------------------------------------------
 # VERİTABANI
@@ -91,9 +96,45 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": {
+            # Yazan transaction'lar kilidi BEGIN'de alır: okuma->yazma yükseltmesinde
+            # busy_timeout'u atlayan anında "database is locked" hatası olmaz (Django 5.1+)
+            **({"transaction_mode": config("SQLITE_TRANSACTION_MODE", default="IMMEDIATE")}
+               if django.VERSION >= (5, 1) else {}),
+        },
     }
 }
 
+# ✅ SQLite eşzamanlılık profili (sinema_sitesi/db_pragmas.py her bağlantıda uygular)
+# Boş bırakılan değer o PRAGMA'yı atlar (SQLite varsayılanı kalır).
+SQLITE_PRAGMAS = {
+    "journal_mode": config("SQLITE_JOURNAL_MODE", default="WAL"),
+    "busy_timeout": config("SQLITE_BUSY_TIMEOUT_MS", default="5000"),
+    "synchronous": config("SQLITE_SYNCHRONOUS", default="NORMAL"),
+    "mmap_size": config("SQLITE_MMAP_SIZE", default=str(256 * 1024 * 1024)),
+    # Negatif: KiB cinsinden (-20000 ~ 20 MB, bağlantı başına)
+    "cache_size": config("SQLITE_CACHE_SIZE", default="-20000"),
+}
+
+# --------------------------------------------------------
+# ÖNBELLEK
+# --------------------------------------------------------
+# Çok worker'lı kurulumda ortak cache gerekir (autocomplete sürümü, TMDB tazeleme kilidi).
+# REDIS_URL verilmezse süreç içi LocMem kullanılır (tek süreç / geliştirme).
+# RedisCache `redis` paketini kullanır (requirements.in).
+REDIS_URL = config("REDIS_URL", default="")
+CACHES = {
+    "default": (
+        {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": REDIS_URL}
+        if REDIS_URL else
+        {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    )
+}
+
+# Ana sayfa bölümleri (dashboard_service); katalog değişince zaten silinir, TTL emniyet için.
+# LocMem'de ayrı süreçteki film_cek'in silmesi web sürecine ulaşmaz: o zaman gecikme en fazla bu TTL.
+DASHBOARD_CACHE_TTL = config("DASHBOARD_CACHE_TTL", default=600, cast=int)
+
 # --------------------------------------------------------
 # ŞİFRE DOĞRULAMA
 # --------------------------------------------------------
@@ -107,15 +148,59 @@ AUTH_PASSWORD_VALIDATORS = [
 # --------------------------------------------------------
 # API AYARLARI
 # --------------------------------------------------------
+# ✅ Paylaşılan HTTP istemcisi (sinema_sitesi/http_client.py)
+# pool_connections: tutulacak host havuzu sayısı, pool_maxsize: host başına keep-alive bağlantı
+HTTP_POOL_CONNECTIONS = config("HTTP_POOL_CONNECTIONS", default=10, cast=int)
+HTTP_POOL_MAXSIZE = config("HTTP_POOL_MAXSIZE", default=10, cast=int)
+# Sadece idempotent (GET/HEAD/OPTIONS) istekler; 429/5xx'te Retry-After'a uyulur
+HTTP_RETRY_TOTAL = config("HTTP_RETRY_TOTAL", default=3, cast=int)
+HTTP_RETRY_BACKOFF = config("HTTP_RETRY_BACKOFF", default=0.5, cast=float)
+
 TMDB_API_KEY = config("TMDB_API_KEY", default="")
+# Test/benchmark için yerel TMDB taklidine yönlendirilebilir (scripts/fake_tmdb_server.py)
+TMDB_BASE_URL = config("TMDB_BASE_URL", default="https://api.themoviedb.org/3")
+# film_cek token bucket hızı (istek/sn); sunucu header'ları ve 429 bunu daha da kısar
+TMDB_RATE_PER_SN = config("TMDB_RATE_PER_SN", default=20, cast=float)
+# TMDB detay önbelleği (TmdbDetay): bu süreden eski kayıtlar bayat sayılır,
+# sayfa bayat veriyle render edilir ve tazeleme arka planda yapılır (stale-while-revalidate)
+TMDB_CACHE_TTL = config("TMDB_CACHE_TTL", default=7 * 24 * 3600, cast=int)
+# False: tazeleme istek içinde senkron yapılır (testler / tek seferlik scriptler için)
+TMDB_REFRESH_ASYNC = config("TMDB_REFRESH_ASYNC", default=True, cast=bool)
 
 # ✅ YAPAY ZEKA SERVİSİ (Django -> FastAPI)
 # Modlar: 'direct' (Doğrudan çalıştır), 'api' (Harici servise istek at)
 AI_MODE = config("AI_MODE", default="direct")
 
 # Buraya /analiz yazma. Base URL olsun.
-AI_API_URL = "http://127.0.0.1:8001"
+AI_API_URL = config("AI_API_URL", default="http://127.0.0.1:8001")
+# Birden çok replika (virgülle ayrılmış base URL'ler); boşsa tek replika: AI_API_URL.
+# İstekler power-of-two-choices ile dağıtılır (uçuştaki isteği az olan), hata veren replika dışarı atılır.
+AI_API_URLS = [u.strip() for u in config("AI_API_URLS", default="").split(",") if u.strip()] or [AI_API_URL]
+# True: tekli analizler normalize metne göre tutarlı hashing ile hep aynı replikaya gider
+AI_LB_HASH = config("AI_LB_HASH", default=False, cast=bool)
 AI_API_TIMEOUT = 10
+# /analiz/toplu (yeniden analiz, içe aktarma): istek başına yorum ve süre sınırı
+AI_API_TOPLU_BOYUT = config("AI_API_TOPLU_BOYUT", default=64, cast=int)
+AI_API_TOPLU_TIMEOUT = config("AI_API_TOPLU_TIMEOUT", default=60, cast=float)
+# Devre kesici (replika başına): art arda bu kadar hatada replika dışarı atılır; hepsi dışarıdayken
+# istekler servise gitmez, sadece kurallarla karar verilir (veya 'circuit_open' ile tekrar kuyruğa alınır).
+# AI_CB_ACIK_SN sonra tek bir sağlık kontrolü (GET /, AI_CB_PROBE_TIMEOUT) devreyi tekrar dener.
+AI_CB_HATA_ESIGI = config("AI_CB_HATA_ESIGI", default=5, cast=int)
+AI_CB_ACIK_SN = config("AI_CB_ACIK_SN", default=30.0, cast=float)
+AI_CB_PROBE_TIMEOUT = config("AI_CB_PROBE_TIMEOUT", default=1.0, cast=float)
+# Direct mode: model yüklenemediyse import bu kadar saniye boyunca tekrar denenmez
+AI_MODEL_TEKRAR_SN = config("AI_MODEL_TEKRAR_SN", default=60, cast=int)
+
+# ✅ ASENKRON YORUM ANALİZİ (DB tabanlı kuyruk)
+# Yorum 'bekliyor' durumunda kaydedilir, worker batch halinde analiz eder.
+# AI_QUEUE_WORKER=False ise web süreci worker başlatmaz (ayrı süreç: manage.py analiz_worker)
+AI_QUEUE_WORKER = config("AI_QUEUE_WORKER", default=True, cast=bool)
+AI_QUEUE_BATCH_SIZE = config("AI_QUEUE_BATCH_SIZE", default=16, cast=int)
+AI_QUEUE_MAX_ATTEMPTS = config("AI_QUEUE_MAX_ATTEMPTS", default=3, cast=int)
+# 'isleniyor' durumunda bu kadar kalan iş (worker çöktü) tekrar kuyruğa alınır
+AI_QUEUE_LEASE_SN = config("AI_QUEUE_LEASE_SN", default=300, cast=int)
+# Uyandırma sinyali gelmezse worker bu aralıkla kuyruğu yoklar
+AI_QUEUE_POLL_SN = config("AI_QUEUE_POLL_SN", default=5.0, cast=float)
 
 # --------------------------------------------------------
 # DİL VE ZAMAN
@@ -1,15 +1,25 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 from django.contrib.auth import views as auth_views
-from filmler.views import anasayfa, film_detay, toplu_film_ekle, kayit_ol, live_search
+from filmler.views import (
+    anasayfa, film_detay, film_detay_async, toplu_film_ekle, kayit_ol, live_search, yorum_durum, http_metrikleri,
+    ai_metrikleri, film_listesi, yorum_listesi,
+)
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', anasayfa, name='anasayfa'),
     path('yukle/', toplu_film_ekle, name='toplu_film_ekle'),
-    path('film/<int:film_id>/', film_detay, name='film_detay'),
+    # ASGI (uvicorn) altında detay sayfası TMDB ve DB işlerini eşzamanlı yapan async view ile
+    path('film/<int:film_id>/', film_detay_async if settings.ASGI_MODE else film_detay, name='film_detay'),
+    path('film/<int:film_id>/yorum-durum/', yorum_durum, name='yorum_durum'),
+    path('film/<int:film_id>/yorumlar/', yorum_listesi, name='yorum_listesi'),
+    path('filmler/liste/', film_listesi, name='film_listesi'),
     path('register/', kayit_ol, name='register'),
     path('live-search/', live_search, name='live_search'),
+    path('yonetim/http-metrikleri/', http_metrikleri, name='http_metrikleri'),
+    path('yonetim/ai-metrikleri/', ai_metrikleri, name='ai_metrikleri'),
 
     # Sifre Sifirlama Adimlari
     path('accounts/password_reset/', auth_views.PasswordResetView.as_view(
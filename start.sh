@@ -23,4 +23,14 @@ python manage.py collectstatic --noinput
 echo "Veritabanı otomatik dolduruluyor (film_cek 1)..."
 python manage.py film_cek 1 || echo "Film çekme işleminde hata oluştu ama devam ediliyor..."
 
-gunicorn sinema_sitesi.wsgi:application --bind 0.0.0.0:$PORT --timeout 600 --workers 1 --threads 2
+# ASGI_MODE=True: uvicorn worker'ları (async film detay view'ı); aksi halde WSGI gunicorn
+case "${ASGI_MODE:-False}" in
+  [Tt]rue|1|[Yy]es|[Oo]n)
+    # Django ASGI handler'ı lifespan protokolünü desteklemiyor
+    uvicorn sinema_sitesi.asgi:application --host 0.0.0.0 --port "$PORT" \
+      --workers "${WEB_CONCURRENCY:-1}" --lifespan off
+    ;;
+  *)
+    gunicorn sinema_sitesi.wsgi:application --bind 0.0.0.0:$PORT --timeout 600 --workers 1 --threads 2
+    ;;
+esac
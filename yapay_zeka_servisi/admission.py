@@ -0,0 +1,154 @@
+"""
+AI servisi için admission control ve yük atma (load shedding).
+
+- Her öncelik sınıfının (interactive / bulk) sınırlı bir kuyruğu vardır.
+  Kuyruk doluysa istek hiç işlenmeden reddedilir (QueueFull -> 503 + Retry-After).
+- BERT aşaması tek (veya az sayıda) slot'tur. Interactive iş bekliyorsa bulk slot alamaz;
+  bulk'ın tamamen açlığa düşmemesi için her INTERACTIVE_BURST interactive batch'ten sonra
+  bekleyen bir bulk batch'ine sıra verilir.
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+PRIORITY_CLASSES = (INTERACTIVE, BULK)
+
+INTERACTIVE_BURST = 8
+
+
+class QueueFull(Exception):
+    """Sınıf kuyruğu dolu; retry_after saniye sonra tekrar denenmeli."""
+
+    def __init__(self, cls: str, retry_after: int):
+        super().__init__(f"{cls} kuyruğu dolu")
+        self.cls = cls
+        self.retry_after = retry_after
+
+
+def normalize_priority(value) -> str:
+    v = (value or "").strip().lower()
+    return v if v in PRIORITY_CLASSES else INTERACTIVE
+
+
+class AdmissionController:
+    def __init__(self, limits: dict, bert_slots: int = 1):
+        self.limits = dict(limits)
+        self.bert_slots = max(1, int(bert_slots))
+        self._cond = threading.Condition()
+        self._bert_busy = 0
+        self._bert_waiting = {c: 0 for c in self.limits}
+        self._interactive_streak = 0
+        self._m = {
+            c: {
+                "in_system": 0,
+                "max_in_system": 0,
+                "admitted": 0,
+                "rejected": 0,
+                "completed": 0,
+                "bert_batches": 0,
+                "bert_wait_sn": 0.0,
+                "service_ema_sn": 0.0,
+            }
+            for c in self.limits
+        }
+
+    # --- Kuyruk (admission) ---
+    @contextmanager
+    def admit(self, cls: str):
+        t0 = time.monotonic()
+        with self._cond:
+            m = self._m[cls]
+            if m["in_system"] >= self.limits[cls]:
+                m["rejected"] += 1
+                raise QueueFull(cls, self._retry_after(cls))
+            m["in_system"] += 1
+            m["admitted"] += 1
+            m["max_in_system"] = max(m["max_in_system"], m["in_system"])
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - t0
+            with self._cond:
+                m["in_system"] -= 1
+                m["completed"] += 1
+                m["service_ema_sn"] = 0.8 * m["service_ema_sn"] + 0.2 * elapsed
+
+    def _retry_after(self, cls: str) -> int:
+        m = self._m[cls]
+        est = m["service_ema_sn"] * m["in_system"] / self.bert_slots
+        return max(1, math.ceil(est))
+
+    def in_system(self) -> int:
+        with self._cond:
+            return sum(m["in_system"] for m in self._m.values())
+
+    def bert_load(self, cls: str) -> int:
+        """
+        cls için BERT slot'unda rekabet eden iş sayısı (degrade kararı).
+        Interactive, bulk'ın önüne geçtiği için yalnızca kendi sınıfını sayar;
+        bulk ise her iki sınıfın da arkasında bekler.
+        """
+        with self._cond:
+            if cls == INTERACTIVE:
+                return self._m[INTERACTIVE]["in_system"]
+            return sum(m["in_system"] for m in self._m.values())
+
+    # --- BERT aşaması (öncelikli slot) ---
+    def _can_run(self, cls: str) -> bool:
+        if self._bert_busy >= self.bert_slots:
+            return False
+        if cls == BULK and self._bert_waiting.get(INTERACTIVE, 0) > 0:
+            # Açlık koruması: uzun interactive serisinden sonra bulk'a bir sıra
+            return self._interactive_streak >= INTERACTIVE_BURST
+        if cls == INTERACTIVE and self._bert_waiting.get(BULK, 0) > 0:
+            return self._interactive_streak < INTERACTIVE_BURST
+        return True
+
+    @contextmanager
+    def bert_slot(self, cls: str):
+        t0 = time.monotonic()
+        with self._cond:
+            self._bert_waiting[cls] += 1
+            try:
+                while not self._can_run(cls):
+                    self._cond.wait()
+            finally:
+                self._bert_waiting[cls] -= 1
+            self._bert_busy += 1
+            self._interactive_streak = self._interactive_streak + 1 if cls == INTERACTIVE else 0
+            m = self._m[cls]
+            m["bert_batches"] += 1
+            m["bert_wait_sn"] += time.monotonic() - t0
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._bert_busy -= 1
+                self._cond.notify_all()
+
+    def gate_for(self, cls: str):
+        """app_ensemble'a verilecek bert_gate (context manager üreten callable)."""
+        return lambda: self.bert_slot(cls)
+
+    # --- Metrikler ---
+    def metrics(self) -> dict:
+        with self._cond:
+            out = {"bert_slots": self.bert_slots, "bert_busy": self._bert_busy, "classes": {}}
+            for c, m in self._m.items():
+                batches = m["bert_batches"]
+                out["classes"][c] = {
+                    "limit": self.limits[c],
+                    "in_system": m["in_system"],
+                    "max_in_system": m["max_in_system"],
+                    "bert_waiting": self._bert_waiting[c],
+                    "admitted": m["admitted"],
+                    "rejected": m["rejected"],
+                    "completed": m["completed"],
+                    "bert_batches": batches,
+                    "avg_bert_wait_ms": (m["bert_wait_sn"] / batches * 1000) if batches else 0.0,
+                    "service_ema_ms": m["service_ema_sn"] * 1000,
+                }
+            return out
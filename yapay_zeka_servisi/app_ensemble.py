@@ -3,9 +3,9 @@ import numpy as np
 import pandas as pd
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 from pathlib import Path
-import difflib
 import joblib
-import re
+import time
+from contextlib import nullcontext
 try:
     from .nlp_utils import temizle_tek, temizle_liste
 except ImportError:
@@ -61,357 +61,18 @@ print("[OK] SERVICE_DIR:", SERVICE_DIR)
 print("[OK] BERT_MODEL_PATH:", BERT_MODEL_PATH, "exists=", BERT_MODEL_PATH.exists())
 print("[OK] TFIDF_PATH:", TFIDF_BUNDLE_PATH, "exists=", TFIDF_BUNDLE_PATH.exists())
 
-MAX_TEXT_LENGTH = 5000
-
 # 3-sınıf etiketler (0,1,2) — başlangıç varsayılanları, BERT load sonrası config'ten güncellenir
 LABELS = ["OLUMSUZ", "NÖTR", "OLUMLU"]
 ID2LABEL = {0: "OLUMSUZ", 1: "NÖTR", 2: "OLUMLU"}
 LABEL2ID = {"OLUMSUZ": 0, "NÖTR": 1, "OLUMLU": 2}
 
 # ---------------------------------------------------------------------
-# 2) GUARDRAIL + NÖTR KURALLARI
-# ---------------------------------------------------------------------
-NEG_HINTS = [
-    "rezalet", "berbat", "iğrenç", "igrenc", "çöp", "cop", "bok", "kaka",
-    "sakın", "sakin", "pişman", "pisman", "fiyasko", "zıkkım", "saçma",
-    "boş", "bos", "dandik", "izlenilmez", "kaçın", "kacin", "sıkıcı",
-    "sikici", "bayık", "bayik", "uykumu", "vakit_kaybi", "zaman_kaybi",
-    "yetersiz", "sığ", "sig", "amatör", "amator", "beceriksiz", "tırt",
-    "tirt", "leş", "lez", "kusturucu", "işkence", "iskence", "zulüm",
-    "zulum", "katlanılmaz", "ucuz", "basit", "facia", "kepaze", "yavan",
-]
-POS_HINTS = [
-    "mükemmel", "mukemmel", "şaheser", "saheser", "efsane", "bayıldım",
-    "harika", "başyapıt", "basyapit", "müthiş", "muthis", "harikulade",
-    "tapıyorum", "mutlaka", "soluksuz", "sürükleyici", "surukleyici",
-    "masterpiece", "şahane", "sahane", "epik", "kült", "kult", "sarsıcı",
-    "vurucu", "derinlikli", "vizyoner", "doyurucu", "fevkalade",
-    "kusursuz", "enfes", "şaşırtıcı", "sasirtici", "büyüleyici",
-    "buyuleyici", "döktürmüş",
-]
-
-NEGATION_TOKENS_RAW = {
-    "degil", "değil", "yok", "hic", "hiç", "asla", "katiyen", "maalesef",
-    "olmaz", "olamaz", "hicbir", "hiçbir",
-}
-NEGATION_PHRASES_RAW = {"bile degil", "bile değil"}
-
-NEG_EMOJIS = ["💩", "👎", "🤮", "🤬", "😡", "😠", "🤢", "😴", "🤦", "😤", "📉", "🗑️"]
-POS_EMOJIS = ["💯", "🔥", "👍", "❤️", "😍", "🥰", "⭐", "✨", "👏", "🙌", "🤩", "🚀", "🍿", "👑"]
-
-NEG_PHRASES = [
-    "sakın gitmeyin", "zaman kaybı", "zaman kaybi", "vakit kaybı", "vakit kaybi",
-    "param haram olsun", "haram olsun", "izlemeyin", "izlenmez", "uzak durun",
-    "yanına bile yaklaşmayın", "berbat ötesi", "rezalet ötesi", "izlemeye değmez",
-    "izlemeye degmez", "pişman oldum", "pisman oldum", "sıkıldım izlerken",
-    "sikildim izlerken", "vaktimi çaldı", "vaktimi caldi", "berbat bir film",
-    "rezil bir film", "en kötü film", "en kotu film", "tam bir hayal kırıklığı",
-    "tam bir hayal kirikligi", "beş para etmez", "bes para etmez", "yarıda bıraktım",
-    "yarida biraktim", "sonu saçmaydı", "sonu sacmaydi", "senaryo çok kötü",
-    "senaryo cok kotu", "hiç beğenmedim", "hic begenmedim", "hayatımdan çalınan",
-    "hayatimdan calinan", "tahammül edemedim", "tahammul edemedim", "içim şişti",
-    "icim sisti", "ruhum daraldı", "ruhum daraldi", "gözlerim kanadı", "gozlerim kanadi",
-    "beyin yakan saçmalık", "beyin yakan sacmalik", "mantık hatası dolu",
-    "mantik hatasi dolu", "oyunculuklar yerlerde", "efektler berbat", "kurgu felaket",
-    "tavsiye etmem",
-]
-POS_PHRASES = [
-    "kesinlikle izleyin", "mutlaka izleyin", "kaçırmayın", "kacirmayin", "kaçırma",
-    "kacirma", "defalarca izlenir", "herkese tavsiye ederim", "şiddetle tavsiye",
-    "siddetle tavsiye", "arşivlik", "arsivlik", "tekrar izleyeceğim", "tekrar izleyecegim",
-    "şans verin", "sans verin", "sakın kaçırmayın", "sakin kacirmayin", "favorim oldu",
-    "efsane olmuş", "efsane olmus", "muhteşem bir film", "muhtesem bir film",
-    "hayran kaldım", "hayran kaldim", "en iyi filmlerden", "favorilerime eklendi",
-    "şimdiye kadar izlediğim en iyi", "simdiye kadar izledigim en iyi", "oyunculuk harika",
-    "senaryo mükemmel", "senaryo mukemmel", "görüntü yönetmeni döktürmüş",
-    "goruntu yonetmeni dokturbus", "oyunculuk resitali", "senaryo çok zekice",
-    "senaryo cok zekice", "ters köşe", "ters kose", "sonu mükemmeldi", "sonu mukemmeldi",
-    "etkisinden çıkamadım", "etkisinden cikamadim", "ağzımız açık izledik", "agzimiz acik izledik",
-    "soluksuz izledim", "gözünü kırpmadan", "gozunu kirpmadan", "su gibi aktı", "su gibi akti",
-    "10 numara", "yıldızlı pekiyi", "yildizli pekiyi", "tek kelimeyle muazzam",
-    "ayakta alkışlanacak", "ayakta alkislanacak",
-]
-
-NEUTRAL_STRICT_PHRASES = [
-    "ne iyi ne kotu", "ne cok iyi ne cok kotu", "ne iyi ne de kotu", "ne cok iyi ne de kotu",
-    "eh iste", "orta karar",
-]
-NEUTRAL_SOFT_PHRASES = [
-    "ortalama", "vasat", "idare eder", "normal", "soyle boyle", "siradan", "standart",
-    "kararsizim", "kotu degil ama iyi de degil", "begenmedim ama kotu degil",
-    "mukemmel degil ama kotu de degil", "cok beklentiye girmeyin", "beklentimin altinda",
-    "beklentimi karsilamadi", "cerezlik", "vakit gecirmelik", "kafa dagitmalik",
-    "yoklukta gider", "pazar sinemasi", "tv filmi tadinda", "bos vakitte izlenir",
-    "izlenir ama", "tek seferlik", "bir kere izlenir", "etki yaratmiyor", "akilda kalici degil",
-    "iz birakmiyor", "iz birakacak bir etki yaratmiyor", "fikir guzel ama uygulama zayif",
-    "potansiyeli harcanmis", "guzel basladi kotu bitti", "iyi basladi ama", "sonu haric",
-    "biraz sikici", "fena degildi ama", "guzeldi ama", "abartildigi kadar degil",
-    "klise dolu", "siradan bir yapim",
-]
-
-CONTRAST_TOKENS = {"ama", "fakat", "ancak", "lakin", "ragmen", "rağmen", "halde"}
-CONTRAST_PHRASES = {"yine de", "buna ragmen", "buna rağmen"}
-
-MILD_POS_PHRASES = [
-    "fena degil", "fena değil", "fena degildi", "fena değildi", "iyiydi", "guzeldi", "güzeldi",
-    "iyi sayilir", "kotu degildi", "kötü değildi", "oyunculuklar iyi", "cekimler guzel",
-    "çekimler güzel", "muzikler guzel", "müzikler güzel", "goruntu guzel", "görüntü güzel",
-    "fikir guzel", "baslangic iyi", "başlangıç iyi", "atmosfer iyi", "potansiyel var",
-    "kurgu iyi", "konu guzel", "mekanlar guzel", "kostumler iyi", "kostümler iyi",
-    "efektler iyi", "kotu sayilmaz", "izlenir",
-]
-MILD_NEG_WORDS = {
-    "zayif", "zayıf", "eksik", "sikici", "sıkıcı", "uzun", "yorucu", "vasat", "ortalama",
-    "kotu", "kötü", "bayik", "bayık", "sacma", "saçma", "kopuk", "yavas", "yavaş",
-    "siradan", "sıradan", "klise", "mantiksiz", "mantıksız", "tutarsiz", "tutarsız",
-    "basit", "olmamis", "olmamış", "yapay", "donuk", "abarti", "abartı", "zorlama",
-    "tahmin edilebilir", "heyecansiz", "heyecansız", "durgun", "sarkmis", "sarkmış",
-    "tempo dusuk", "tempo düşük", "inandirici degil", "inandırıcı değil", "finali kotu",
-    "finali kötü",
-}
-
-FUZZY_STRICT = 0.90
-FUZZY_RELAXED = 0.80
-
-# ✅ Opsiyonel neutral band (kapalı önerilir)
-BERT_NEUTRAL_LOW = 0.45
-BERT_NEUTRAL_HIGH = 0.65
-
-# ---------------------------------------------------------------------
-# SARCASM / IRONY DETECTION
+# 2) GUARDRAIL + NÖTR KURALLARI (torch'suz modülde: kurallar.py)
 # ---------------------------------------------------------------------
-SARCASM_MARKERS = [
-    "saka yapiyorum", "saka yapıyorum", "şaka yapıyorum", "şaka yapiyorum",
-    "ironi", "ironiydi", "ironiydi ya",
-    "tabii ki", "tabi ki", "saka maka",
-]
-
-SARCASM_NEG_CUES = [
-    "salonu terk", "terk ett", "ciktim", "çıktım", "cikmak",
-    "zor tuttum", "dayanamadim", "katlanamadim",
-    "berbat", "rezalet", "sıkıcı", "sikici", "iğrenç", "igrenc",
-    "vakit kayb", "zaman kayb", "pişman", "pisman", "cop", "çöp",
-]
-
-
-def split_on_sarcasm(text: str):
-    """
-    Metni ironi belirleyicisinden (marker) böler.
-    Returns: (head, tail, marker_found) veya (None, None, None)
-    """
-    clean = rule_clean(text)
-    for m in SARCASM_MARKERS:
-        mc = rule_clean(m)
-        if mc in clean:
-            parts = clean.split(mc, 1)
-            head = parts[0].strip() if len(parts) > 0 else ""
-            tail = parts[1].strip() if len(parts) > 1 else ""
-            return head, tail, m
-    return None, None, None
-
-
-def has_sarcasm_negative_tail(tail: str) -> bool:
-    """Tail kısmında açık olumsuz ipuçları var mı kontrol eder."""
-    if not tail:
-        return False
-    return any(cue in tail for cue in SARCASM_NEG_CUES)
-
-_TR_MAP = str.maketrans(
-    {
-        "ç": "c", "Ç": "c", "ğ": "g", "Ğ": "g", "ı": "i", "I": "i", "İ": "i",
-        "ö": "o", "Ö": "o", "ş": "s", "Ş": "s", "ü": "u", "Ü": "u",
-    }
-)
-
-def rule_clean(text: str) -> str:
-    if text is None:
-        return ""
-    t = str(text).lower().translate(_TR_MAP)
-    t = re.sub(r"[^\w\s]", " ", t, flags=re.UNICODE)
-    t = re.sub(r"\s+", " ", t).strip()
-    return t
-
-def _split_phrases(phrases):
-    single = set()
-    multi = []
-    for ph in phrases:
-        ph = (ph or "").strip()
-        if not ph:
-            continue
-        if " " in ph:
-            multi.append(ph)
-        else:
-            single.add(ph)
-    return single, multi
-
-def _has_any_phrase(clean: str, toks: list, single_set: set, multi_list: list) -> bool:
-    if single_set:
-        for t in toks:
-            if t in single_set:
-                return True
-    if multi_list:
-        for ph in multi_list:
-            if ph in clean:
-                return True
-    return False
-
-R_NEG_HINTS = [rule_clean(x) for x in NEG_HINTS if rule_clean(x)]
-R_POS_HINTS = [rule_clean(x) for x in POS_HINTS if rule_clean(x)]
-NEG_SET = set(R_NEG_HINTS)
-POS_SET = set(R_POS_HINTS)
-
-R_NEG_PHRASES = [rule_clean(x) for x in NEG_PHRASES if rule_clean(x)]
-R_POS_PHRASES = [rule_clean(x) for x in POS_PHRASES if rule_clean(x)]
-R_NEUTRAL_STRICT = [rule_clean(x) for x in NEUTRAL_STRICT_PHRASES if rule_clean(x)]
-R_NEUTRAL_SOFT = [rule_clean(x) for x in NEUTRAL_SOFT_PHRASES if rule_clean(x)]
-R_MILD_POS_PHRASES = [rule_clean(x) for x in MILD_POS_PHRASES if rule_clean(x)]
-R_CONTRAST_PHRASES = {rule_clean(x) for x in CONTRAST_PHRASES if rule_clean(x)}
-
-NEG_PH_SINGLE, NEG_PH_MULTI = _split_phrases(R_NEG_PHRASES)
-POS_PH_SINGLE, POS_PH_MULTI = _split_phrases(R_POS_PHRASES)
-NEU_STR_SINGLE, NEU_STR_MULTI = _split_phrases(R_NEUTRAL_STRICT)
-NEU_SFT_SINGLE, NEU_SFT_MULTI = _split_phrases(R_NEUTRAL_SOFT)
-MILD_POS_SINGLE, MILD_POS_MULTI = _split_phrases(R_MILD_POS_PHRASES)
-
-NEGATION_TOKENS = {rule_clean(x) for x in NEGATION_TOKENS_RAW if rule_clean(x)}
-NEGATION_PHRASES = {rule_clean(x) for x in NEGATION_PHRASES_RAW if rule_clean(x)}
-
-NE_NE_REGEX_1 = re.compile(r"\bne\s+(cok\s+)?iyi\w*\s+ne(\s+(de|da))?\s+(cok\s+)?kotu\w*\b")
-NE_NE_REGEX_2 = re.compile(r"\bne\s+(cok\s+)?kotu\w*\s+ne(\s+(de|da))?\s+(cok\s+)?iyi\w*\b")
-NE_GENERIC_REGEX = re.compile(r"\bne\b.{0,80}\bne(\s+de)?\b")
-
-NOT_BAD_BUT_RE = re.compile(r"\b(kotu|fena|berbat|rezalet)\b.*?\bdegil\b.*?\b(ama|fakat|ancak|lakin|yine\s+de)\b")
-GOOD_BUT_RE = re.compile(
-    r"\b(iyi|guzel|harika|basarili|surukleyici|atmosfer|muzik|muzikler|gorsel\w*|oyuncu\w*|efekt\w*)\b.*?\b(ama|fakat|ancak|lakin|yine\s+de|buna\s+ragmen)\b.*?\b(zayif|eksik|sikici|uzun|yavas|kopuk|siradan|vasat|tikan\w*|imkansiz|yoksun|dusuk|dustu|zor|anlamsiz)\b"
-)
-
-def negation_near(toks, i, window=2) -> bool:
-    left = max(0, i - window)
-    right = min(len(toks), i + window + 1)
-    window_toks = toks[left:right]
-    if any(t in NEGATION_TOKENS for t in window_toks):
-        return True
-    window_text = " ".join(window_toks)
-    if any(ph in window_text for ph in NEGATION_PHRASES):
-        return True
-    return False
-
-def check_guardrails(text: str, cutoff=0.85):
-    """
-    Döndürür: "neg" | "pos" | "neutral" | "conflict" | None
-    İyileştirme: Conflict kontrolü Nötr için de yapılıyor.
-    """
-    raw = "" if text is None else str(text)
-    neg_e = any(e in raw for e in NEG_EMOJIS)
-    pos_e = any(e in raw for e in POS_EMOJIS)
-    if neg_e and pos_e:
-        return "conflict"
-    if neg_e:
-        return "neg"
-    if pos_e:
-        return "pos"
-
-    clean = rule_clean(raw)
-    toks = clean.split()
-
-    neu_strict = (
-        _has_any_phrase(clean, toks, NEU_STR_SINGLE, NEU_STR_MULTI)
-        or bool(NE_NE_REGEX_1.search(clean))
-        or bool(NE_NE_REGEX_2.search(clean))
-    )
-    neu_soft = _has_any_phrase(clean, toks, NEU_SFT_SINGLE, NEU_SFT_MULTI)
-    neu_p = neu_strict or neu_soft
-
-    neg_p = _has_any_phrase(clean, toks, NEG_PH_SINGLE, NEG_PH_MULTI)
-    pos_p = _has_any_phrase(clean, toks, POS_PH_SINGLE, POS_PH_MULTI)
-
-    hits = int(neu_p) + int(neg_p) + int(pos_p)
-    if hits >= 2:
-        return "conflict"
-
-    if neg_p:
-        return "neg"
-    if pos_p:
-        return "pos"
-    if neu_p:
-        return "neutral"
-
-    neg_found = False
-    pos_found = False
-    for i, w in enumerate(toks):
-        if w in NEG_SET and not negation_near(toks, i, window=2):
-            neg_found = True
-        if w in POS_SET and not negation_near(toks, i, window=2):
-            pos_found = True
-        if neg_found and pos_found:
-            return "conflict"
-    if neg_found:
-        return "neg"
-    if pos_found:
-        return "pos"
-
-    strict_thr = max(float(cutoff), FUZZY_STRICT)
-    relaxed_thr = min(float(cutoff), FUZZY_RELAXED)
-    for i, w in enumerate(toks):
-        if len(w) < 4:
-            continue
-        threshold = strict_thr if len(w) < 6 else relaxed_thr
-        for hint in R_NEG_HINTS:
-            if difflib.SequenceMatcher(None, w, hint).ratio() >= threshold:
-                if not negation_near(toks, i, window=2):
-                    neg_found = True
-                break
-        for hint in R_POS_HINTS:
-            if difflib.SequenceMatcher(None, w, hint).ratio() >= threshold:
-                if not negation_near(toks, i, window=2):
-                    pos_found = True
-                break
-        if neg_found and pos_found:
-            return "conflict"
-
-    if neg_found:
-        return "neg"
-    if pos_found:
-        return "pos"
-    return None
-
-def has_soft_neutral_signal(text: str) -> bool:
-    clean = rule_clean("" if text is None else str(text))
-    toks = clean.split()
-    return _has_any_phrase(clean, toks, NEU_SFT_SINGLE, NEU_SFT_MULTI)
-
-def is_neutral_like(text: str, return_reason: bool = False):
-    clean = rule_clean("" if text is None else str(text))
-    toks = clean.split()
-    if _has_any_phrase(clean, toks, NEU_STR_SINGLE, NEU_STR_MULTI):
-        return (True, "neutral_strict_phrase") if return_reason else True
-    if _has_any_phrase(clean, toks, NEU_SFT_SINGLE, NEU_SFT_MULTI):
-        return (True, "soft_neutral_phrase") if return_reason else True
-    if NE_GENERIC_REGEX.search(clean) or NE_NE_REGEX_1.search(clean) or NE_NE_REGEX_2.search(clean):
-        return (True, "ne_ne") if return_reason else True
-    if NOT_BAD_BUT_RE.search(clean):
-        return (True, "not_bad_but") if return_reason else True
-    if GOOD_BUT_RE.search(clean):
-        return (True, "good_but") if return_reason else True
-
-    has_contrast = any(w in toks for w in CONTRAST_TOKENS) or any(ph in clean for ph in R_CONTRAST_PHRASES)
-    if not has_contrast:
-        return (False, None) if return_reason else False
-
-    pos_hit = _has_any_phrase(clean, toks, MILD_POS_SINGLE, MILD_POS_MULTI) or any(t in toks for t in POS_SET)
-    neg_hit = any(t in toks for t in MILD_NEG_WORDS) or any(t in toks for t in NEG_SET)
-    ok = bool(pos_hit and neg_hit)
-    return (ok, "mixed_pos_neg") if return_reason else ok
-
-def validate_text(text):
-    if text is None:
-        return None, "Boş metin"
-    text = str(text)
-    if len(text.strip()) < 2:
-        return None, "Boş veya çok kısa metin"
-    if len(text) > MAX_TEXT_LENGTH:
-        return text[:MAX_TEXT_LENGTH], f"Metin {MAX_TEXT_LENGTH} karaktere kısaltıldı"
-    return text, None
+try:
+    from .kurallar import *  # noqa: F401,F403
+except ImportError:
+    from kurallar import *  # noqa: F401,F403
 
 # ---------------------------------------------------------------------
 # 3) TF-IDF & BERT LOADERS
@@ -579,6 +240,34 @@ def _aggregate_chunk_probs(probs_chunks: np.ndarray, mode: str = "mean_max"):
 
     return p / (p.sum() + 1e-12)
 
+# ---------------------------------------------------------------------
+# ✅ DEADLINE (zaman bütçesi)
+# İstemci (Django) AI_API_TIMEOUT kadar bekler; bütçe bitince BERT'e girmeyiz.
+# ---------------------------------------------------------------------
+class DeadlineExceeded(Exception):
+    """Kalan süre bir BERT adımı için yetersiz."""
+
+BERT_BATCH_COST_DEFAULT_SN = 0.50   # ölçüm yokken bir BERT batch'i için varsayılan tahmin
+_bert_batch_cost_sn = BERT_BATCH_COST_DEFAULT_SN  # gözlenen batch sürelerinin EMA'sı
+
+def remaining_budget(deadline):
+    """deadline (time.monotonic tabanlı) -> kalan saniye. deadline yoksa None."""
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+def has_bert_budget(deadline) -> bool:
+    rem = remaining_budget(deadline)
+    return rem is None or rem >= _bert_batch_cost_sn
+
+def _check_deadline(deadline, stage: str):
+    if not has_bert_budget(deadline):
+        raise DeadlineExceeded(f"{stage}: kalan süre {remaining_budget(deadline):.3f}s")
+
+def _observe_bert_batch(seconds: float):
+    global _bert_batch_cost_sn
+    _bert_batch_cost_sn = 0.8 * _bert_batch_cost_sn + 0.2 * float(seconds)
+
 def bert_predict_proba_batch(
     texts,
     tokenizer,
@@ -588,49 +277,74 @@ def bert_predict_proba_batch(
     max_length=192,
     chunk_stride=64,
     chunk_mode="mean_max",
+    stats_out=None,
+    deadline=None,
+    bert_gate=None,
 ):
     """
     ✅ Uzun metinlerde chunking yapar.
+    ✅ Aynı chunk birden fazla metinde geçiyorsa BERT'e tek kez gider.
+    ✅ deadline verilirse tokenization ve her batch öncesi bütçe kontrol edilir (DeadlineExceeded).
+    ✅ bert_gate: her batch'i saran context manager üreten callable (öncelikli BERT slot'u).
     """
     device = meta["device"]
+    _check_deadline(deadline, "tokenization")
     probs_out = np.zeros((len(texts), 3), dtype=float)
 
-    all_chunks = []
-    owners = []
-    for i, t in enumerate(texts):
+    # owner_spans[i] = (başlangıç, bitiş) -> chunk_pos içindeki aralık
+    chunk_pos = []
+    owner_spans = []
+    uniq_index = {}
+    uniq_chunks = []
+    for t in texts:
         t = "" if t is None else str(t)
         chunks = _split_into_token_chunks(tokenizer, t, max_length=int(max_length), stride=int(chunk_stride))
+        first = len(chunk_pos)
         for ch in chunks:
-            all_chunks.append(ch)
-            owners.append(i)
-
-    owners = np.array(owners, dtype=int)
-    probs_chunks_all = np.zeros((len(all_chunks), 3), dtype=float)
-
-    for start in range(0, len(all_chunks), batch_size):
-        end = min(len(all_chunks), start + batch_size)
-        batch_texts = all_chunks[start:end]
-
-        inputs = tokenizer(
-            batch_texts,
-            return_tensors="pt",
-            truncation=True,
-            padding=True,
-            max_length=int(max_length),
-        )
-        inputs = {k: v.to(device) for k, v in inputs.items()}
+            j = uniq_index.get(ch)
+            if j is None:
+                j = len(uniq_chunks)
+                uniq_index[ch] = j
+                uniq_chunks.append(ch)
+            chunk_pos.append(j)
+        owner_spans.append((first, len(chunk_pos)))
+
+    if stats_out is not None:
+        stats_out["chunks_total"] = len(chunk_pos)
+        stats_out["chunks_unique"] = len(uniq_chunks)
+
+    probs_uniq = np.zeros((len(uniq_chunks), 3), dtype=float)
+
+    for start in range(0, len(uniq_chunks), batch_size):
+        end = min(len(uniq_chunks), start + batch_size)
+        batch_texts = uniq_chunks[start:end]
+
+        with (bert_gate() if bert_gate is not None else nullcontext()):
+            # Slot beklerken bütçe tükenmiş olabilir
+            _check_deadline(deadline, f"bert_batch@{start}")
+            t_batch = time.perf_counter()
+
+            inputs = tokenizer(
+                batch_texts,
+                return_tensors="pt",
+                truncation=True,
+                padding=True,
+                max_length=int(max_length),
+            )
+            inputs = {k: v.to(device) for k, v in inputs.items()}
 
-        with torch.no_grad():
-            logits = model(**inputs).logits
-            probs = torch.softmax(logits, dim=-1).detach().cpu().numpy()
+            with torch.no_grad():
+                logits = model(**inputs).logits
+                probs = torch.softmax(logits, dim=-1).detach().cpu().numpy()
 
-        probs_chunks_all[start:end, 0] = probs[:, meta["idx_neg"]]
-        probs_chunks_all[start:end, 1] = probs[:, meta["idx_neu"]]
-        probs_chunks_all[start:end, 2] = probs[:, meta["idx_pos"]]
+        probs_uniq[start:end, 0] = probs[:, meta["idx_neg"]]
+        probs_uniq[start:end, 1] = probs[:, meta["idx_neu"]]
+        probs_uniq[start:end, 2] = probs[:, meta["idx_pos"]]
+        _observe_bert_batch(time.perf_counter() - t_batch)
 
-    for i in range(len(texts)):
-        idxs = np.where(owners == i)[0]
-        p = _aggregate_chunk_probs(probs_chunks_all[idxs], mode=str(chunk_mode))
+    probs_chunks_all = probs_uniq[np.array(chunk_pos, dtype=int)] if chunk_pos else probs_uniq
+    for i, (first, last) in enumerate(owner_spans):
+        p = _aggregate_chunk_probs(probs_chunks_all[first:last], mode=str(chunk_mode))
         probs_out[i] = p
 
     return probs_out
@@ -646,6 +360,7 @@ _STATS_TEMPLATE = {
     "tfidf": 0,
     "bert": 0,
     "ensemble": 0,
+    "degraded": 0,
     "error": 0,
 }
 
@@ -751,7 +466,15 @@ def ensemble_single(
     conf_threshold=0.50,
     margin_threshold=0.15,
     min_neutral_prob=0.25,
+    deadline=None,
+    bert_on=True,
+    bert_gate=None,
 ):
+    """
+    deadline: time.monotonic() tabanlı son an. Bütçe BERT'e yetmezse (veya bert_on=False)
+    karar kurallar + TF-IDF ile verilir, kaynak "Degraded-TFIDF" olur.
+    bert_gate: bert_predict_proba_batch'e aynen iletilir.
+    """
     logs = []
     try:
         inc_total()
@@ -773,11 +496,12 @@ def ensemble_single(
                     "logs": logs if debug_mode else None,
                 }
             # Strategy 2: BERT re-evaluation on tail only
-            if tokenizer is not None and bert_model is not None:
+            if bert_on and tokenizer is not None and bert_model is not None and has_bert_budget(deadline):
                 try:
                     p_tail = bert_predict_proba_batch(
                         [s_tail], tokenizer, bert_model, bert_meta,
-                        batch_size=1, max_length=int(bert_max_len),
+                        batch_size=1, max_length=int(bert_max_len), deadline=deadline,
+                        bert_gate=bert_gate,
                     )[0]
                     tail_label, _, tail_conf = pick_label_from_probs(p_tail)
                     if tail_label == "OLUMSUZ" and tail_conf >= 0.60:
@@ -818,17 +542,37 @@ def ensemble_single(
         if debug_mode:
             logs.append(f"TFIDF: N={p_tfidf[0]:.2f} U={p_tfidf[1]:.2f} P={p_tfidf[2]:.2f}")
 
-        if tokenizer is None or bert_model is None:
-            raise RuntimeError("BERT failed")
-
-        p_bert = bert_predict_proba_batch(
-            [validated_text],
-            tokenizer,
-            bert_model,
-            bert_meta,
-            batch_size=1,
-            max_length=int(bert_max_len),
-        )[0]
+        degrade_reason = None
+        p_bert = None
+        if not bert_on:
+            degrade_reason = "bert_off"
+        elif tokenizer is None or bert_model is None:
+            # Model yüklenemedi: hata yerine kurallar + TF-IDF ile karar
+            degrade_reason = "bert_missing"
+        else:
+            try:
+                p_bert = bert_predict_proba_batch(
+                    [validated_text],
+                    tokenizer,
+                    bert_model,
+                    bert_meta,
+                    batch_size=1,
+                    max_length=int(bert_max_len),
+                    deadline=deadline,
+                    bert_gate=bert_gate,
+                )[0]
+            except DeadlineExceeded as e:
+                degrade_reason = "deadline"
+                if debug_mode:
+                    logs.append(f"Deadline: {e}")
+
+        if p_bert is None:
+            label, _, conf = pick_label_from_probs(p_tfidf)
+            inc_source("degraded")
+            return label, conf, "Degraded-TFIDF", {
+                "degraded": degrade_reason, "p_tfidf": p_tfidf.tolist(),
+                "logs": logs if debug_mode else None,
+            }
         inc_source("bert")
         if debug_mode:
             logs.append(f"BERT : N={p_bert[0]:.2f} U={p_bert[1]:.2f} P={p_bert[2]:.2f}")
@@ -890,13 +634,22 @@ def ensemble_batch(
     conf_threshold=0.50,
     margin_threshold=0.15,
     min_neutral_prob=0.25,
+    dedup_report=None,
+    deadline=None,
+    bert_on=True,
+    bert_gate=None,
 ):
+    """
+    ✅ In-batch dedup: rule_clean sonrası aynı olan metinler tek anahtara indirgenir,
+    kurallar/TF-IDF/BERT sadece tekil metinler için çalışır, sonuç tüm satırlara dağıtılır.
+    dedup_report (dict) verilirse dedup oranı ve tahmini kazanılan süre yazılır.
+    deadline/bert_on/bert_gate: ensemble_single ile aynı; bütçe yetmezse kalan satırlar "Degraded-TFIDF".
+    """
     try:
         n = len(texts)
         labels = np.array([""] * n, dtype=object)
         conf_scores = np.zeros(n, dtype=float)
         sources = np.array([""] * n, dtype=object)
-        unresolved = np.ones(n, dtype=bool)
         processed = [None] * n
 
         for i in range(n):
@@ -906,75 +659,114 @@ def ensemble_batch(
                 labels[i] = "GEÇERSİZ"
                 conf_scores[i] = 0.0
                 sources[i] = "Error"
-                unresolved[i] = False
                 inc_source("error")
             else:
                 processed[i] = vt
 
+        # --- DEDUP: anahtar -> satırlar (ilk satır temsilci) ---
+        key_rows = {}
+        for i in range(n):
+            if processed[i] is not None:
+                key_rows.setdefault(dedup_key(processed[i]), []).append(i)
+        groups = list(key_rows.values())
+        g_count = len(groups)
+        g_size = np.array([len(rows) for rows in groups], dtype=int)
+        g_text = [processed[rows[0]] for rows in groups]
+
+        g_labels = np.array([""] * g_count, dtype=object)
+        g_conf = np.zeros(g_count, dtype=float)
+        g_sources = np.array([""] * g_count, dtype=object)
+        unresolved = np.ones(g_count, dtype=bool)
+
         if progress_callback:
             progress_callback(0.05)
 
         if use_guardrail:
-            for i in range(n):
-                if not unresolved[i]:
-                    continue
-                h = check_guardrails(processed[i], cutoff=guard_cutoff)
+            for g in range(g_count):
+                h = check_guardrails(g_text[g], cutoff=guard_cutoff)
                 if h in ["neg", "pos", "neutral"]:
                     mapping = {"neg": "OLUMSUZ", "pos": "OLUMLU", "neutral": "NÖTR"}
-                    labels[i] = mapping[h]
-                    conf_scores[i] = 0.99
-                    sources[i] = "Guardrail"
-                    unresolved[i] = False
-                    inc_source("guardrail")
+                    g_labels[g] = mapping[h]
+                    g_conf[g] = 0.99
+                    g_sources[g] = "Guardrail"
+                    unresolved[g] = False
+                    inc_source_n("guardrail", g_size[g])
 
         if progress_callback:
             progress_callback(0.20)
 
         if neutral_on:
-            for i in range(n):
-                if not unresolved[i]:
+            for g in range(g_count):
+                if not unresolved[g]:
                     continue
-                if is_neutral_like(processed[i]):
-                    labels[i] = "NÖTR"
-                    conf_scores[i] = 0.99
-                    sources[i] = "NeutralRule"
-                    unresolved[i] = False
-                    inc_source("neutralrule")
+                if is_neutral_like(g_text[g]):
+                    g_labels[g] = "NÖTR"
+                    g_conf[g] = 0.99
+                    g_sources[g] = "NeutralRule"
+                    unresolved[g] = False
+                    inc_source_n("neutralrule", g_size[g])
 
         if progress_callback:
             progress_callback(0.35)
 
         idxs = np.where(unresolved)[0]
+        model_rows = int(g_size[idxs].sum()) if len(idxs) > 0 else 0
+        chunk_stats = {}
+        model_sn = 0.0
+        bert_sn = 0.0
         if len(idxs) > 0:
-            tfidf_texts = [processed[i] for i in idxs]
+            t0 = time.perf_counter()
+            tfidf_texts = [g_text[g] for g in idxs]
             p_tfidf_all = tfidf_predict_proba(tfidf_texts)
-            inc_source_n("tfidf", len(idxs))
-
-            bert_texts = [processed[i] for i in idxs]
-            p_bert_all = bert_predict_proba_batch(
-                bert_texts,
-                tokenizer,
-                bert_model,
-                bert_meta,
-                batch_size=max(1, int(bert_batch_size)),
-                max_length=int(bert_max_len),
-            )
-            inc_source_n("bert", len(idxs))
+            inc_source_n("tfidf", model_rows)
+
+            t1 = time.perf_counter()
+            bert_texts = [g_text[g] for g in idxs]
+            p_bert_all = None
+            # Model yüklenemediyse ensemble_single gibi TF-IDF'e düşülür
+            if bert_on and tokenizer is not None and bert_model is not None:
+                try:
+                    p_bert_all = bert_predict_proba_batch(
+                        bert_texts,
+                        tokenizer,
+                        bert_model,
+                        bert_meta,
+                        batch_size=max(1, int(bert_batch_size)),
+                        max_length=int(bert_max_len),
+                        stats_out=chunk_stats,
+                        deadline=deadline,
+                        bert_gate=bert_gate,
+                    )
+                    inc_source_n("bert", model_rows)
+                except DeadlineExceeded:
+                    p_bert_all = None
+            bert_sn = time.perf_counter() - t1
+            model_sn = time.perf_counter() - t0
 
             tw, bw = float(tfidf_weight), float(bert_weight)
             if tw + bw <= 0:
                 tw, bw = 0.5, 0.5
 
-            for k, i in enumerate(idxs):
+            for k, g in enumerate(idxs):
                 p_tfidf = p_tfidf_all[k]
+
+                if p_bert_all is None:
+                    lab, _, conf = pick_label_from_probs(p_tfidf)
+                    g_labels[g] = lab
+                    g_conf[g] = conf
+                    g_sources[g] = "Degraded-TFIDF"
+                    unresolved[g] = False
+                    inc_source_n("degraded", g_size[g])
+                    continue
+
                 p_bert = p_bert_all[k]
 
                 if use_neutral_band and apply_neutral_band(p_bert, bert_neutral_low, bert_neutral_high):
-                    labels[i] = "NÖTR"
-                    conf_scores[i] = float(p_bert[1])
-                    sources[i] = "Neutral-BERTBand"
-                    unresolved[i] = False
-                    inc_source("ensemble")
+                    g_labels[g] = "NÖTR"
+                    g_conf[g] = float(p_bert[1])
+                    g_sources[g] = "Neutral-BERTBand"
+                    unresolved[g] = False
+                    inc_source_n("ensemble", g_size[g])
                     continue
 
                 p_mix = tw * p_tfidf + bw * p_bert
@@ -983,26 +775,55 @@ def ensemble_batch(
                 if uncertain_to_neutral_on:
                     _, _, t1, t2, marg = top2_info(p_mix)
                     p_neu = float(p_mix[1])
-                    soft_neu = has_soft_neutral_signal(processed[i])
+                    soft_neu = has_soft_neutral_signal(g_text[g])
 
                     ce = max(float(conf_threshold), 0.57) if soft_neu else float(conf_threshold)
                     me = max(float(margin_threshold), 0.22) if soft_neu else float(margin_threshold)
                     mn = min(float(min_neutral_prob), 0.18) if soft_neu else float(min_neutral_prob)
 
                     if (t1 < ce) and (marg < me) and (p_neu >= mn):
-                        labels[i] = "NÖTR"
-                        conf_scores[i] = p_neu
-                        sources[i] = "Uncertain→Neutral"
-                        unresolved[i] = False
-                        inc_source("uncertainneutral")
+                        g_labels[g] = "NÖTR"
+                        g_conf[g] = p_neu
+                        g_sources[g] = "Uncertain→Neutral"
+                        unresolved[g] = False
+                        inc_source_n("uncertainneutral", g_size[g])
                         continue
 
                 lab, _, conf = pick_label_from_probs(p_mix)
-                labels[i] = lab
-                conf_scores[i] = conf
-                sources[i] = "Ensemble"
-                unresolved[i] = False
-                inc_source("ensemble")
+                g_labels[g] = lab
+                g_conf[g] = conf
+                g_sources[g] = "Ensemble"
+                unresolved[g] = False
+                inc_source_n("ensemble", g_size[g])
+
+        # --- FAN-OUT: tekil sonuçları tüm satırlara dağıt ---
+        for g, rows in enumerate(groups):
+            labels[rows] = g_labels[g]
+            conf_scores[rows] = g_conf[g]
+            sources[rows] = g_sources[g]
+
+        if dedup_report is not None:
+            valid_rows = int(g_size.sum())
+            saved_sn = 0.0
+            if len(idxs) > 0:
+                # Tekil metin başına model maliyeti x atlanan tekrar satır
+                saved_sn += model_sn / len(idxs) * (model_rows - len(idxs))
+                c_total = chunk_stats.get("chunks_total", 0)
+                c_uniq = chunk_stats.get("chunks_unique", 0)
+                if c_uniq:
+                    saved_sn += bert_sn / c_uniq * (c_total - c_uniq)
+            dedup_report.update({
+                "rows": n,
+                "valid_rows": valid_rows,
+                "unique_texts": g_count,
+                "dedup_ratio": (1.0 - g_count / valid_rows) if valid_rows else 0.0,
+                "model_rows": model_rows,
+                "model_unique": int(len(idxs)),
+                "chunks_total": chunk_stats.get("chunks_total", 0),
+                "chunks_unique": chunk_stats.get("chunks_unique", 0),
+                "model_sn": model_sn,
+                "saved_sn_est": saved_sn,
+            })
 
         if progress_callback:
             progress_callback(1.0)
@@ -1076,6 +897,7 @@ if RUNNING_IN_STREAMLIT:
             st.write(f"🟪 BERT: {stats['bert']}")
             st.write(f"🤷 Uncertain→Nötr: {stats['uncertainneutral']}")
             st.write(f"🧩 Ensemble: {stats['ensemble']}")
+            st.write(f"⏱️ Degraded (TF-IDF): {stats['degraded']}")
             st.write(f"❌ Error: {stats['error']}")
 
     tab1, tab2 = st.tabs(["💬 Tekli Analiz", "📂 Toplu Analiz"])
@@ -1146,6 +968,7 @@ if RUNNING_IN_STREAMLIT:
                         progress_bar.progress(int(p * 100))
                         status_text.text(f"%{int(p*100)}")
 
+                    dedup_report = {}
                     with st.spinner("Çalışıyor..."):
                         labels, confs, srcs = ensemble_batch(
                             texts,
@@ -1164,10 +987,18 @@ if RUNNING_IN_STREAMLIT:
                             conf_threshold,
                             margin_threshold,
                             min_neutral_prob,
+                            dedup_report=dedup_report,
                         )
 
                     progress_bar.empty()
                     status_text.empty()
+                    if dedup_report:
+                        st.caption(
+                            f"Dedup: {dedup_report['valid_rows']} satır → {dedup_report['unique_texts']} tekil metin "
+                            f"(%{dedup_report['dedup_ratio']*100:.1f}) | "
+                            f"Chunk: {dedup_report['chunks_total']} → {dedup_report['chunks_unique']} | "
+                            f"Tahmini kazanç: {dedup_report['saved_sn_est']:.2f} sn"
+                        )
 
                     df["AI_Karari"] = labels
                     df["Guven_%"] = np.round(np.array(confs) * 100, 1)
@@ -1,32 +1,178 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Request
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
+from typing import List, Optional
 import uvicorn
 import logging
+import os
+import threading
+import time
 
 try:
-    from yapay_zeka_servisi.app_ensemble import ensemble_single
+    from yapay_zeka_servisi.app_ensemble import ensemble_single, ensemble_batch, dedup_key
+    from yapay_zeka_servisi.admission import (
+        AdmissionController, QueueFull, INTERACTIVE, BULK, normalize_priority,
+    )
+    from yapay_zeka_servisi.singleflight import SingleFlight
 except ImportError:
     # Lokal calistirmada path sorunu olursa
-    from app_ensemble import ensemble_single
+    from app_ensemble import ensemble_single, ensemble_batch, dedup_key
+    from admission import AdmissionController, QueueFull, INTERACTIVE, BULK, normalize_priority
+    from singleflight import SingleFlight
 
 # Loglama
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Deadline ayarları
+# İstemci bütçesinden düşülen pay (yanıtın istemciye dönüş süresi için)
+DEADLINE_MARGIN_SN = float(os.environ.get("AI_DEADLINE_MARGIN_SN", "0.25"))
+# Sınıfın BERT yükü (AdmissionController.bert_load) bundan fazlaysa BERT atlanır (rules + TF-IDF);
+# bulk yığılması interactive istekleri degrade etmez
+DEGRADE_INFLIGHT = int(os.environ.get("AI_DEGRADE_INFLIGHT", "4"))
+# /analiz/toplu: istek başına en fazla yorum
+MAX_TOPLU = int(os.environ.get("AI_MAX_TOPLU", "256"))
+
+# Admission control: sınıf başına kuyruk sınırı ve BERT eşzamanlılığı
+admission = AdmissionController(
+    limits={
+        INTERACTIVE: int(os.environ.get("AI_QUEUE_INTERACTIVE", "32")),
+        BULK: int(os.environ.get("AI_QUEUE_BULK", "8")),
+    },
+    bert_slots=int(os.environ.get("AI_BERT_SLOTS", "1")),
+)
+
+# Aynı normalize metin için uçuştaki analizler tek hesaplamayı paylaşır
+flight = SingleFlight()
+
+_counters = {"deadline_dropped": 0}
+_counters_lock = threading.Lock()
+
 app = FastAPI(title="Sezer Film AI API", version="1.0")
 
 class YorumModel(BaseModel):
     yorum_metni: str
+    deadline_ms: Optional[int] = None  # X-Deadline-Ms header'ı yoksa kullanılır
+    oncelik: Optional[str] = None      # X-Priority header'ı yoksa kullanılır (interactive | bulk)
+
+class TopluModel(BaseModel):
+    yorumlar: List[str]
+    deadline_ms: Optional[int] = None
+    oncelik: Optional[str] = None      # varsayılan bulk
+
+@app.middleware("http")
+async def stamp_arrival(request: Request, call_next):
+    # Threadpool kuyruğunda geçen süre de bütçeden düşülsün diye geliş anı
+    request.state.arrival = time.monotonic()
+    return await call_next(request)
+
+def _resolve_deadline(request: Request, header_ms: Optional[int], body_ms: Optional[int]):
+    budget_ms = header_ms if header_ms is not None else body_ms
+    if budget_ms is None:
+        return None
+    arrival = getattr(request.state, "arrival", time.monotonic())
+    return arrival + budget_ms / 1000.0 - DEADLINE_MARGIN_SN
 
 @app.get("/")
 def read_root():
     return {"durum": "aktif", "servis": "Sezer Film AI"}
 
+@app.get("/metrikler")
+def metrikler():
+    with _counters_lock:
+        counters = dict(_counters)
+    return {"kuyruk": admission.metrics(), "singleflight": flight.stats(), **counters}
+
 @app.post("/analiz")
-def analiz_et(veri: YorumModel):
+def analiz_et(
+    veri: YorumModel,
+    request: Request,
+    x_deadline_ms: Optional[int] = Header(None),
+    x_priority: Optional[str] = Header(None),
+):
+    deadline = _resolve_deadline(request, x_deadline_ms, veri.deadline_ms)
+    priority = normalize_priority(x_priority or veri.oncelik)
+
+    # İstemci çoktan vazgeçtiyse hiç iş yapmadan düşür
+    if deadline is not None and time.monotonic() >= deadline:
+        with _counters_lock:
+            _counters["deadline_dropped"] += 1
+        logger.warning("Deadline geçmiş istek düşürüldü (kuyrukta %.3fs)", time.monotonic() - request.state.arrival)
+        return JSONResponse(status_code=504, content={"detail": "deadline_exceeded"})
+
+    def run():
+        with admission.admit(priority):
+            return _analiz(veri.yorum_metni, deadline, priority)
+
+    # Follower, leader'ı en fazla kendi kalan bütçesi kadar bekler
+    wait = None if deadline is None else max(0.0, deadline - time.monotonic())
     try:
-        label, conf, src, dbg = ensemble_single(veri.yorum_metni)
-        
+        try:
+            result, _ = flight.do((dedup_key(veri.yorum_metni), priority), run, timeout=wait)
+        except TimeoutError:
+            # Leader bütçemizden uzun sürdü: kendi (büyük ihtimalle degrade) analizimizi yap
+            result = run()
+        return result
+    except QueueFull as e:
+        logger.warning("Yük atıldı: %s (Retry-After=%ss)", e, e.retry_after)
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "queue_full", "oncelik": e.cls},
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+@app.post("/analiz/toplu")
+def analiz_toplu(
+    veri: TopluModel,
+    request: Request,
+    x_deadline_ms: Optional[int] = Header(None),
+    x_priority: Optional[str] = Header(None),
+):
+    """
+    Çok yorum tek istekte (yeniden analiz, içe aktarma): tek ensemble_batch çağrısı
+    (BERT batch'leri + in-batch dedup). Sonuçlar yorumlarla aynı sırada.
+    """
+    if len(veri.yorumlar) > MAX_TOPLU:
+        return JSONResponse(status_code=413, content={"detail": "too_many", "max": MAX_TOPLU})
+
+    deadline = _resolve_deadline(request, x_deadline_ms, veri.deadline_ms)
+    priority = normalize_priority(x_priority or veri.oncelik or BULK)
+    try:
+        with admission.admit(priority):
+            labels, confs, sources = ensemble_batch(
+                veri.yorumlar,
+                deadline=deadline,
+                bert_on=admission.bert_load(priority) <= DEGRADE_INFLIGHT,
+                bert_gate=admission.gate_for(priority),
+            )
+    except QueueFull as e:
+        logger.warning("Yük atıldı (toplu): %s (Retry-After=%ss)", e, e.retry_after)
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "queue_full", "oncelik": e.cls},
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+    sonuclar = []
+    for label, conf, src in zip(labels, confs, sources):
+        if label == "HATA":
+            sonuclar.append({"karar": "NÖTR", "guven_skoru": 0.0, "kaynak": "error"})
+        elif label == "GEÇERSİZ":
+            sonuclar.append({"karar": "NÖTR", "guven_skoru": 0.0, "kaynak": "invalid_input"})
+        else:
+            sonuclar.append({"karar": label, "guven_skoru": float(conf), "kaynak": f"api::{src}"})
+    return {"sonuclar": sonuclar}
+
+def _analiz(yorum_metni: str, deadline, priority: str):
+    try:
+        bert_on = admission.bert_load(priority) <= DEGRADE_INFLIGHT
+        label, conf, src, dbg = ensemble_single(
+            yorum_metni,
+            deadline=deadline,
+            bert_on=bert_on,
+            bert_gate=admission.gate_for(priority),
+        )
+
         # Hata kontrolü
         if label == "HATA":
             logger.error(f"Analiz hatası: {dbg}")
@@ -0,0 +1,71 @@
+"""
+Aynı anda süren özdeş işleri birleştirme (singleflight / request coalescing).
+
+Aynı anahtarla gelen eşzamanlı çağrılardan yalnızca ilki (leader) fonksiyonu çalıştırır;
+diğerleri (follower) onun bitmesini bekler ve aynı sonucu (veya aynı hatayı) alır.
+İş bitince anahtar silinir, yani bu bir cache değildir: sadece "uçuştaki" işleri paylaşır.
+"""
+import threading
+
+
+class _Call:
+    __slots__ = ("done", "value", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {"leaders": 0, "shared": 0, "wait_timeouts": 0}
+
+    def do(self, key, fn, timeout=None):
+        """
+        fn()'i key için en fazla bir kez (aynı anda) çalıştırır.
+        Dönüş: (sonuç, paylaşıldı_mı). Follower timeout saniyede sonuç alamazsa TimeoutError.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                self._stats["leaders"] += 1
+                leader = True
+            else:
+                call.waiters += 1
+                leader = False
+
+        if not leader:
+            if not call.done.wait(timeout):
+                with self._lock:
+                    self._stats["wait_timeouts"] += 1
+                raise TimeoutError(f"singleflight bekleme süresi doldu: {key!r}")
+            with self._lock:
+                self._stats["shared"] += 1
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.value, False
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "in_flight": len(self._calls)}